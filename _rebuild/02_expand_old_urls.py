@@ -7,8 +7,8 @@ import json
 import re
 import requests
 import time
-import os
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from journal import Journal
 
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -16,7 +16,7 @@ HEADERS = {
 }
 
 OUT_FILE = '_rebuild/old_db_with_or_id.json'
-PROGRESS_FILE = '_rebuild/old_db_with_or_id.progress.json'
+PROGRESS_FILE = '_rebuild/old_db_with_or_id.progress.jsonl'
 
 def expand_one(idx, restaurant):
     short_url = restaurant.get('url', '')
@@ -40,11 +40,10 @@ def main():
         db = json.load(f)['restaurants']
     print(f"舊 DB 總數: {len(db)}")
 
-    # resume：如果已有 progress 檔，繼續
-    results = {}
-    if os.path.exists(PROGRESS_FILE):
-        with open(PROGRESS_FILE, encoding='utf-8') as f:
-            results = {int(k): v for k, v in json.load(f).items()}
+    # resume：progress 日誌每筆一行（journal.py），舊版 .json 會自動轉換
+    progress_log = Journal(PROGRESS_FILE, sync_every=50)
+    results = {int(k): v for k, v in progress_log.load().items()}
+    if results:
         print(f"從 progress 載入 {len(results)} 筆已展開的結果")
 
     todo_idxs = [i for i in range(len(db)) if i not in results]
@@ -52,20 +51,15 @@ def main():
 
     if todo_idxs:
         completed = 0
-        with ThreadPoolExecutor(max_workers=8) as ex:
+        with progress_log, ThreadPoolExecutor(max_workers=8) as ex:
             futures = {ex.submit(expand_one, i, db[i]): i for i in todo_idxs}
             for fut in as_completed(futures):
                 idx, or_id, final_url, status = fut.result()
                 results[idx] = {'or_id': or_id, 'final_url': final_url, 'status': status}
+                progress_log.append(str(idx), results[idx])
                 completed += 1
                 if completed % 50 == 0:
                     print(f"  進度 {completed}/{len(todo_idxs)}  最新: idx={idx} or_id={or_id} status={status}")
-                    # flush progress
-                    with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-                        json.dump({str(k): v for k, v in results.items()}, f, ensure_ascii=False, indent=2)
-
-        with open(PROGRESS_FILE, 'w', encoding='utf-8') as f:
-            json.dump({str(k): v for k, v in results.items()}, f, ensure_ascii=False, indent=2)
 
     # 統計
     statuses = {}
@@ -3,46 +3,132 @@
 重爬全部 916 間有效餐廳的詳細資料（更新到最新）
 
 策略：
-- 慢速：每筆 3-5 秒（隨機 jitter）
-- 單線程：避免再次觸發反爬蟲
-- 進度可 resume：每 30 筆 flush 一次到 .progress.json
-- 遇 Captcha 立刻停下，等用戶解除後再 resume
+- 配速：每個 host 一個 token bucket，穩定跑在 --rate 設定的速率（預設 0.25 筆/秒），
+  不再每筆固定 sleep；請求慢的時候也不會浪費額度
+- 少量並行：最多 --concurrency 個請求同時在飛（預設 2），速率仍由 token bucket 決定
+- 進度可 resume：每筆 append 到 rescrape.progress.jsonl（journal.py，每 30 筆 fsync）
+- 遇 Captcha 立刻停下（在飛的請求收尾後），等用戶解除後再 resume
 
 用法:
-  python3 _rebuild/05_rescrape.py [--only-needs-scrape] [--limit N]
+  python3 _rebuild/05_rescrape.py [--only-needs-scrape] [--limit N] [--fields F1,F2]
+                                  [--rate R] [--burst B] [--concurrency C]
 
   --only-needs-scrape : 只重爬 needs_scrape=true 的（即 173 間新店）
   --limit N           : 只爬前 N 筆（測試用）
+  --budget N          : 排程模式，只爬 scheduler.py 評分最高的 N 間（例行刷新用）
+  --fields F1,F2      : 只跑指定欄位的 extractor（預設全部）
+                        可用：closed, cuisine, budget, hours, images, dish, coordinates
+                        例：只刷新預算和營業時間 → --fields budget,hours
+                        每頁仍只下載一次，06_merge_scraped.py 只會寫回有爬到的欄位
+  --rate R            : 每個 host 每秒請求數（預設 0.25）
+  --burst B           : token bucket 容量（預設 1，不連發）
+  --concurrency C     : 同時在飛的請求上限（預設 2）
+  --parse-workers P   : pipeline 模式，抓取只做 IO，HTML 進有上限的 queue 交給 P 個 process
+                        平行 parse（parse 是 CPU-bound，執行緒會被 GIL 卡住）；--replay 也適用
+  --parser fast       : 用單趟事件 parser（fastparse.py，輸出和預設的 bs4 相同、快數倍）
+  --replay            : 不打網路，從 _rebuild/page_cache 重新 parse（parser 改版後用，幾秒跑完）
+  --no-cache          : 不存原始 HTML（預設每頁都存進 page cache）
+  --force             : 忽略上次的 ETag / Last-Modified / 內容指紋，每頁都重新 parse
+
+變更偵測：每頁的 ETag / Last-Modified / 正規化內容指紋存在 rescrape.validators.jsonl。
+下次送 conditional GET；回 304 或指紋沒變就不 parse，進度記 unchanged，06 merge 會跳過。
 
 對於 needs_scrape=true 但沒 URL 的店，會 skip（需要先用 find_urls.py 補 URL）
 """
 import json
-import os
 import sys
+import time
+import asyncio
 import argparse
-from scraper import make_session, fetch_and_parse, sleep_jitter, CaptchaError
+from scraper import (make_session, crawl, parse_many, resolve_fields, sleep_jitter, CaptchaError,
+                     PARSERS)
+from page_cache import PageCache, DEFAULT_ROOT as PAGE_CACHE_DIR
+from scheduler import plan, record_check, STATE_FILE
+from journal import Journal
 
 DEFAULT_DB = 'restaurants_database.json'
-PROGRESS = '_rebuild/rescrape.progress.json'
-
-def load_progress() -> dict:
-    if os.path.exists(PROGRESS):
-        with open(PROGRESS, encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-def save_progress(data: dict):
-    with open(PROGRESS, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+# 進度 / validators 都是 append-only JSONL 日誌（journal.py）：每筆 append 一行，
+# 每 30 筆 fsync，不再整份重寫；舊版 .json 第一次讀到會自動轉換
+PROGRESS = '_rebuild/rescrape.progress.jsonl'
+# 每個 or_id 上次抓到的 ETag / Last-Modified / 內容指紋（下次送 conditional GET 用），
+# 加上檢查次數 / 變動次數（scheduler.py 排程用）
+VALIDATORS = STATE_FILE
+
+def summarize(result: dict) -> str:
+    """只列出這次有爬的欄位"""
+    parts = []
+    if 'cuisine_style' in result:
+        parts.append(f"cuisine={len(result['cuisine_style'])}")
+    if 'type' in result:
+        parts.append(f"type={len(result['type'])}")
+    if 'budget' in result:
+        parts.append(f"budget={result['budget']}")
+    if 'opening_hours' in result:
+        parts.append(f"hours={sum(1 for v in result['opening_hours'].values() if v)}d")
+    if 'images' in result:
+        parts.append(f"img={len(result['images'])}")
+    if 'dish' in result:
+        parts.append(f"dish={len(result['dish'])}")
+    if 'coordinates' in result:
+        parts.append(f"coords={'Y' if result['coordinates'] else 'N'}")
+    return ', '.join(parts)
+
+def replay(targets: list, progress: Journal, cache: PageCache, fields: list, limit=None,
+           parse_workers: int = 0, parser: str = 'bs4'):
+    """--replay：所有目標（不管 progress 是否已完成）都從快取重新 parse，覆蓋進度檔"""
+    targets = [r for r in targets if r.get('url')]
+    if limit:
+        targets = targets[:limit]
+    cached = []
+    for r in targets:
+        entry = cache.get(r['url'])
+        if entry:
+            cached.append((r, entry))
+    missing = len(targets) - len(cached)
+    print(f"\nReplay 模式（不打網路），欄位: {', '.join(fields)}，parser: {parser}"
+          f"{f'，{parse_workers} 個 parse process' if parse_workers else ''}")
+    started = time.perf_counter()
+    htmls = (cache.read(entry) for _, entry in cached)
+    for (r, entry), parsed in zip(cached, parse_many(htmls, fields, parse_workers, parser=parser)):
+        progress.append(str(r['or_id']), {**parsed, 'final_url': entry['final_url'], 'ok': True,
+                                          'fetched_at': entry['fetched_at']})
+    progress.close()
+    elapsed = time.perf_counter() - started
+    print(f"重新 parse {len(cached)} 頁，用時 {elapsed:.1f}s")
+    if missing:
+        print(f"快取裡沒有: {missing} 間（要先正常爬過一次）")
+    print(f"結果存在 {PROGRESS}，接著跑 06_merge_scraped.py")
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--only-needs-scrape', action='store_true')
     ap.add_argument('--limit', type=int, default=None)
-    ap.add_argument('--base-delay', type=float, default=3.0)
+    ap.add_argument('--budget', type=int, default=None,
+                    help='排程模式：只爬 scheduler.py 評分最高的 N 間（過期程度 × 重要性）')
+    ap.add_argument('--rate', type=float, default=0.25,
+                    help='每個 host 每秒最多幾個請求（token bucket，預設 0.25 = 平均 4 秒一筆）')
+    ap.add_argument('--burst', type=int, default=1, help='token bucket 容量（可瞬間連發幾筆）')
+    ap.add_argument('--concurrency', type=int, default=2, help='同時在飛的請求上限')
+    ap.add_argument('--parse-workers', type=int, default=0,
+                    help='pipeline 模式：用 N 個 process 平行 parse（0 = 在抓取執行緒裡直接 parse）')
+    ap.add_argument('--parser', choices=PARSERS, default='bs4',
+                    help='HTML parser backend（fast = 單趟事件 parser，見 fastparse.py）')
+    ap.add_argument('--no-warmup', action='store_true', help='不先訪問首頁（本機 stand-in 測試用）')
     ap.add_argument('--db', default=DEFAULT_DB, help='Database file to read URLs from')
+    ap.add_argument('--fields', default=None, help='只跑這些欄位 extractor（逗號分隔，預設全部）')
+    ap.add_argument('--replay', action='store_true',
+                    help='不打網路，從 page cache 重新 parse 已快取的頁面（parser 改版後用）')
+    ap.add_argument('--cache-dir', default=PAGE_CACHE_DIR, help='原始 HTML 快取位置')
+    ap.add_argument('--no-cache', action='store_true', help='不把抓到的 HTML 存進快取')
+    ap.add_argument('--force', action='store_true',
+                    help='不送 conditional GET、不比對指紋，每頁都完整 parse')
     args = ap.parse_args()
 
+    try:
+        fields = resolve_fields(args.fields)
+    except ValueError as e:
+        ap.error(str(e))
+
     with open(args.db, encoding='utf-8') as f:
         data = json.load(f)
     restaurants = data['restaurants']
@@ -51,7 +137,8 @@ def main():
     if args.only_needs_scrape:
         targets = [r for r in targets if r.get('needs_scrape')]
 
-    progress = load_progress()
+    progress_log = Journal(PROGRESS)
+    progress = progress_log.load()
     done = set(progress.keys())
 
     todo = [r for r in targets if str(r['or_id']) not in done and r.get('url')]
@@ -62,6 +149,19 @@ def main():
     print(f"待爬: {len(todo)}")
     print(f"跳過（無 URL，待 find_urls.py 補）: {len(skipped_no_url)}")
 
+    if args.replay:
+        replay(targets, progress_log, PageCache(args.cache_dir), fields, args.limit,
+               args.parse_workers, args.parser)
+        return
+
+    validators_log = Journal(VALIDATORS)
+    validators = validators_log.load()
+    if args.budget is not None:
+        # 排程模式不看 progress 的「已完成」：剛爬過的分數本來就趨近 0，
+        # 例行刷新不用每次清進度檔
+        todo = plan([r for r in targets if r.get('url')], validators, args.budget)
+        print(f"排程模式：挑出最該刷新的 {len(todo)} 間（預算 {args.budget}）")
+
     if args.limit:
         todo = todo[:args.limit]
 
@@ -69,59 +169,79 @@ def main():
         print("沒有要爬的，結束")
         return
 
-    session = make_session()
-    # 暖機：先訪問首頁
-    print("\n暖機：訪問首頁...")
-    try:
-        r = session.get('https://tw.openrice.com/zh/taiwan', timeout=15)
-        if 'captcha' in r.url.lower():
-            print(f"❌ 首頁就被 Captcha 擋: {r.url}")
-            print("   IP 還在冷卻中，等 1-2 小時再試")
+    session = make_session(pool_size=max(10, args.concurrency))
+    if not args.no_warmup:
+        # 暖機：先訪問首頁
+        print("\n暖機：訪問首頁...")
+        try:
+            r = session.get('https://tw.openrice.com/zh/taiwan', timeout=15)
+            if 'captcha' in r.url.lower():
+                print(f"❌ 首頁就被 Captcha 擋: {r.url}")
+                print("   IP 還在冷卻中，等 1-2 小時再試")
+                return
+            print(f"  [{r.status_code}] OK, cookies: {len(session.cookies)}")
+        except Exception as e:
+            print(f"暖機失敗: {e}")
             return
-        print(f"  [{r.status_code}] OK, cookies: {len(session.cookies)}")
-    except Exception as e:
-        print(f"暖機失敗: {e}")
-        return
 
-    sleep_jitter(2, 1)
-
-    print(f"\n開始爬 {len(todo)} 筆，每筆延遲 {args.base_delay}-{args.base_delay+2}s")
-    for i, r in enumerate(todo, 1):
-        url = r['url']
-        print(f"[{i}/{len(todo)}] or_id={r['or_id']}  {r['name'][:30]}", end='  ')
-        try:
-            result = fetch_and_parse(session, url)
-            if result.get('ok'):
-                if result.get('closed'):
-                    print(f"⚠ 已結業")
-                else:
-                    print(f"✓ cuisine={len(result.get('cuisine_style',[]))}, "
-                          f"type={len(result.get('type',[]))}, "
-                          f"budget={result.get('budget')}, "
-                          f"hours={sum(1 for v in result.get('opening_hours',{}).values() if v)}d, "
-                          f"img={len(result.get('images',[]))}")
-            else:
-                print(f"✗ {result.get('error','?')}")
-            progress[str(r['or_id'])] = result
-        except CaptchaError as e:
-            print(f"\n\n❌ 被 Captcha 擋住: {e}")
-            print(f"   已存進度到 {PROGRESS}")
-            print(f"   等 1-2 小時後再 resume：python3 _rebuild/05_rescrape.py")
-            save_progress(progress)
-            sys.exit(1)
-        except KeyboardInterrupt:
-            print("\n中斷，存進度")
-            save_progress(progress)
-            sys.exit(0)
-
-        if i % 30 == 0:
-            save_progress(progress)
-            print(f"  --- 已存進度 ({len(progress)}/{len(targets)}) ---")
-
-        sleep_jitter(args.base_delay, 2.0)
-
-    save_progress(progress)
+        sleep_jitter(2, 1)
+
+    print(f"\n欄位: {', '.join(fields)}，parser: {args.parser}")
+    print(f"開始爬 {len(todo)} 筆，每個 host 每秒 {args.rate} 筆（burst {args.burst}），"
+          f"同時最多 {args.concurrency} 筆"
+          f"{f'，{args.parse_workers} 個 parse process' if args.parse_workers else ''}")
+    by_id = {str(r['or_id']): r for r in todo}
+    count = [0]
+    unchanged = [0]
+    # 只有全部欄位都 parse 過的結果才能當「沒變」的基準，
+    # 不然 --fields budget 跑完後再全量跑，其他欄位會被誤判沒變而跳過
+    full_run = fields == resolve_fields(None)
+
+    def checkpoint():
+        progress_log.close()
+        validators_log.close()
+
+    def on_result(or_id, result):
+        count[0] += 1
+        r = by_id[or_id]
+        v = result.pop('validators', None)
+        if v and full_run:
+            record_check(validators, or_id, v, changed=not result.get('unchanged'))
+            validators_log.append(or_id, validators[or_id])
+        line = f"[{count[0]}/{len(todo)}] or_id={or_id}  {r['name'][:30]}  "
+        if result.get('unchanged'):
+            unchanged[0] += 1
+            line += "= 沒變，略過"
+        elif result.get('ok'):
+            line += "⚠ 已結業" if result.get('closed') else f"✓ {summarize(result)}"
+        else:
+            line += f"✗ {result.get('error','?')}"
+        print(line)
+        progress[or_id] = result
+        progress_log.append(or_id, result)
+
+    items = [(str(r['or_id']), r['url']) for r in todo]
+    cache = None if args.no_cache else PageCache(args.cache_dir)
+    try:
+        asyncio.run(crawl(session, items, on_result, rate=args.rate, burst=args.burst,
+                          concurrency=args.concurrency, fields=fields, cache=cache,
+                          validators={} if args.force else validators,
+                          parse_workers=args.parse_workers,
+                          parser=args.parser))
+    except CaptchaError as e:
+        print(f"\n\n❌ 被 Captcha 擋住: {e}")
+        print(f"   已存進度到 {PROGRESS}")
+        print(f"   等 1-2 小時後再 resume：python3 _rebuild/05_rescrape.py")
+        checkpoint()
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n中斷，存進度")
+        checkpoint()
+        sys.exit(0)
+
+    checkpoint()
     print(f"\n完成！結果存在 {PROGRESS}")
+    print(f"內容沒變（304 或指紋相同，未 parse）: {unchanged[0]} 筆")
     print(f"接下來執行 06_merge_scraped.py 將爬到的資料 merge 回 new_restaurants_database.json")
 
 
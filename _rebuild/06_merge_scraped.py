@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 """
-把 rescrape.progress.json 內爬到的最新資料 merge 回主 DB
+把 rescrape.progress.jsonl 內爬到的最新資料 merge 回主 DB
 （DB 預設指向 restaurants_database.json，可用 --target 切換）
+只改有爬到的那幾筆（store.py 的 SQLite store），最後寫出 JSON；--no-export 只寫 store
 
 opening_hours 標準化：
 - 「12:00 - 15:30」（含空格）→「12:00-15:30」
 - 「全日休息」/「公休」 等字串 → 移除
 - budget「NT$201-500」→「201-500」（去 NT$ 前綴，符合舊資料慣例）
 """
-import json
 import os
 import argparse
+from journal import read_state
+from store import open_store, add_store_args, finish
+from hours import parse_slot
 
 
 def normalize_slot(s: str):
@@ -23,11 +26,8 @@ def normalize_slot(s: str):
         return None
     # 去空格
     s = s.replace(' ', '')
-    if '-' not in s:
-        return None
-    # 確認兩端都像時間
-    parts = s.split('-')
-    if len(parts) != 2:
+    # 確認兩端都像時間（和 build 時編 hours_bitmap 用同一個 parser）
+    if parse_slot(s) is None:
         return None
     return s
 
@@ -56,70 +56,69 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--target', default='restaurants_database.json',
                     help='要 merge 進去的 DB 檔案')
-    ap.add_argument('--progress', default='_rebuild/rescrape.progress.json',
-                    help='爬蟲結果檔')
+    ap.add_argument('--progress', default='_rebuild/rescrape.progress.jsonl',
+                    help='爬蟲結果（journal.py 日誌；舊版 .json 也可以）')
     ap.add_argument('--also-update', nargs='*', default=['netlify/functions/restaurants_database.json'],
                     help='同步寫入的其他位置')
+    add_store_args(ap)
     args = ap.parse_args()
 
-    with open(args.target, encoding='utf-8') as f:
-        data = json.load(f)
-    with open(args.progress, encoding='utf-8') as f:
-        scraped = json.load(f)
-    print(f"目標 DB: {args.target}（{len(data['restaurants'])} 筆）")
+    store = open_store(args.store, args.target)
+    scraped = read_state(args.progress)
+    print(f"目標 DB: {args.target}（{store.count()} 筆）")
     print(f"爬蟲結果: {len(scraped)} 筆")
 
     updated = 0
+    unchanged = sum(1 for v in scraped.values() if v.get('unchanged'))
     fields_updated = {'cuisine_style': 0, 'type': 0, 'budget': 0,
                       'opening_hours': 0, 'images': 0, 'dish': 0, 'coordinates': 0}
-    for r in data['restaurants']:
-        or_id = str(r.get('or_id'))
-        if or_id not in scraped or not scraped[or_id].get('ok'):
-            continue
-        s = scraped[or_id]
-        if s.get('cuisine_style'):
-            r['cuisine_style'] = s['cuisine_style']
-            fields_updated['cuisine_style'] += 1
-        if s.get('type'):
-            r['type'] = s['type']
-            fields_updated['type'] += 1
-        if s.get('budget'):
-            r['budget'] = normalize_budget(s['budget'])
-            fields_updated['budget'] += 1
-        if s.get('opening_hours'):
-            r['opening_hours'] = normalize_opening_hours(s['opening_hours'])
-            fields_updated['opening_hours'] += 1
-        if s.get('images'):
-            r['images'] = s['images']
-            fields_updated['images'] += 1
-        if s.get('dish'):
-            r['dish'] = s['dish']
-            fields_updated['dish'] += 1
-        if s.get('coordinates'):
-            r['coordinates'] = s['coordinates']
-            fields_updated['coordinates'] += 1
-        r['is_buffet'] = s.get('is_buffet', r.get('is_buffet', False))
-        if s.get('final_url') and not r.get('url'):
-            r['url'] = s['final_url']
-        if s.get('closed'):
-            r['enabled'] = False
-            r['disabled_reason'] = 'OpenRice marked closed'
-        r.pop('needs_scrape', None)
-        updated += 1
+    with store.transaction():
+        for or_id, s in scraped.items():
+            if not s.get('ok'):
+                continue
+            if s.get('unchanged'):
+                # 05 判斷頁面沒變（304 / 內容指紋相同），沒有新資料可 merge
+                continue
+            r = store.get(or_id) if str(or_id).isdigit() else None
+            if r is None:
+                continue
+            fields = {}
+            if s.get('cuisine_style'):
+                fields['cuisine_style'] = s['cuisine_style']
+                fields_updated['cuisine_style'] += 1
+            if s.get('type'):
+                fields['type'] = s['type']
+                fields_updated['type'] += 1
+            if s.get('budget'):
+                fields['budget'] = normalize_budget(s['budget'])
+                fields_updated['budget'] += 1
+            if s.get('opening_hours'):
+                fields['opening_hours'] = normalize_opening_hours(s['opening_hours'])
+                fields_updated['opening_hours'] += 1
+            if s.get('images'):
+                fields['images'] = s['images']
+                fields_updated['images'] += 1
+            if s.get('dish'):
+                fields['dish'] = s['dish']
+                fields_updated['dish'] += 1
+            if s.get('coordinates'):
+                fields['coordinates'] = s['coordinates']
+                fields_updated['coordinates'] += 1
+            fields['is_buffet'] = s.get('is_buffet', r.get('is_buffet', False))
+            if s.get('final_url') and not r.get('url'):
+                fields['url'] = s['final_url']
+            if s.get('closed'):
+                fields['enabled'] = False
+                fields['disabled_reason'] = 'OpenRice marked closed'
+            store.update(or_id, fields, remove=['needs_scrape'])
+            updated += 1
 
-    print(f"\n已 merge {updated} 筆")
+    print(f"\n已 merge {updated} 筆（頁面沒變跳過 {unchanged} 筆）")
     print("各欄位更新筆數:")
     for k, v in fields_updated.items():
         print(f"  {k}: {v}")
 
-    with open(args.target, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"\n寫回 {args.target}")
-    for p in args.also_update:
-        if os.path.exists(p):
-            with open(p, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            print(f"同步寫入 {p}")
+    finish(store, args, [args.target] + [p for p in args.also_update if os.path.exists(p)])
 
 
 if __name__ == '__main__':
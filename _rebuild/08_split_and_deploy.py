@@ -2,7 +2,7 @@
 """
 最終步驟：
 1. 把 new_restaurants_database.json 拆成 active (916 enabled) + archive (143 disabled)
-2. 備份舊檔到 _rebuild/restaurants_database_backup_pre_d.json
+2. 覆蓋前把舊的主檔 / netlify 副本 / archive 存成 snapshot（_rebuild/snapshots.py，只存有變的餐廳）
 3. 覆蓋 restaurants_database.json (active 916 間)
 4. 同步 netlify/functions/restaurants_database.json
 5. 額外存 restaurants_database_archive.json (143 間歷史紀錄)
@@ -10,15 +10,15 @@
 跑這支會實際覆蓋檔案，跑之前先 dry-run 確認
 """
 import json
-import shutil
 import os
 from datetime import datetime
+from dbwriter import write_json, report
+from snapshots import save_snapshot, SNAPSHOT_DIR
 
 NEW_DB = '_rebuild/new_restaurants_database.json'
 TARGET_MAIN = 'restaurants_database.json'
 TARGET_NETLIFY = 'netlify/functions/restaurants_database.json'
 ARCHIVE = 'restaurants_database_archive.json'
-BACKUP_DIR = '_rebuild/backups'
 
 DRY_RUN = '--apply' not in os.sys.argv
 
@@ -67,7 +67,7 @@ archive_payload = {
 
 # 寫入位置與大小
 print(f"\n預定動作:")
-print(f"  📦 備份目前 {TARGET_MAIN} → {BACKUP_DIR}/restaurants_database.{datetime.now().strftime('%Y%m%d_%H%M')}.json")
+print(f"  📦 snapshot 目前的 {TARGET_MAIN} / {TARGET_NETLIFY} / {ARCHIVE} → {SNAPSHOT_DIR}/")
 print(f"  ✏️  覆蓋 {TARGET_MAIN}  (active 916 間)")
 print(f"  ✏️  覆蓋 {TARGET_NETLIFY}  (active 916 間)")
 print(f"  📝 新增 {ARCHIVE}  ({len(disabled)} 間歷史紀錄)")
@@ -78,33 +78,18 @@ if DRY_RUN:
     import sys; sys.exit(0)
 
 # 實際執行 -----
-os.makedirs(BACKUP_DIR, exist_ok=True)
-ts = datetime.now().strftime('%Y%m%d_%H%M')
-
-# 備份
-backup_main = f'{BACKUP_DIR}/restaurants_database.{ts}.json'
-if os.path.exists(TARGET_MAIN):
-    shutil.copy(TARGET_MAIN, backup_main)
-    print(f"\n✓ 備份: {backup_main}")
-
-backup_netlify = f'{BACKUP_DIR}/restaurants_database.netlify.{ts}.json'
-if os.path.exists(TARGET_NETLIFY):
-    shutil.copy(TARGET_NETLIFY, backup_netlify)
-    print(f"✓ 備份: {backup_netlify}")
-
-# 覆蓋主檔
-with open(TARGET_MAIN, 'w', encoding='utf-8') as f:
-    json.dump(active_payload, f, ensure_ascii=False, indent=2)
-print(f"✓ 寫入: {TARGET_MAIN}  ({os.path.getsize(TARGET_MAIN)//1024} KB)")
-
-# 覆蓋 netlify
-with open(TARGET_NETLIFY, 'w', encoding='utf-8') as f:
-    json.dump(active_payload, f, ensure_ascii=False, indent=2)
-print(f"✓ 寫入: {TARGET_NETLIFY}  ({os.path.getsize(TARGET_NETLIFY)//1024} KB)")
+
+# 備份（同內容的餐廳只存一次；主檔和 netlify 副本通常相同，第二份幾乎不佔空間）
+# 還原：python3 _rebuild/snapshots.py restore <id>
+print()
+save_snapshot(TARGET_MAIN, 'pre-split')
+save_snapshot(TARGET_NETLIFY, 'pre-split-netlify')
+save_snapshot(ARCHIVE, 'pre-split-archive')
+
+# 覆蓋主檔 + netlify（序列化一次、原子替換，Netlify function 不會讀到寫一半的檔）
+report(write_json(active_payload, [TARGET_MAIN, TARGET_NETLIFY]))
 
 # 歸檔
-with open(ARCHIVE, 'w', encoding='utf-8') as f:
-    json.dump(archive_payload, f, ensure_ascii=False, indent=2)
-print(f"✓ 寫入: {ARCHIVE}  ({os.path.getsize(ARCHIVE)//1024} KB)")
+report(write_json(archive_payload, [ARCHIVE]))
 
 print(f"\n完成！")
@@ -17,11 +17,11 @@ import openpyxl
 import json
 import os
 import re
+import argparse
 from datetime import datetime
+from store import open_store, add_store_args, finish
 
 XLSX = '/Users/harveylin/Desktop/Claude-workspace/projects/openrice-crawler/exports/restaurants_for_app.xlsx'
-MAIN_DB = 'restaurants_database.json'
-NETLIFY_DB = 'netlify/functions/restaurants_database.json'
 BOOKING_BLOCKLIST = '_rebuild/booking_blocklist.txt'
 RESTAURANT_BLOCKLIST = '_rebuild/restaurant_blocklist.txt'
 
@@ -340,6 +340,10 @@ def map_to_db_schema(rec, existing=None):
 
 def main():
     global BOOKING_BLOCKED_IDS, RESTAURANT_BLOCKED_IDS
+    ap = argparse.ArgumentParser()
+    add_store_args(ap)
+    args = ap.parse_args()
+
     BOOKING_BLOCKED_IDS = load_booking_blocklist()
     RESTAURANT_BLOCKED_IDS = load_restaurant_blocklist()
     if BOOKING_BLOCKED_IDS:
@@ -352,8 +356,8 @@ def main():
     print(f'  總筆數: {len(records)}')
 
     print('讀現有 DB...')
-    with open(MAIN_DB, encoding='utf-8') as f:
-        old_db = json.load(f)['restaurants']
+    store = open_store(args.store)
+    old_db = store.select()
     old_by_id = {int(r['or_id']): r for r in old_db if r.get('or_id')}
     print(f'  現有總筆數: {len(old_db)}, 有 or_id: {len(old_by_id)}')
 
@@ -406,13 +410,9 @@ def main():
             'has_review_count': has_reviews,
         }
     }
-    with open(MAIN_DB, 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
-    with open(NETLIFY_DB, 'w', encoding='utf-8') as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
-    print(f'\n寫入: {MAIN_DB}  ({os.path.getsize(MAIN_DB)//1024} KB)')
-    print(f'寫入: {NETLIFY_DB}  ({os.path.getsize(NETLIFY_DB)//1024} KB)')
-
+    # 整份換掉（單一交易，中途失敗 store 不會半新半舊）
+    store.replace_all(out['restaurants'], out['_metadata'])
+    finish(store, args)
 
 if __name__ == '__main__':
     main()
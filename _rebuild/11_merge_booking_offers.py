@@ -3,13 +3,12 @@
 把 booking_offers.xlsx「餐廳彙總」merge 進主 DB。
 標記每家有訂位優惠的餐廳：booking_offers (list of titles), booking_offer_count, has_booking_offer
 """
+import argparse
 import openpyxl
-import json
-import os
+from store import open_store, add_store_args, finish
 
 SRC = '/Users/harveylin/Desktop/Claude-workspace/projects/openrice-crawler/exports/booking_offers.xlsx'
-MAIN_DB = 'restaurants_database.json'
-NETLIFY_DB = 'netlify/functions/restaurants_database.json'
+OFFER_FIELDS = ('has_booking_offer', 'booking_offers', 'booking_offer_count')
 
 
 def load_offers():
@@ -38,31 +37,32 @@ def load_offers():
 
 
 def main():
+    ap = argparse.ArgumentParser()
+    add_store_args(ap)
+    args = ap.parse_args()
+
     offers = load_offers()
     print(f'讀到 {len(offers)} 家有訂位優惠的餐廳')
     offers_by_id = {o['or_id']: o for o in offers}
 
-    with open(MAIN_DB, encoding='utf-8') as f:
-        data = json.load(f)
-    restaurants = data['restaurants']
-
+    store = open_store(args.store)
     matched = 0
-    not_found = []
-    for r in restaurants:
-        oid = r.get('or_id')
-        if oid in offers_by_id:
-            o = offers_by_id[oid]
-            r['has_booking_offer'] = True
-            r['booking_offers'] = o['offer_titles']
-            r['booking_offer_count'] = int(o['offer_count'])
-            matched += 1
-        else:
-            # 確保未匹配的也乾淨
-            r.pop('has_booking_offer', None)
-            r.pop('booking_offers', None)
-            r.pop('booking_offer_count', None)
+    with store.transaction():
+        ids = store.ids()
+        for oid in ids:
+            if oid in offers_by_id:
+                o = offers_by_id[oid]
+                store.update(oid, {
+                    'has_booking_offer': True,
+                    'booking_offers': o['offer_titles'],
+                    'booking_offer_count': int(o['offer_count']),
+                })
+                matched += 1
+            else:
+                # 確保未匹配的也乾淨
+                store.update(oid, remove=OFFER_FIELDS)
 
-    not_found = [o for o in offers if o['or_id'] not in {r.get('or_id') for r in restaurants}]
+    not_found = [o for o in offers if o['or_id'] not in ids]
     print(f'  matched: {matched}/{len(offers)}')
     if not_found:
         print(f'  NOT FOUND in DB:')
@@ -70,15 +70,11 @@ def main():
             print(f'    [{o["or_id"]}] {o["name"]}')
 
     # 寫回
-    with open(MAIN_DB, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    with open(NETLIFY_DB, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f'\n寫入 {MAIN_DB}  ({os.path.getsize(MAIN_DB)//1024} KB)')
+    finish(store, args)
 
     # 樣本
     print(f'\n樣本（有優惠的店）：')
-    for r in restaurants[:3000]:
+    for r in store.select():
         if r.get('has_booking_offer'):
             print(f"  [{r['or_id']}] {r['name']}: {r['booking_offer_count']} 項")
             for t in r['booking_offers'][:2]:
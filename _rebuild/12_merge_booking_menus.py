@@ -3,14 +3,15 @@
 把 booking_menus.xlsx「餐廳彙總」merge 進主 DB。
 49 家有 OpenRice 線上訂位套餐（會員獨家優惠）的餐廳。
 """
-import openpyxl
-import json
-import os
 import re
+import argparse
+import openpyxl
+from store import open_store, add_store_args, finish
 
 SRC = '/Users/harveylin/Desktop/Claude-workspace/projects/openrice-crawler/exports/booking_menus.xlsx'
-MAIN_DB = 'restaurants_database.json'
-NETLIFY_DB = 'netlify/functions/restaurants_database.json'
+MENU_FIELDS = ('has_booking_menu', 'booking_menu_count', 'booking_menu_discounted_count',
+               'booking_menu_min_price', 'booking_menu_max_price', 'booking_menu_avg_discount_pct',
+               'booking_menus')
 
 
 def clean_menu_title(title):
@@ -89,57 +90,50 @@ def parse_pct(s):
 
 
 def main():
+    ap = argparse.ArgumentParser()
+    add_store_args(ap)
+    args = ap.parse_args()
+
     menus = load_menus()
     print(f'讀到 {len(menus)} 家有線上套餐的餐廳')
     by_id = {m['or_id']: m for m in menus}
     menu_details = load_menu_details()
     print(f'  + {sum(len(v) for v in menu_details.values())} 套套餐明細 covering {len(menu_details)} 家')
 
-    with open(MAIN_DB, encoding='utf-8') as f:
-        data = json.load(f)
-    restaurants = data['restaurants']
-
+    store = open_store(args.store)
     matched = 0
-    for r in restaurants:
-        oid = r.get('or_id')
-        if oid in by_id:
-            m = by_id[oid]
-            r['has_booking_menu'] = True
-            r['booking_menu_count'] = m['menu_count']
-            r['booking_menu_discounted_count'] = m['discounted_count']
-            r['booking_menu_min_price'] = m['min_price']
-            r['booking_menu_max_price'] = m['max_price']
-            r['booking_menu_avg_discount_pct'] = parse_pct(m['avg_discount_pct'])
-            # 套餐明細列表（已按折扣%排好）
-            details = menu_details.get(oid, [])
-            r['booking_menus'] = details
-            matched += 1
-        else:
-            r.pop('has_booking_menu', None)
-            r.pop('booking_menu_count', None)
-            r.pop('booking_menu_discounted_count', None)
-            r.pop('booking_menu_min_price', None)
-            r.pop('booking_menu_max_price', None)
-            r.pop('booking_menu_avg_discount_pct', None)
-            r.pop('booking_menus', None)
-
-    not_found = [m for m in menus if m['or_id'] not in {r.get('or_id') for r in restaurants}]
+    with store.transaction():
+        ids = store.ids()
+        for oid in ids:
+            if oid in by_id:
+                m = by_id[oid]
+                store.update(oid, {
+                    'has_booking_menu': True,
+                    'booking_menu_count': m['menu_count'],
+                    'booking_menu_discounted_count': m['discounted_count'],
+                    'booking_menu_min_price': m['min_price'],
+                    'booking_menu_max_price': m['max_price'],
+                    'booking_menu_avg_discount_pct': parse_pct(m['avg_discount_pct']),
+                    # 套餐明細列表（已按折扣%排好）
+                    'booking_menus': menu_details.get(oid, []),
+                })
+                matched += 1
+            else:
+                store.update(oid, remove=MENU_FIELDS)
+
+    not_found = [m for m in menus if m['or_id'] not in ids]
     print(f'  matched: {matched}/{len(menus)}')
     if not_found:
         print(f'  NOT FOUND in DB:')
         for m in not_found[:5]:
             print(f'    [{m["or_id"]}] {m["name"]}')
 
-    with open(MAIN_DB, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    with open(NETLIFY_DB, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f'\n寫入 {MAIN_DB}  ({os.path.getsize(MAIN_DB)//1024} KB)')
+    finish(store, args)
 
     # 樣本
     print(f'\n樣本：')
     shown = 0
-    for r in restaurants:
+    for r in store.select():
         if r.get('has_booking_menu'):
             print(f"  [{r['or_id']}] {r['name']}: {r['booking_menu_count']} 套，平均折 {r.get('booking_menu_avg_discount_pct')}%")
             shown += 1
@@ -8,15 +8,15 @@
   video_reel_url:  IG Reel 連結（可選；點影片時跳轉）
   has_video:       true（方便 query）
 
-加完後同步寫到 netlify/functions/restaurants_database.json。
+加完後同步寫到 netlify/functions/restaurants_database.json（--no-export 只寫 store）。
 """
-import csv
-import json
 import os
+import csv
+import argparse
+from store import open_store, add_store_args, finish
 
 CSV_PATH = '_rebuild/restaurant_videos.csv'
-MAIN_DB = 'restaurants_database.json'
-NETLIFY_DB = 'netlify/functions/restaurants_database.json'
+VIDEO_FIELDS = ('video_url', 'video_poster', 'video_reel_url', 'has_video')
 
 
 def load_video_manifest():
@@ -42,60 +42,49 @@ def load_video_manifest():
 
 
 def main():
+    ap = argparse.ArgumentParser()
+    add_store_args(ap)
+    args = ap.parse_args()
+
     videos = load_video_manifest()
     print(f'讀到 {len(videos)} 筆影片 manifest')
 
-    with open(MAIN_DB, 'r', encoding='utf-8') as f:
-        db = json.load(f)
-
-    by_id = {r['or_id']: r for r in db['restaurants']}
-
-    # 先把舊的 video_* 欄位清掉（避免移除後 manifest 沒同步）
-    cleared = 0
-    for r in db['restaurants']:
-        if any(k in r for k in ('video_url', 'video_poster', 'video_reel_url', 'has_video')):
-            for k in ('video_url', 'video_poster', 'video_reel_url', 'has_video'):
-                r.pop(k, None)
-            cleared += 1
-    if cleared:
-        print(f'  清除 {cleared} 家舊 video_* 欄位')
-
-    matched = 0
-    missed = []
-    for v in videos:
-        r = by_id.get(v['or_id'])
-        if not r:
-            missed.append(v['or_id'])
-            continue
-        if not v['video_url']:
-            continue
-        r['video_url'] = v['video_url']
-        r['has_video'] = True
-        if v['video_poster']:
-            r['video_poster'] = v['video_poster']
-        if v['video_reel_url']:
-            r['video_reel_url'] = v['video_reel_url']
-        matched += 1
+    store = open_store(args.store)
+    with store.transaction():
+        ids = store.ids()
+
+        # 先把舊的 video_* 欄位清掉（避免移除後 manifest 沒同步）
+        cleared = sum(store.update(oid, remove=VIDEO_FIELDS) for oid in ids)
+        if cleared:
+            print(f'  清除 {cleared} 家舊 video_* 欄位')
+
+        matched = 0
+        missed = []
+        for v in videos:
+            if v['or_id'] not in ids:
+                missed.append(v['or_id'])
+                continue
+            if not v['video_url']:
+                continue
+            fields = {'video_url': v['video_url'], 'has_video': True}
+            if v['video_poster']:
+                fields['video_poster'] = v['video_poster']
+            if v['video_reel_url']:
+                fields['video_reel_url'] = v['video_reel_url']
+            store.update(v['or_id'], fields)
+            matched += 1
 
     print(f'  matched: {matched}/{len(videos)}')
     if missed:
         print(f'  !! 在主 DB 找不到的 or_id: {missed}')
 
-    # 寫主 DB
-    with open(MAIN_DB, 'w', encoding='utf-8') as f:
-        json.dump(db, f, ensure_ascii=False, indent=2)
-    print(f'寫入 {MAIN_DB}')
-
-    # 同步 netlify 副本
-    os.makedirs(os.path.dirname(NETLIFY_DB), exist_ok=True)
-    with open(NETLIFY_DB, 'w', encoding='utf-8') as f:
-        json.dump(db, f, ensure_ascii=False, indent=2)
-    print(f'寫入 {NETLIFY_DB}')
+    # 寫主 DB + 同步 netlify 副本
+    finish(store, args)
 
     # 顯示樣本
     print('\n樣本（有影片的店）：')
     sample_count = 0
-    for r in db['restaurants']:
+    for r in store.select():
         if r.get('has_video'):
             print(f"  [{r['or_id']}] {r['name']}: {r['video_url']}")
             sample_count += 1
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+離線 extractor benchmark：不打網路，對 golden corpus 跑每個 extractor
+
+取代 test_budget_scraping.py / test_dish_scraping.py / test_opening_hours_scraping.py …
+那些連線上網站、只會印結果的測試。每個 parser backend（bs4 / fast）報告：
+- 吞吐量：全部欄位 pages/sec，以及每個 extractor 單獨跑的 pages/sec
+- 相對吞吐量：同一個 process 裡，stdlib html.parser 掃一遍 corpus 的速度當參考，
+  吞吐量 / 參考速度 = 和機器快慢無關的倍數。參考和被測的分成好幾輪緊接著交替跑，
+  取每輪比值的中位數，背景負載忽高忽低時兩邊一起受影響
+- 記憶體：tracemalloc 量到的 parse 峰值
+- 準確度：逐欄位和 golden/expected/<頁面>.json 比對的正確率
+
+和 golden/baseline.json 比，相對吞吐量掉超過 --tolerance 或任何欄位準確度下降 → exit 1。
+絕對的 pages/sec 只印出來參考，不拿來判斷（換台機器就差好幾倍）。
+
+corpus 同 bench_parsers.py：_rebuild/golden/*.html + test_openrice_page.html。
+期望值不能由被測的程式產生：每個 expected/*.json 要有 "_source"（怎麼確認的：
+對照 HTML 人工確認、或刻意固定目前行為的邊界案例），沒有的不載入。
+新增頁面時 --draft-expected 只寫出 expected/<頁面>.draft.json 草稿，
+逐欄位對照 HTML 改正、加上 "_source" 後再改名成 <頁面>.json。
+
+用法:
+  python3 _rebuild/bench_extractors.py                     # 跑 benchmark + 檢查退步
+  python3 _rebuild/bench_extractors.py --parser fast       # 只測 fast backend
+  python3 _rebuild/bench_extractors.py --draft-expected    # 沒有期望值的頁面寫出草稿（要人工確認）
+  python3 _rebuild/bench_extractors.py --update-baseline   # 優化完，把這次結果存成新基準
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from html.parser import HTMLParser
+from scraper import EXTRACTORS, PARSERS, parse_openrice_page
+from bench_parsers import GOLDEN_DIR, load_corpus
+
+EXPECTED_DIR = os.path.join(GOLDEN_DIR, 'expected')
+BASELINE = os.path.join(GOLDEN_DIR, 'baseline.json')
+
+
+def expected_path(name: str) -> str:
+    return os.path.join(EXPECTED_DIR, os.path.splitext(name)[0] + '.json')
+
+
+def draft_path(name: str) -> str:
+    return os.path.join(EXPECTED_DIR, os.path.splitext(name)[0] + '.draft.json')
+
+
+def load_expected(pages: list) -> dict:
+    """{頁面名稱: 期望輸出（不含 _ 開頭的註記）}；沒有期望值的頁面只計時、不算準確度"""
+    out = {}
+    for name, _ in pages:
+        p = expected_path(name)
+        if not os.path.exists(p):
+            continue
+        with open(p, encoding='utf-8') as f:
+            want = json.load(f)
+        if not want.get('_source'):
+            print(f"⚠️ {p} 沒有 _source（未確認的期望值），略過")
+            continue
+        out[name] = {k: v for k, v in want.items() if not k.startswith('_')}
+    return out
+
+
+def reference_pages_per_sec(pages: list, min_time: float = 1.0) -> float:
+    """參考速度：stdlib HTMLParser 只 tokenize、不建樹，同樣跑到至少 min_time 秒"""
+    n = 0
+    started = time.perf_counter()
+    while True:
+        for _, html in pages:
+            parser = HTMLParser()
+            parser.feed(html)
+            parser.close()
+        n += len(pages)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return n / elapsed
+
+
+def pages_per_sec(pages: list, parser: str, fields=None, min_time: float = 1.0) -> float:
+    """整個 corpus 重複跑到至少 min_time 秒，回傳平均每秒 parse 幾頁"""
+    n = 0
+    started = time.perf_counter()
+    while True:
+        for _, html in pages:
+            parse_openrice_page(html, fields, parser)
+        n += len(pages)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return n / elapsed
+
+
+def peak_memory(pages: list, parser: str) -> int:
+    """逐頁 parse（全部欄位）時 tracemalloc 量到的最高記憶體用量（bytes）"""
+    peak = 0
+    for _, html in pages:
+        tracemalloc.start()
+        parse_openrice_page(html, None, parser)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return peak
+
+
+def accuracy(pages: list, expected: dict, parser: str) -> tuple:
+    """回傳 ({輸出欄位: 正確率}, [(頁面, 欄位, 期望, 實際), ...])"""
+    correct, total, misses = {}, {}, []
+    for name, html in pages:
+        if name not in expected:
+            continue
+        got = parse_openrice_page(html, None, parser)
+        for k, want in expected[name].items():
+            total[k] = total.get(k, 0) + 1
+            if got.get(k) == want:
+                correct[k] = correct.get(k, 0) + 1
+            else:
+                misses.append((name, k, want, got.get(k)))
+    return {k: correct.get(k, 0) / total[k] for k in total}, misses
+
+
+def relative_throughput(pages: list, parser: str, fields, min_time: float, rounds: int = 7) -> tuple:
+    """(pages/sec, 相對參考的倍數)：每輪先跑參考再跑被測，各 min_time / rounds / 2 秒，取中位數"""
+    slice_time = min_time / rounds / 2
+    speeds, ratios = [], []
+    for _ in range(rounds):
+        reference = reference_pages_per_sec(pages, slice_time)
+        pps = pages_per_sec(pages, parser, fields, slice_time)
+        speeds.append(pps)
+        ratios.append(pps / reference)
+    return statistics.median(speeds), statistics.median(ratios)
+
+
+def run(pages: list, expected: dict, parser: str, min_time: float) -> dict:
+    acc, misses = accuracy(pages, expected, parser)
+    pps, relative = relative_throughput(pages, parser, None, min_time)
+    extractors = {name: relative_throughput(pages, parser, [name], min_time / 2) for name in EXTRACTORS}
+    return {
+        'pages_per_sec': pps,
+        'extractors': {name: v[0] for name, v in extractors.items()},
+        'relative': relative,
+        'extractors_relative': {name: v[1] for name, v in extractors.items()},
+        'peak_memory': peak_memory(pages, parser),
+        'accuracy': acc,
+        '_misses': misses,
+    }
+
+
+def report(parser: str, res: dict, base: dict):
+    def vs(now, before):
+        return f"（基準 {before:.3f}x，{(now / before - 1) * 100:+.0f}%）" if before else ''
+
+    print(f"\n=== parser: {parser} ===")
+    print(f"全部欄位: {res['pages_per_sec']:.1f} pages/sec = 參考的 {res['relative']:.3f}x"
+          f"{vs(res['relative'], base.get('relative'))}")
+    print(f"記憶體峰值: {res['peak_memory'] / 1024 / 1024:.1f} MB")
+    print("各 extractor 單獨跑:")
+    for name, pps in res['extractors'].items():
+        rel = res['extractors_relative'][name]
+        print(f"  {name:<12} {pps:>8.1f} pages/sec {rel:>8.3f}x"
+              f"{vs(rel, base.get('extractors_relative', {}).get(name))}")
+    print("欄位準確度:")
+    for k, a in res['accuracy'].items():
+        print(f"  {k:<14} {a * 100:>5.1f}%")
+    for name, k, want, got in res['_misses']:
+        print(f"  ✗ {name} {k}: 期望 {want!r}")
+        print(f"    {' ' * len(name)} {' ' * len(k)}  實際 {got!r}")
+
+
+def regressions(parser: str, res: dict, base: dict, tolerance: float) -> list:
+    problems = []
+    if base.get('relative') and res['relative'] < base['relative'] * (1 - tolerance):
+        problems.append(f"{parser}: 相對吞吐量 {res['relative']:.3f}x < 基準 "
+                        f"{base['relative']:.3f}x 的 {(1 - tolerance) * 100:.0f}%")
+    for k, a in res['accuracy'].items():
+        if a < base.get('accuracy', {}).get(k, 1.0):
+            problems.append(f"{parser}: {k} 準確度 {a * 100:.1f}% 下降")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--parser', default=','.join(PARSERS), help='要測的 backend（逗號分隔，預設全部）')
+    ap.add_argument('--min-time', type=float, default=2.0, help='每項吞吐量量測（參考 + 被測）至少跑幾秒')
+    ap.add_argument('--tolerance', type=float, default=0.25,
+                    help='相對吞吐量允許比基準慢多少（預設 0.25 = 25%%）')
+    ap.add_argument('--draft-expected', action='store_true',
+                    help='沒有期望值的頁面，把 bs4 的輸出寫成 expected/*.draft.json 草稿（不會被載入）')
+    ap.add_argument('--update-baseline', action='store_true', help='把這次結果存成 golden/baseline.json')
+    args = ap.parse_args()
+
+    parsers = [p.strip() for p in args.parser.split(',') if p.strip()]
+    unknown = [p for p in parsers if p not in PARSERS]
+    if unknown:
+        ap.error(f"未知 parser: {', '.join(unknown)}（可用: {', '.join(PARSERS)}）")
+
+    pages = load_corpus(GOLDEN_DIR)
+    if not pages:
+        print("corpus 是空的")
+        sys.exit(1)
+
+    if args.draft_expected:
+        os.makedirs(EXPECTED_DIR, exist_ok=True)
+        drafted = 0
+        for name, html in pages:
+            if os.path.exists(expected_path(name)):
+                continue
+            with open(draft_path(name), 'w', encoding='utf-8') as f:
+                json.dump(parse_openrice_page(html), f, ensure_ascii=False, indent=2)
+                f.write('\n')
+            drafted += 1
+            print(f"草稿: {draft_path(name)}")
+        print(f"寫了 {drafted} 份草稿：逐欄位對照 HTML 改正、加上 \"_source\"，再改名成 <頁面>.json")
+        return
+
+    expected = load_expected(pages)
+    print(f"corpus: {len(pages)} 頁（{sum(len(h) for _, h in pages) // 1024} KB），"
+          f"有期望值 {len(expected)} 頁")
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print(f"參考（stdlib html.parser）: {reference_pages_per_sec(pages, args.min_time / 4):.1f} pages/sec")
+    results, problems = {}, []
+    for parser in parsers:
+        res = results[parser] = run(pages, expected, parser, args.min_time)
+        base = baseline.get(parser, {})
+        report(parser, res, base)
+        problems += regressions(parser, res, base, args.tolerance)
+
+    if args.update_baseline:
+        for parser, res in results.items():
+            baseline[parser] = {
+                'relative': round(res['relative'], 3),
+                'extractors_relative': {k: round(v, 3) for k, v in res['extractors_relative'].items()},
+                'peak_memory': res['peak_memory'],
+                'accuracy': res['accuracy'],
+            }
+        with open(BASELINE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\n基準已更新: {BASELINE}")
+        return
+
+    if problems:
+        print("\n❌ 退步：")
+        for p in problems:
+            print(f"  - {p}")
+        sys.exit(1)
+    print("\n✓ 沒有退步")
+
+
+if __name__ == '__main__':
+    main()
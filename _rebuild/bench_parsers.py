@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+比較 parser backend：bs4（BeautifulSoup）vs fast（fastparse.py 單趟事件 parser）
+
+對 golden corpus 每一頁：
+1. 兩個 backend 各跑一次全部 extractor，逐欄位比對輸出，不同就列出來（exit code 1）
+2. 各跑 --repeat 次取中位數，列出每頁 parse 時間和加速倍數
+
+corpus 預設 = _rebuild/golden/*.html + test_openrice_page.html，
+加 --cache-dir 可以把 page cache 裡所有爬過的頁面也一起比（改 fastparse 後建議跑一次）。
+
+用法:
+  python3 _rebuild/bench_parsers.py
+  python3 _rebuild/bench_parsers.py --cache-dir _rebuild/page_cache --repeat 3
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+from scraper import parse_openrice_page
+from page_cache import PageCache
+
+GOLDEN_DIR = '_rebuild/golden'
+EXTRA_PAGES = ['test_openrice_page.html']
+
+
+def load_corpus(golden_dir: str, cache_dir: str = None) -> list:
+    """[(名稱, html)]"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(golden_dir, '*.html'))) + EXTRA_PAGES:
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                pages.append((os.path.basename(path), f.read()))
+    if cache_dir:
+        cache = PageCache(cache_dir)
+        for entry in cache.entries():
+            pages.append((f"cache:{entry['sha256'][:12]}", cache.read(entry)))
+    return pages
+
+
+def time_parse(html: str, parser: str, repeat: int) -> float:
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        parse_openrice_page(html, parser=parser)
+        runs.append(time.perf_counter() - t)
+    return statistics.median(runs)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--golden', default=GOLDEN_DIR)
+    ap.add_argument('--cache-dir', default=None, help='也比對 page cache 裡的所有頁面')
+    ap.add_argument('--repeat', type=int, default=5, help='每頁每個 backend 跑幾次取中位數')
+    args = ap.parse_args()
+
+    pages = load_corpus(args.golden, args.cache_dir)
+    if not pages:
+        print("corpus 是空的")
+        sys.exit(1)
+
+    mismatched = 0
+    total = {'bs4': 0.0, 'fast': 0.0}
+    print(f"{'頁面':<36} {'大小':>8} {'bs4':>9} {'fast':>9} {'加速':>6}  一致")
+    for name, html in pages:
+        ref = parse_openrice_page(html, parser='bs4')
+        got = parse_openrice_page(html, parser='fast')
+        diff = [k for k in ref if ref[k] != got.get(k)] + [k for k in got if k not in ref]
+        t_bs4 = time_parse(html, 'bs4', args.repeat)
+        t_fast = time_parse(html, 'fast', args.repeat)
+        total['bs4'] += t_bs4
+        total['fast'] += t_fast
+        print(f"{name[:36]:<36} {len(html) // 1024:>6}KB {t_bs4 * 1000:>7.1f}ms {t_fast * 1000:>7.1f}ms "
+              f"{t_bs4 / t_fast:>5.1f}x  {'✓' if not diff else '✗'}")
+        if diff:
+            mismatched += 1
+            for k in diff:
+                print(f"    {k}: bs4={ref.get(k)!r}")
+                print(f"    {' ' * len(k)}  fast={got.get(k)!r}")
+
+    print(f"\n{len(pages)} 頁，合計 bs4 {total['bs4'] * 1000:.1f}ms / fast {total['fast'] * 1000:.1f}ms"
+          f"（{total['bs4'] / total['fast']:.1f}x）")
+    if mismatched:
+        print(f"❌ {mismatched} 頁輸出不一致")
+        sys.exit(1)
+    print("✓ 兩個 backend 輸出完全一致")
+
+
+if __name__ == '__main__':
+    main()
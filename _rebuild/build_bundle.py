@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+部署用的精簡餐廳 bundle（netlify-build.sh 呼叫）
+
+原本 build 直接把 indent=2 的 restaurants_database.json（2.6MB、928 間、50 個欄位）
+整份複製進 function 目錄，冷啟動每次都 JSON.parse 整份。這裡只留：
+- enabled 的餐廳（API 每個 endpoint 都先 filter(r => r.enabled)）
+- SERVED_FIELDS：推薦邏輯 + 前端（liff/pages/home.js、shared/utils.js …）實際讀到的欄位
+- hours_bitmap：opening_hours 編好的每週 bitmap（hours.py），JS 用 bit 判斷用餐時段
+輸出壓成一行（minified），另外產生 .gz / .br（預先壓好的副本；沒裝 brotli 就只有 gz），
+最後印大小報告。寫檔經過 dbwriter（原子替換、內容沒變略過）。
+
+另外依 city 切成 shards/<slug>.json（推薦通常先選縣市，只要載那一個縣市），
+加上 shards/manifest.json：每個縣市的檔名、筆數、行政區列表、sha256。
+地區選項直接從 manifest 回答，不用載任何餐廳。沒有 city 的餐廳不進 shard
+（JS 的 CITY_ALLOWLIST 本來就會把它們濾掉）。每個 shard 附 _index（filter_index.py 的
+篩選用 bitset 倒排索引）。
+
+前端 / API 開始用新欄位時，記得加進 SERVED_FIELDS。
+
+用法:
+  python3 _rebuild/build_bundle.py
+  python3 _rebuild/build_bundle.py --src restaurants_database.json --out netlify/functions/restaurants_bundle.json
+  python3 _rebuild/build_bundle.py --shard-dir netlify/functions/shards
+"""
+import os
+import sys
+import json
+import gzip
+import time
+import hashlib
+import argparse
+from dbwriter import write_bytes
+from filter_index import build_index
+from hours import compile_hours
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SRC = 'restaurants_database.json'
+BUNDLE = 'netlify/functions/restaurants_bundle.json'
+SHARD_DIR = 'netlify/functions/shards'
+MANIFEST = 'manifest.json'
+
+# shard 檔名（順序同 recommendation.js 的 cityOrder）；不在表內的縣市用名稱 hash
+CITY_SLUGS = {
+    '基隆市': 'keelung', '台北市': 'taipei', '新北市': 'new-taipei', '桃園市': 'taoyuan',
+    '新竹縣': 'hsinchu-county', '新竹市': 'hsinchu', '苗栗縣': 'miaoli', '台中市': 'taichung',
+    '彰化縣': 'changhua', '南投縣': 'nantou', '雲林縣': 'yunlin', '嘉義縣': 'chiayi-county',
+    '嘉義市': 'chiayi', '台南市': 'tainan', '高雄市': 'kaohsiung', '屏東縣': 'pingtung',
+    '宜蘭縣': 'yilan', '花蓮縣': 'hualien', '台東縣': 'taitung', '澎湖縣': 'penghu',
+    '金門縣': 'kinmen', '連江縣': 'lienchiang',
+}
+
+# API / 前端實際會讀的欄位（其餘如 phone / region / services / price_min / disabled_reason /
+# booking_menu_* 統計 / needs_scrape 只在 pipeline 內部用）
+SERVED_FIELDS = (
+    # 推薦 / 篩選（backend/utils/recommendation.js、netlify/functions/restaurants.js）
+    'or_id', 'name', 'enabled', 'city', 'district', 'cuisine_style', 'type', 'budget',
+    'coordinates', 'opening_hours', 'is_paid_account', 'has_booking_offer', 'booking_offers',
+    # 卡片顯示（frontend/liff/pages/home.js、frontend/app.js）
+    'address', 'url', 'images', 'door_photo_url', 'dish', 'bookable', 'booking_menus',
+    'video_url', 'video_poster', 'video_reel_url', 'has_video',
+    # evidence / slogan（frontend/shared/utils.js）
+    'is_buffet', 'rating', 'smile_count', 'ok_count', 'cry_count', 'review_count',
+    'bookmark_count', 'open_late', 'landmarks', 'slogans',
+)
+
+# build 時從原始欄位算出來的欄位（主 DB 裡沒有）
+DERIVED_FIELDS = ('hours_bitmap',)
+
+
+def prune(restaurant: dict) -> dict:
+    out = {k: restaurant[k] for k in SERVED_FIELDS if k in restaurant}
+    bitmap = compile_hours(restaurant.get('opening_hours'))
+    if bitmap:
+        out['hours_bitmap'] = bitmap
+    return out
+
+
+def build(data: dict, source_sha256: str) -> dict:
+    restaurants = [prune(r) for r in data['restaurants'] if r.get('enabled')]
+    return {
+        'restaurants': restaurants,
+        '_metadata': {
+            **data.get('_metadata', {}),
+            'bundle': {
+                'source_sha256': source_sha256,
+                'total': len(restaurants),
+                'fields': list(SERVED_FIELDS + DERIVED_FIELDS),
+            },
+        },
+    }
+
+
+def encode(bundle: dict) -> bytes:
+    return json.dumps(bundle, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def compressed(payload: bytes) -> dict:
+    """{副檔名: bytes}；gzip 固定 mtime=0，內容沒變時輸出也不變"""
+    out = {'.gz': gzip.compress(payload, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        out['.br'] = brotli.compress(payload, quality=11)
+    return out
+
+
+def city_slug(city: str) -> str:
+    return CITY_SLUGS.get(city) or 'city-' + hashlib.sha1(city.encode('utf-8')).hexdigest()[:10]
+
+
+def build_shards(bundle: dict) -> tuple:
+    """回傳 ({檔名: bytes}, manifest)；shard 內餐廳順序同 bundle"""
+    by_city = {}
+    for r in bundle['restaurants']:
+        if r.get('city'):
+            by_city.setdefault(r['city'], []).append(r)
+    source_sha256 = bundle['_metadata']['bundle']['source_sha256']
+    files, cities = {}, {}
+    for city, restaurants in by_city.items():
+        name = city_slug(city) + '.json'
+        payload = encode({'restaurants': restaurants,
+                          '_metadata': {'city': city, 'total': len(restaurants),
+                                        'source_sha256': source_sha256},
+                          '_index': build_index(restaurants, city)})
+        files[name] = payload
+        cities[city] = {
+            'file': name,
+            'count': len(restaurants),
+            'districts': sorted({r['district'] for r in restaurants if r.get('district')}),
+            'sha256': hashlib.sha256(payload).hexdigest(),
+        }
+    manifest = {
+        'source_sha256': source_sha256,
+        'total': sum(c['count'] for c in cities.values()),
+        'fields': list(SERVED_FIELDS + DERIVED_FIELDS),
+        'cities': cities,
+    }
+    return files, manifest
+
+
+def write_shards(files: dict, manifest: dict, shard_dir: str) -> dict:
+    """寫 shard + manifest，刪掉已經沒有餐廳的縣市舊檔"""
+    written = {}
+    for name, payload in files.items():
+        written.update(write_bytes(payload, [os.path.join(shard_dir, name)]))
+    # manifest 最後寫：讀的人看到新 manifest 時，它指到的 shard 都已經就位
+    written.update(write_bytes(encode(manifest), [os.path.join(shard_dir, MANIFEST)]))
+    for name in os.listdir(shard_dir):
+        if name.endswith('.json') and name != MANIFEST and name not in files:
+            os.remove(os.path.join(shard_dir, name))
+            print(f"刪除舊 shard {name}")
+    return written
+
+
+def parse_ms(payload: bytes, repeat: int = 5) -> float:
+    runs = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        json.loads(payload)
+        runs.append(time.perf_counter() - t)
+    return min(runs) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--src', default=SRC)
+    ap.add_argument('--out', default=BUNDLE)
+    ap.add_argument('--shard-dir', default=SHARD_DIR)
+    args = ap.parse_args()
+
+    with open(args.src, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw)
+    bundle = build(data, hashlib.sha256(raw).hexdigest())
+    payload = encode(bundle)
+    siblings = compressed(payload)
+    shard_files, manifest = build_shards(bundle)
+
+    written = write_bytes(payload, [args.out])
+    for ext, blob in siblings.items():
+        written.update(write_bytes(blob, [args.out + ext]))
+    written.update(write_shards(shard_files, manifest, args.shard_dir))
+
+    total = len(data['restaurants'])
+    kept = sum(1 for r in data['restaurants'] if r.get('enabled'))
+    print(f"bundle: {kept}/{total} 間（只留 enabled），{len(SERVED_FIELDS)} 個欄位")
+    print(f"{'檔案':<48} {'大小':>10} {'相對原檔':>8}  parse")
+    print(f"{args.src:<48} {len(raw) / 1024:>8.0f}KB {'100%':>8}  {parse_ms(raw):.1f}ms")
+    print(f"{args.out:<48} {len(payload) / 1024:>8.0f}KB {len(payload) / len(raw):>8.0%}  "
+          f"{parse_ms(payload):.1f}ms")
+    for ext, blob in siblings.items():
+        print(f"{args.out + ext:<48} {len(blob) / 1024:>8.0f}KB {len(blob) / len(raw):>8.0%}")
+    if brotli is None:
+        print("（沒裝 brotli，略過 .br：pip install brotli）")
+    print(f"\nshards（{args.shard_dir}）:")
+    for city, c in sorted(manifest['cities'].items(), key=lambda kv: -kv[1]['count']):
+        print(f"  {city:<6} {c['file']:<24} {c['count']:>5} 間 {len(shard_files[c['file']]) / 1024:>7.0f}KB "
+              f"{len(c['districts']):>3} 區")
+    changed = [p for p, w in written.items() if w]
+    print(f"\n{f'已更新 {len(changed)} 個檔案' if changed else '內容沒變，沒有寫檔'}")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"❌ bundle 產生失敗: {e}")
+        sys.exit(1)
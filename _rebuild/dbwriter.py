@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+主 DB 的寫檔：序列化一次、每個目標原子替換、內容沒變就不寫
+
+原本每支腳本對 restaurants_database.json 和 netlify/functions/ 副本各 json.dump 一次
+（同一份好幾 MB 的資料序列化兩三次），而且是直接覆寫原檔：寫到一半被讀（或當掉）
+Netlify function 就會拿到半份 JSON。這裡：
+- json.dumps 一次、encode 一次，所有目標共用同一份 bytes
+- 每個目標先寫同目錄的暫存檔、fsync，再 os.replace（讀的人只會看到舊檔或新檔）
+- 目標現有內容和新內容一樣就跳過（不動 mtime，git / 部署也不會以為有變）
+
+用法:
+  from dbwriter import write_json
+  write_json(data, ['restaurants_database.json', 'netlify/functions/restaurants_database.json'])
+"""
+import os
+import json
+import tempfile
+
+
+def dumps_db(data) -> str:
+    """和各腳本原本 json.dump(data, f, ensure_ascii=False, indent=2) 一模一樣的輸出"""
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def same_content(path: str, payload: bytes) -> bool:
+    try:
+        if os.path.getsize(path) != len(payload):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == payload
+    except OSError:
+        return False
+
+
+def atomic_write(path: str, payload: bytes):
+    """寫同目錄暫存檔 → fsync → os.replace；權限沿用舊檔（沒有舊檔用 0644）"""
+    d = os.path.dirname(path) or '.'
+    os.makedirs(d, exist_ok=True)
+    try:
+        mode = os.stat(path).st_mode & 0o777
+    except OSError:
+        mode = 0o644
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_bytes(payload: bytes, targets: list) -> dict:
+    """回傳 {路徑: 有沒有真的寫}"""
+    written = {}
+    for p in dict.fromkeys(targets):
+        if same_content(p, payload):
+            written[p] = False
+            continue
+        atomic_write(p, payload)
+        written[p] = True
+    return written
+
+
+def write_json(data, targets: list) -> dict:
+    """序列化一次，寫到所有 targets；回傳 {路徑: 有沒有真的寫}"""
+    return write_bytes(dumps_db(data).encode('utf-8'), targets)
+
+
+def report(written: dict):
+    for p, changed in written.items():
+        if changed:
+            print(f"寫入 {p}  ({os.path.getsize(p) // 1024} KB)")
+        else:
+            print(f"{p} 內容沒變，略過")
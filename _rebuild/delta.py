@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+差量部署：固定一份用內容 hash 命名的 base snapshot，之後每次 merge 只記 patch
+
+原本每個 merge 步驟都重寫、重新部署整份幾 MB 的 restaurants_database.json，
+就算只改了十幾筆 booking_offers / video_url。這裡：
+- deltas/base/<sha256 前 12 碼>.json：base snapshot（和主檔相同的 indent=2 序列化，檔案 sha256 = 內容 hash）
+- deltas/patches/<序號>-<目標 hash 前 12 碼>.jsonl：和 07_diff_report.py 相同的 changeset 格式，
+  header 記 old / new 的內容 hash；另外多幾種 op 讓套用結果「逐 byte」和目標相同：
+    replace  整筆換掉（欄位順序變了）
+    order    餐廳順序（append 以外的搬動）
+    top      restaurants 以外的頂層欄位（_metadata）
+- deltas/manifest.json：base、patch 鏈（每個 patch 的 from / to / 檔案 sha256），最後寫
+- 套用時每一步都驗：套用前內容 hash = from、套用後 = to，不對就停
+- compact：把 base + 所有 patch 摺成新的 base，清掉舊檔
+
+內容 hash = sha256(dbwriter.dumps_db(data))，也就是 dbwriter 寫出的主檔的檔案 sha256。
+JS 端（backend/utils/delta.js）用同一個 manifest 套 patch，base 已經在記憶體時只套新的 patch。
+
+用法:
+  python3 _rebuild/delta.py init                 # 用目前主檔建 base
+  python3 _rebuild/delta.py make                 # 主檔和 head 的差異記成一個 patch
+  python3 _rebuild/delta.py status
+  python3 _rebuild/delta.py verify               # 從 base 一路套到 head，並和主檔比對
+  python3 _rebuild/delta.py apply --out /tmp/db.json
+  python3 _rebuild/delta.py compact
+"""
+import os
+import sys
+import json
+import copy
+import hashlib
+import argparse
+from datetime import datetime
+from collections import Counter
+from dbwriter import dumps_db, write_bytes
+from diff import field_changes, record_key
+
+DELTA_DIR = 'deltas'
+MANIFEST = 'manifest.json'
+DB = 'restaurants_database.json'
+KEY = 'or_id'
+FORMAT = 1
+
+
+class DeltaError(Exception):
+    """patch 鏈對不上（hash 不符、檔案被改、重複 key …）"""
+
+
+def encode_db(data: dict) -> bytes:
+    return dumps_db(data).encode('utf-8')
+
+
+def content_hash(data: dict) -> str:
+    return hashlib.sha256(encode_db(data)).hexdigest()
+
+
+def _exact(a, b) -> bool:
+    """序列化後一模一樣才算相同（巢狀的 5 / 5.0、dict key 順序都會影響檔案內容）"""
+    return json.dumps(a, ensure_ascii=False) == json.dumps(b, ensure_ascii=False)
+
+
+def _keys(records: list, key: str) -> list:
+    keys = [record_key(r, key) for r in records]
+    if len(set(keys)) != len(keys):
+        dup = next(k for k, n in Counter(keys).items() if n > 1)
+        raise DeltaError(f"重複的 {key}：{dup}（patch 需要唯一 key）")
+    return keys
+
+
+def apply_changes(data: dict, changes, key: str = KEY) -> dict:
+    """把 changeset 套到 data（就地修改並回傳）；JS 的 applyChanges 是同一套規則"""
+    records = data['restaurants']
+    position = {k: i for i, k in enumerate(_keys(records, key))}
+    removed = set()
+    for c in changes:
+        op = c['op']
+        if op == 'header':
+            continue
+        if op == 'top':
+            if 'value' in c:
+                data[c['field']] = c['value']
+            else:
+                data.pop(c['field'], None)
+        elif op == 'add':
+            position[c[key]] = len(records)
+            records.append(c['record'])
+        elif op == 'remove':
+            removed.add(position[c[key]])
+        elif op == 'replace':
+            records[position[c[key]]] = c['record']
+        elif op == 'modify':
+            r = records[position[c[key]]]
+            for field, v in c['fields'].items():
+                if 'new' in v:
+                    r[field] = v['new']
+                else:
+                    r.pop(field, None)
+        elif op == 'order':
+            records[:] = [records[position[k]] for k in c['keys']]
+            position = {k: i for i, k in enumerate(c['keys'])}
+            removed = set()
+        else:
+            raise DeltaError(f"不認得的 op：{op}")
+    if removed:
+        records[:] = [r for i, r in enumerate(records) if i not in removed]
+    return data
+
+
+def make_patch(base: dict, target: dict, key: str = KEY) -> list:
+    """base → target 的 changeset（第一行 header）；產生後實際套一次確認結果和 target 一模一樣"""
+    base_hash, target_hash = content_hash(base), content_hash(target)
+    changes = [{'op': 'header', 'format': FORMAT, 'key': key,
+                'old': {'sha256': base_hash}, 'new': {'sha256': target_hash}}]
+    for field in list(base) + [f for f in target if f not in base]:
+        if field == 'restaurants':
+            continue
+        if field not in target:
+            changes.append({'op': 'top', 'field': field})
+        elif field not in base or not _exact(base[field], target[field]):
+            changes.append({'op': 'top', 'field': field, 'value': target[field]})
+
+    base_keys = _keys(base['restaurants'], key)
+    target_keys = _keys(target['restaurants'], key)
+    before = dict(zip(base_keys, base['restaurants']))
+    in_target = set(target_keys)
+    added = []
+    for k, r in zip(target_keys, target['restaurants']):
+        old = before.get(k)
+        if old is None:
+            changes.append({'op': 'add', key: k, 'record': r})
+            added.append(k)
+            continue
+        fields = field_changes(old, r, same=_exact)
+        if not fields:
+            continue
+        patched = apply_changes({'restaurants': [copy.deepcopy(old)]},
+                                [{'op': 'modify', key: k, 'fields': fields}], key)['restaurants'][0]
+        if list(patched) != list(r):
+            changes.append({'op': 'replace', key: k, 'record': r})
+        else:
+            changes.append({'op': 'modify', key: k, 'name': r.get('name'), 'fields': fields})
+    for k in base_keys:
+        if k not in in_target:
+            changes.append({'op': 'remove', key: k, 'record': before[k]})
+    if [k for k in base_keys if k in in_target] + added != target_keys:
+        changes.append({'op': 'order', 'keys': target_keys})
+
+    if content_hash(apply_changes(copy.deepcopy(base), changes, key)) != target_hash:
+        raise DeltaError('patch 套回去和目標不一致（不該發生，請回報）')
+    return changes
+
+
+def encode_patch(changes: list) -> bytes:
+    return ''.join(json.dumps(c, ensure_ascii=False) + '\n' for c in changes).encode('utf-8')
+
+
+def decode_patch(payload: bytes) -> list:
+    return [json.loads(line) for line in payload.decode('utf-8').splitlines() if line.strip()]
+
+
+def _sha256(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+class DeltaRepo:
+    """deltas/ 目錄：base + patch 鏈 + manifest"""
+
+    def __init__(self, root: str = DELTA_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def manifest(self) -> dict:
+        if not self.exists():
+            raise DeltaError(f"{self.manifest_path} 不存在，先跑 delta.py init")
+        with open(self.manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _read(self, rel: str, sha256: str) -> bytes:
+        with open(os.path.join(self.root, rel), 'rb') as f:
+            payload = f.read()
+        if _sha256(payload) != sha256:
+            raise DeltaError(f"{rel} 的 sha256 和 manifest 不符（檔案被改過？）")
+        return payload
+
+    def _write_manifest(self, manifest: dict) -> dict:
+        payload = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        return write_bytes(payload, [self.manifest_path])
+
+    def write_base(self, data: dict, manifest: dict = None) -> dict:
+        """data 當成新的 base，patch 鏈清空（init / compact）；回傳 {路徑: 有沒有寫}"""
+        payload = encode_db(data)
+        sha = _sha256(payload)
+        rel = f"base/{sha[:12]}.json"
+        written = write_bytes(payload, [os.path.join(self.root, rel)])
+        old = manifest or {}
+        written.update(self._write_manifest({
+            'format': FORMAT,
+            'key': old.get('key', KEY),
+            'base': {'file': rel, 'sha256': sha, 'count': len(data['restaurants'])},
+            'patches': [],
+            'head': sha,
+        }))
+        # manifest 換好之後才刪舊檔（讀的人不會拿到指向不存在檔案的 manifest）
+        stale = [old['base']['file']] if old.get('base') and old['base']['file'] != rel else []
+        stale += [p['file'] for p in old.get('patches', [])]
+        for f in stale:
+            path = os.path.join(self.root, f)
+            if os.path.exists(path):
+                os.remove(path)
+        return written
+
+    def head(self, manifest: dict = None) -> dict:
+        """base 一路套到最後一個 patch；每一步都驗 hash"""
+        manifest = manifest or self.manifest()
+        data = json.loads(self._read(manifest['base']['file'], manifest['base']['sha256']))
+        current = manifest['base']['sha256']
+        for p in manifest['patches']:
+            changes = decode_patch(self._read(p['file'], p['sha256']))
+            header = changes[0]
+            if header.get('op') != 'header' or header['old']['sha256'] != current or p['from'] != current:
+                raise DeltaError(f"{p['file']} 不是接在 {current[:12]} 後面的 patch")
+            apply_changes(data, changes, manifest['key'])
+            current = content_hash(data)
+            if current != header['new']['sha256'] or current != p['to']:
+                raise DeltaError(f"套完 {p['file']} 的結果 {current[:12]} 和目標 {p['to'][:12]} 不符")
+        return data
+
+    def add_patch(self, target: dict) -> dict:
+        """head → target 記成一個 patch；沒有差異回傳 None"""
+        manifest = self.manifest()
+        head = self.head(manifest)
+        if content_hash(head) == content_hash(target):
+            return None
+        changes = make_patch(head, target, manifest['key'])
+        payload = encode_patch(changes)
+        seq = len(manifest['patches']) + 1
+        to = changes[0]['new']['sha256']
+        rel = f"patches/{seq:04d}-{to[:12]}.jsonl"
+        write_bytes(payload, [os.path.join(self.root, rel)])
+        ops = Counter(c['op'] for c in changes[1:])
+        entry = {'seq': seq, 'file': rel, 'from': changes[0]['old']['sha256'], 'to': to,
+                 'sha256': _sha256(payload), 'bytes': len(payload), 'ops': dict(ops),
+                 'created': datetime.now().isoformat(timespec='seconds')}
+        manifest['patches'].append(entry)
+        manifest['head'] = to
+        self._write_manifest(manifest)
+        return entry
+
+
+def record(db_path: str = DB, root: str = DELTA_DIR):
+    """store.finish --delta 用：主檔寫出後把差異記成 patch（還沒 init 就略過）"""
+    repo = DeltaRepo(root)
+    if not repo.exists():
+        print(f"（{root}/ 還沒 init，略過 patch）")
+        return None
+    with open(db_path, encoding='utf-8') as f:
+        entry = repo.add_patch(json.load(f))
+    if entry:
+        print(f"patch {entry['file']}  {entry['bytes'] / 1024:.1f}KB  {entry['ops']}")
+    else:
+        print("和 head 相同，沒有新 patch")
+    return entry
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('cmd', choices=['init', 'make', 'status', 'verify', 'apply', 'compact'])
+    ap.add_argument('--dir', default=DELTA_DIR)
+    ap.add_argument('--db', default=DB, help='主檔（init / make / verify 用）')
+    ap.add_argument('--out', help='apply：head 寫到哪裡')
+    ap.add_argument('--force', action='store_true', help='init：已經有 manifest 也重建')
+    args = ap.parse_args()
+    repo = DeltaRepo(args.dir)
+
+    if args.cmd == 'init':
+        if repo.exists() and not args.force:
+            raise DeltaError(f"{repo.manifest_path} 已存在（要重建加 --force，或用 compact）")
+        with open(args.db, encoding='utf-8') as f:
+            data = json.load(f)
+        repo.write_base(data, repo.manifest() if repo.exists() else None)
+        m = repo.manifest()
+        print(f"base {m['base']['file']}（{m['base']['count']} 筆）")
+    elif args.cmd == 'make':
+        record(args.db, args.dir)
+    elif args.cmd == 'status':
+        m = repo.manifest()
+        size = os.path.getsize(os.path.join(args.dir, m['base']['file']))
+        print(f"base {m['base']['file']}  {m['base']['count']} 筆  {size / 1024:.0f}KB")
+        for p in m['patches']:
+            print(f"  {p['file']}  {p['bytes'] / 1024:.1f}KB  {p['ops']}  {p['created']}")
+        print(f"head {m['head'][:12]}（{len(m['patches'])} 個 patch，"
+              f"共 {sum(p['bytes'] for p in m['patches']) / 1024:.1f}KB）")
+    elif args.cmd == 'verify':
+        head = repo.head()
+        print(f"patch 鏈驗證通過，head {content_hash(head)[:12]}")
+        if os.path.exists(args.db):
+            with open(args.db, encoding='utf-8') as f:
+                same = content_hash(json.load(f)) == content_hash(head)
+            print(f"{args.db} {'和 head 相同' if same else '和 head 不同（跑 delta.py make 記成 patch）'}")
+            if not same:
+                sys.exit(1)
+    elif args.cmd == 'apply':
+        if not args.out:
+            ap.error('apply 需要 --out')
+        written = write_bytes(encode_db(repo.head()), [args.out])
+        print(f"head 寫到 {args.out}" if written[args.out] else f"{args.out} 已經是 head，略過")
+    elif args.cmd == 'compact':
+        m = repo.manifest()
+        if not m['patches']:
+            print("沒有 patch，不用 compact")
+            return
+        repo.write_base(repo.head(m), m)
+        print(f"{len(m['patches'])} 個 patch 摺進新 base {repo.manifest()['base']['file']}")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (DeltaError, OSError, ValueError, KeyError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
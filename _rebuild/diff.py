@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+兩份餐廳 snapshot 的欄位級 diff（07_diff_report.py 的引擎）
+
+- 逐筆讀 snapshot：{"restaurants": [...]} 的 JSON 用增量 parser 一筆一筆吐（不整份 json.load），
+  一行一筆的 .jsonl 也可以
+- 用 or_id 做 hash join：舊 snapshot 放進 dict，新的一筆一筆比
+- 舊 snapshot 太大時（--mem-mb）先依 crc32(or_id) 分到 N 個暫存 partition，
+  每次只載一個 partition 的舊資料 → 時間線性、記憶體約 1/N
+- 每個差異輸出一行 JSONL（changeset），第一行是 header（兩份檔案的 sha256）：
+    {"op": "header", "format": 1, "key": "or_id", "old": {path, sha256}, "new": {path, sha256}}
+    {"op": "add",    "or_id": ..., "record": {新資料}}
+    {"op": "remove", "or_id": ..., "record": {舊資料}}
+    {"op": "modify", "or_id": ..., "name": ..., "fields": {欄位: {"old": ..., "new": ...}}}
+  欄位只在一邊時只有 old（欄位被刪）或只有 new（新欄位）
+- 欄位值分型別比較（1 / 1.0 / true 視為不同）、不管 dict 的 key 順序
+
+用法:
+  from diff import diff_snapshots, Summary
+  for change in diff_snapshots('old.json', 'new.json'): ...
+"""
+import os
+import json
+import zlib
+import codecs
+import hashlib
+import tempfile
+from collections import Counter
+
+SNAPSHOT_KEY = 'restaurants'
+FORMAT = 1
+CHUNK_SIZE = 1 << 16
+# 載進記憶體的 dict 大約是 JSON 檔大小的幾倍（用來估 partition 數）
+MEMORY_FACTOR = 8
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _StreamReader:
+    """JSON 增量讀取：一次讀一塊，用 raw_decode 一個值一個值解"""
+
+    def __init__(self, f):
+        self.f = f
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            self.buf += self.decoder.decode(b'', final=True)
+            return True
+        if self.pos > CHUNK_SIZE:
+            self.buf, self.pos = self.buf[self.pos:], 0
+        self.buf += self.decoder.decode(chunk)
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError('snapshot 提早結束')
+
+    def expect(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"snapshot 格式錯誤：預期 {ch!r}，讀到 {self.buf[self.pos:self.pos + 20]!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.json.raw_decode(self.buf, self.pos)
+                # 數字剛好停在 buffer 結尾時可能還沒讀完（"12" | "3"）
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def array(self):
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+                continue
+            self.expect(']')
+            return
+
+
+def iter_snapshot(path: str):
+    """逐筆吐出 snapshot 裡的餐廳"""
+    with open(path, 'rb') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        reader = _StreamReader(f)
+        if reader.peek() == '[':
+            yield from reader.array()
+            return
+        reader.expect('{')
+        while reader.peek() != '}':
+            key = reader.value()
+            reader.expect(':')
+            if key == SNAPSHOT_KEY:
+                yield from reader.array()
+            else:
+                reader.value()  # _metadata 等，不參與 diff
+            if reader.peek() == ',':
+                reader.pos += 1
+
+
+def record_key(r: dict, key: str) -> str:
+    """join key；沒有 or_id 的舊資料退回用店名"""
+    v = r.get(key)
+    return str(v) if v not in (None, '') else f"name:{r.get('name')}"
+
+
+def _same(a, b) -> bool:
+    # Python 的 == 會把 1 / 1.0 / True 當成一樣，至少欄位本身的型別要一致
+    return type(a) is type(b) and a == b
+
+
+def field_changes(old: dict, new: dict, ignore=(), same=_same) -> dict:
+    out = {}
+    for k in list(old) + [k for k in new if k not in old]:
+        if k in ignore:
+            continue
+        if k not in new:
+            out[k] = {'old': old[k]}
+        elif k not in old:
+            out[k] = {'new': new[k]}
+        elif not same(old[k], new[k]):
+            out[k] = {'old': old[k], 'new': new[k]}
+    return out
+
+
+def _join(old_records, new_records, key: str, ignore, stats: Counter):
+    """old_records 載進 dict、new_records 逐筆比；吐出 add / modify / remove"""
+    old = {}
+    for r in old_records:
+        k = record_key(r, key)
+        if k in old:
+            stats['duplicate_old'] += 1
+        old[k] = r
+    seen = set()
+    for r in new_records:
+        k = record_key(r, key)
+        if k in seen:
+            stats['duplicate_new'] += 1
+            continue
+        seen.add(k)
+        before = old.pop(k, None)
+        if before is None:
+            yield {'op': 'add', key: k, 'record': r}
+            continue
+        fields = field_changes(before, r, ignore)
+        if fields:
+            yield {'op': 'modify', key: k, 'name': r.get('name', before.get('name')), 'fields': fields}
+        else:
+            stats['unchanged'] += 1
+    for k, r in old.items():
+        yield {'op': 'remove', key: k, 'record': r}
+
+
+def _counted(records, stats: Counter, name: str):
+    for r in records:
+        stats[name] += 1
+        yield r
+
+
+def partition_count(old_path: str, mem_mb: float) -> int:
+    size = os.path.getsize(old_path) * MEMORY_FACTOR
+    return max(1, -(-size // int(mem_mb * 1024 * 1024)))
+
+
+def _partition(records, key: str, n: int, workdir: str, side: str) -> list:
+    paths = [os.path.join(workdir, f'{side}.{i}.jsonl') for i in range(n)]
+    files = [open(p, 'w', encoding='utf-8') for p in paths]
+    try:
+        for r in records:
+            i = zlib.crc32(record_key(r, key).encode('utf-8')) % n
+            files[i].write(json.dumps(r, ensure_ascii=False) + '\n')
+    finally:
+        for f in files:
+            f.close()
+    return paths
+
+
+def _read_jsonl(path: str):
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def diff_snapshots(old_path: str, new_path: str, key: str = 'or_id', ignore=(),
+                   mem_mb: float = 256, stats: Counter = None):
+    """吐出 changeset：header 一行，之後每個差異一行；stats 另外累計 old / new / unchanged / duplicate_*"""
+    stats = stats if stats is not None else Counter()
+    ignore = set(ignore)
+    yield {'op': 'header', 'format': FORMAT, 'key': key,
+           'old': {'path': old_path, 'sha256': file_sha256(old_path)},
+           'new': {'path': new_path, 'sha256': file_sha256(new_path)}}
+    old_records = _counted(iter_snapshot(old_path), stats, 'old')
+    new_records = _counted(iter_snapshot(new_path), stats, 'new')
+    n = partition_count(old_path, mem_mb)
+    stats['partitions'] = n
+    if n == 1:
+        # 舊 snapshot 放得下：不寫暫存檔，輸出順序同新 snapshot
+        yield from _join(old_records, new_records, key, ignore, stats)
+        return
+    with tempfile.TemporaryDirectory(prefix='diff.') as workdir:
+        old_parts = _partition(old_records, key, n, workdir, 'old')
+        new_parts = _partition(new_records, key, n, workdir, 'new')
+        for old_part, new_part in zip(old_parts, new_parts):
+            yield from _join(_read_jsonl(old_part), _read_jsonl(new_part), key, ignore, stats)
+            os.remove(old_part)
+            os.remove(new_part)
+
+
+def read_changeset(path: str):
+    """回傳 (header, 差異的 iterator)"""
+    lines = _read_jsonl(path)
+    header = next(lines, None)
+    if not header or header.get('op') != 'header':
+        raise ValueError(f"{path} 不是 changeset（第一行應為 header）")
+    return header, lines
+
+
+class Summary:
+    """邊吐 changeset 邊累計統計 + 各類樣本"""
+
+    def __init__(self, samples: int = 10):
+        self.ops = Counter()
+        self.fields = Counter()
+        self.toggled = Counter()
+        self.samples = {'add': [], 'remove': [], 'modify': []}
+        self.limit = samples
+
+    def add(self, change: dict):
+        op = change['op']
+        if op == 'header':
+            return
+        self.ops[op] += 1
+        if op == 'modify':
+            self.fields.update(change['fields'].keys())
+            enabled = change['fields'].get('enabled')
+            if enabled and 'new' in enabled:
+                self.toggled['enabled → true' if enabled['new'] else 'enabled → false'] += 1
+        if len(self.samples[op]) < self.limit:
+            self.samples[op].append(change)
+
+    def print(self, stats: Counter, key: str = 'or_id'):
+        print(f"舊 snapshot {stats['old']} 筆 / 新 snapshot {stats['new']} 筆"
+              f"（partition {stats['partitions']} 個）")
+        print(f"  新增 {self.ops['add']} | 刪除 {self.ops['remove']} | 修改 {self.ops['modify']} "
+              f"| 沒變 {stats['unchanged']}")
+        for k in ('duplicate_old', 'duplicate_new'):
+            if stats[k]:
+                print(f"  ⚠️  {k}: {stats[k]} 筆重複的 {key}（以最後 / 第一筆為準）")
+        if self.toggled:
+            print('  ' + ' | '.join(f"{k}: {v}" for k, v in self.toggled.items()))
+        if self.fields:
+            print('\n各欄位修改筆數:')
+            for field, n in self.fields.most_common():
+                print(f"  {field:24s} {n}")
+        for op, label in (('add', '新增'), ('remove', '刪除'), ('modify', '修改')):
+            if not self.samples[op]:
+                continue
+            print(f"\n{label}樣本（前 {len(self.samples[op])} 筆）:")
+            for c in self.samples[op]:
+                if op == 'modify':
+                    detail = ', '.join(_describe(f, v) for f, v in c['fields'].items())
+                    print(f"  - {c[key]} {str(c.get('name'))[:24]}: {detail[:160]}")
+                else:
+                    print(f"  - {c[key]} {str(c['record'].get('name'))[:40]}")
+
+
+def _short(v) -> str:
+    s = json.dumps(v, ensure_ascii=False)
+    return s if len(s) <= 40 else s[:37] + '...'
+
+
+def _describe(field: str, change: dict) -> str:
+    if 'old' not in change:
+        return f"+{field}={_short(change['new'])}"
+    if 'new' not in change:
+        return f"-{field}"
+    return f"{field}: {_short(change['old'])} → {_short(change['new'])}"
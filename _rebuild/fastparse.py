@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+OpenRice 頁面的快速 parser backend（單趟事件 parser）
+
+BeautifulSoup 會先把 1MB+ 的頁面整棵建成 Tag 物件，再讓 get_text() / select() /
+find_all('img') 各自重走一次。這裡直接接 html.parser 的事件，一趟就收集所有
+extractor 要的東西，不建整棵樹：
+- 全文（closed / budget 用）
+- 第一個 .opening-hours-list 的子樹（只有這一小塊建成迷你 DOM，重用 scraper.hours_from_list）
+- .recommend-dish / .signature-dish / .dish-name 的文字
+- img 的 src / data-src / data-lazy-src
+- <script type="application/ld+json"> 的內容
+cuisine 與座標 fallback 本來就是對 raw HTML 跑 regex，直接共用 scraper 的 extractor。
+
+輸出必須和 BeautifulSoup 路徑逐欄位相同（bench_parsers.py 對 golden corpus 驗證），
+所以 tokenizer 一樣用 html.parser，樹的規則照抄 bs4 的 html.parser builder：
+實體 / 數字字元參照的解碼（數字參照用 WHATWG 規則自己解，不依賴 bs4 內部函式）、void 元素立即關閉、end tag 彈到最近同名 tag、
+純空白字串壓成 ' ' 或 '\\n'（pre/textarea 內除外）、script/style/template/rt/rp
+內的字串不算進 get_text()。
+
+用法：
+  from scraper import parse_openrice_page
+  parse_openrice_page(html, parser='fast')
+"""
+import re
+import html
+from html.parser import HTMLParser
+from bs4.builder import HTMLTreeBuilder
+from bs4.dammit import EntitySubstitution
+from bs4.exceptions import ParserRejectedMarkup
+
+import scraper
+
+VOID_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS)
+PRESERVE_WS_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_PRESERVE_WHITESPACE_TAGS)
+# 這些 tag 裡的字串在 bs4 是特殊型別（Script / Stylesheet / TemplateString…），
+# 一般 get_text() 不會收；型別由「最內層」的這種 tag 決定
+CONTAINER_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+# 字串型別：一般文字 / CDATA 以外都不進 get_text()
+TEXT_TYPES = frozenset(['text', 'cdata'])
+
+DISH_CLASSES = ('recommend-dish', 'signature-dish', 'dish-name')
+LD_JSON = 'application/ld+json'
+
+
+_NUMERIC_PREFIX = {10: re.compile(r'^([0-9]+)(.*)$', re.DOTALL),
+                   16: re.compile(r'^([0-9a-fA-F]+)(.*)$', re.DOTALL)}
+
+
+def numeric_charref(name: str) -> str:
+    """&#...; 的 name（html.parser 給的 '65' / 'x41'）→ 文字，照 WHATWG「numeric character reference end state」：
+    0、超出 Unicode、surrogate → U+FFFD；0x80–0x9F 照 windows-1252 對照；其他控制字元、noncharacter 照原值。
+    html.unescape 會把後兩種丟掉，所以只拿它的 windows-1252 對照表用。
+    name 不是純數字時（沒有分號結尾）取開頭的數字當參照，剩下的當一般文字。"""
+    base = 16 if name[:1] in ('x', 'X') else 10
+    digits = name[1:] if base == 16 else name
+    m = _NUMERIC_PREFIX[base].match(digits)
+    if not m:
+        return name
+    num, extra = int(m.group(1), base), m.group(2)
+    if num == 0 or num > 0x10FFFF or 0xD800 <= num <= 0xDFFF:
+        return '\ufffd' + extra
+    if 0x80 <= num <= 0x9F:
+        return (html.unescape(f'&#{num};') or chr(num)) + extra
+    return chr(num) + extra
+
+
+def _string_types(name: str) -> frozenset:
+    """某個 tag 的 get_text() 會收哪些型別的字串（同 bs4 Tag.interesting_string_types）"""
+    return frozenset([name]) if name in CONTAINER_TAGS else TEXT_TYPES
+
+
+class Node:
+    """迷你 DOM 節點，只實作 hours_from_list 用到的 bs4 Tag 介面（只支援 '.class' selector）"""
+
+    __slots__ = ('name', 'classes', 'parent', 'children', 'types')
+
+    def __init__(self, name: str, classes: list, parent=None):
+        self.name = name
+        self.classes = classes
+        self.parent = parent
+        self.children = []          # Node 或 (型別, 字串)
+        self.types = _string_types(name)
+
+    def descendants(self):
+        for c in self.children:
+            if isinstance(c, Node):
+                yield c
+                yield from c.descendants()
+
+    def select(self, selector: str) -> list:
+        cls = selector.lstrip('.')
+        return [n for n in self.descendants() if cls in n.classes]
+
+    def select_one(self, selector: str):
+        cls = selector.lstrip('.')
+        return next((n for n in self.descendants() if cls in n.classes), None)
+
+    def find_all(self, name: str) -> list:
+        return [n for n in self.descendants() if n.name == name]
+
+    def _strings(self):
+        for c in self.children:
+            if isinstance(c, Node):
+                yield from c._strings()
+            else:
+                yield c
+
+    def get_text(self, strip: bool = False) -> str:
+        parts = []
+        for kind, s in self._strings():
+            if kind not in self.types:
+                continue
+            if strip:
+                s = s.strip()
+                if not s:
+                    continue
+            parts.append(s)
+        return ''.join(parts)
+
+
+class _Capture:
+    """一個符合 dish selector 的元素：收集它的 get_text(strip=True) 片段"""
+
+    __slots__ = ('types', 'parts')
+
+    def __init__(self, name: str):
+        self.types = _string_types(name)
+        self.parts = []
+
+
+class _LdScript:
+    """<script type="application/ld+json">：記下子字串，模擬 Tag.string"""
+
+    __slots__ = ('strings',)
+
+    def __init__(self):
+        self.strings = []
+
+    @property
+    def string(self):
+        return self.strings[0] if len(self.strings) == 1 else None
+
+
+class _EventParser(HTMLParser):
+    """照 bs4 BeautifulSoupHTMLParser + BeautifulSoup 建樹規則處理事件，只留需要的結果"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.stack = []             # [(tag 名, 迷你 DOM 節點, _Capture, _LdScript)]，沒有的放 None
+        self.open_count = {}
+        self.preserve = 0           # 目前開著幾個 pre / textarea
+        self.containers = []        # 開著的 script/style/template/rt/rp（最內層決定字串型別）
+        self.data = []
+        self.already_closed = []    # 已自動關閉的 void 元素（之後的 </br> 之類要忽略）
+
+        self.text = []
+        self.hours_root = None
+        self.cur_node = None
+        self.captures = []          # 開著的 dish 元素
+        self.dish = {c: [] for c in DISH_CLASSES}
+        self.images = []
+        self.ld_scripts = []
+
+    # --- tokenizer 事件 ---
+    def handle_starttag(self, tag, attrs, handle_empty_element=True):
+        self._flush()
+        attr = {}
+        for k, v in attrs:
+            attr[k] = '' if v is None else v
+        self._push(tag, attr)
+        if handle_empty_element and tag in VOID_TAGS:
+            self.handle_endtag(tag, check_already_closed=False)
+            self.already_closed.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs, handle_empty_element=False)
+        self.handle_endtag(tag, check_already_closed=False)
+
+    def handle_endtag(self, tag, check_already_closed=True):
+        if check_already_closed and tag in self.already_closed:
+            self.already_closed.remove(tag)
+            return
+        self._flush()
+        if not self.open_count.get(tag):
+            return
+        while self._pop() != tag:
+            pass
+
+    def handle_data(self, data):
+        self.data.append(data)
+
+    def handle_charref(self, name):
+        self.data.append(numeric_charref(name))
+
+    def handle_entityref(self, name):
+        ch = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.data.append(ch if ch is not None else f'&{name}')
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.upper().startswith('CDATA['):
+            self.data.append(data[len('CDATA['):])
+            self._flush(cdata=True)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    # --- 建樹規則 ---
+    def _push(self, name, attr):
+        classes = attr['class'].split() if 'class' in attr else ()
+        node = None
+        if self.cur_node is not None:
+            node = Node(name, classes, self.cur_node)
+            self.cur_node.children.append(node)
+            self.cur_node = node
+        elif self.hours_root is None and 'opening-hours-list' in classes:
+            node = self.hours_root = self.cur_node = Node(name, classes)
+
+        cap = ld = None
+        hits = [c for c in DISH_CLASSES if c in classes]
+        if hits:
+            cap = _Capture(name)
+            for c in hits:
+                self.dish[c].append(cap)
+            self.captures.append(cap)
+        if name == 'img':
+            self.images.append(attr.get('src') or attr.get('data-src') or attr.get('data-lazy-src') or '')
+        elif name == 'script' and attr.get('type') == LD_JSON:
+            ld = _LdScript()
+            self.ld_scripts.append(ld)
+
+        self.stack.append((name, node, cap, ld))
+        self.open_count[name] = self.open_count.get(name, 0) + 1
+        if name in PRESERVE_WS_TAGS:
+            self.preserve += 1
+        if name in CONTAINER_TAGS:
+            self.containers.append(name)
+
+    def _pop(self) -> str:
+        name, node, cap, _ = self.stack.pop()
+        self.open_count[name] -= 1
+        if name in PRESERVE_WS_TAGS:
+            self.preserve -= 1
+        if name in CONTAINER_TAGS:
+            self.containers.pop()
+        if node is not None:
+            self.cur_node = node.parent
+        if cap is not None:
+            self.captures.pop()
+        return name
+
+    def _flush(self, cdata=False):
+        if not self.data:
+            return
+        s = ''.join(self.data)
+        self.data = []
+        if not self.preserve and not s.strip(ASCII_SPACES):
+            s = '\n' if '\n' in s else ' '
+        kind = 'cdata' if cdata else (self.containers[-1] if self.containers else 'text')
+
+        if kind in TEXT_TYPES:
+            self.text.append(s)
+        if self.cur_node is not None:
+            self.cur_node.children.append((kind, s))
+        if self.captures:
+            st = s.strip()
+            if st:
+                for cap in self.captures:
+                    if kind in cap.types:
+                        cap.parts.append(st)
+        if self.stack and self.stack[-1][3] is not None:
+            self.stack[-1][3].strings.append(s)
+
+
+class FastPage:
+    """和 scraper.Page 同介面（.html / .text），另外提供事件 parser 收集到的結果；
+    只有用到 DOM / 全文的 extractor 才會觸發那一趟 parse"""
+
+    def __init__(self, html: str):
+        self.html = html
+        self._parsed = None
+        self._text = None
+
+    @property
+    def parsed(self) -> _EventParser:
+        if self._parsed is None:
+            p = _EventParser()
+            try:
+                p.feed(self.html)
+                p.close()
+            except AssertionError as e:
+                # html.parser 遇到壞掉的 marked section 之類會 assert，bs4 包成 ParserRejectedMarkup，這裡照做
+                raise ParserRejectedMarkup(e)
+            self._parsed = p
+        return self._parsed
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = ''.join(self.parsed.text)
+        return self._text
+
+
+def extract_opening_hours(page: FastPage) -> dict:
+    return {'opening_hours': scraper.hours_from_list(page.parsed.hours_root)}
+
+
+def extract_images(page: FastPage) -> dict:
+    images = [src for src in page.parsed.images if 'orstatic.com' in src and 'userphoto' in src]
+    return {'images': list(dict.fromkeys(images))[:20]}
+
+
+def extract_dish(page: FastPage) -> dict:
+    dish = []
+    for cls in DISH_CLASSES:
+        for cap in page.parsed.dish[cls]:
+            t = ''.join(cap.parts)
+            if t: dish.append(t)
+    return {'dish': list(dict.fromkeys(dish))}
+
+
+def extract_coordinates(page: FastPage) -> dict:
+    lds = [ld.string for ld in page.parsed.ld_scripts]
+    return {'coordinates': scraper.coordinates_from(lds, page.html)}
+
+
+# 有用到 soup 的 extractor 換成事件 parser 版本，其他（closed / cuisine / budget
+# 只看 .html / .text）直接沿用 scraper 的
+EXTRACTORS = {
+    **scraper.EXTRACTORS,
+    'hours': extract_opening_hours,
+    'images': extract_images,
+    'dish': extract_dish,
+    'coordinates': extract_coordinates,
+}
+
+
+def parse_openrice_page(html: str, fields=None) -> dict:
+    page = FastPage(html)
+    out = {}
+    for name in scraper.resolve_fields(fields):
+        out.update(EXTRACTORS[name](page))
+    return out
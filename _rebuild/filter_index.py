@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+推薦篩選用的倒排索引（build_bundle.py 寫進每個縣市 shard 的 _index）
+
+recommendRestaurants 原本每個請求都對整個陣列跑好幾輪 .filter()，每輪都從原始字串
+重新判斷料理 / 類型 / 預算分類。這裡在 build 時先算好每個分類「有哪些餐廳」：
+- 每個 posting 是一個 bitset：第 i 個 bit = shard 裡第 i 間餐廳（byte 內低位在前），base64 編碼
+- cuisine_style / type / budget 用前端的分類（和 recommendation.js 的
+  CUISINE_CATEGORY_MAP / TYPE_CATEGORY_MAP / mapBudgetToCategory 判斷完全相同）
+- budget 另外有 '_unknown'：沒預算或無法解析的餐廳，JS 原本對它們一律放行
+- district / bookable / is_buffet
+- grid：座標分到固定大小（GRID_CELL 度）的經緯度格子，{"緯度格:經度格": [位置...]}；
+  附近餐廳模式只看半徑外接框碰到的格子，再對那些餐廳算精確的 Haversine
+  （沒有座標的餐廳不進 grid，原本的距離篩選也會排除它們）
+- dining：{"lunch": [星期一..星期日的 posting], "dinner": [...]}，同 JS 的用餐時段篩選
+  （要有 opening_hours，且時段內任一格有營業）；「現在」隨時間變，JS 直接查 hours_bitmap
+JS 端把選到的分類 OR 起來、不同條件 AND 起來，再一次取出餐廳；facet 計數也是同一批 bitset 的 popcount。
+
+mappings 原樣存進索引：JS 的對照表改了而索引沒重建時，JS 會發現不一致，退回逐筆篩選。
+改 recommendation.js 的分類邏輯時，這裡要一起改。
+"""
+import re
+import math
+import base64
+from hours import DAYS, LUNCH, DINNER, compile_hours, is_open_during
+
+INDEX_VERSION = 3
+# 0.01 度 ≈ 緯度 1.1 km / 台灣經度約 1 km；附近餐廳的半徑通常 1–5 km
+GRID_CELL = 0.01
+
+# 和 backend/utils/recommendation.js 同內容、同順序（JS 用 JSON.stringify 比對）
+CUISINE_CATEGORY_MAP = {
+    '台式料理': ['taiwanese', '台灣原住民料理', '台灣料理', '客家料理'],
+    '中式/港粵': ['上海菜', '四川菜', '廣東菜-港式', '東北菜', '江浙菜', '湖南菜-湖北菜'],
+    '日式料理': ['日式料理'],
+    '韓式料理': ['韓式料理'],
+    '美式料理': ['美國料理'],
+    '東南亞料理': ['印尼料理', '星馬料理', '泰式料理'],
+    '多國料理': ['多國料理'],
+}
+
+TYPE_CATEGORY_MAP = {
+    '燒肉': ['燒肉店'],
+    '火鍋': ['火鍋店'],
+    '吃到飽': ['燒肉店', '火鍋店'],
+    '餐酒館': ['餐酒館'],
+    '咖啡廳': ['咖啡廳(店)'],
+}
+
+# 同 recommendation.js 的 DINING_WINDOWS
+DINING_WINDOWS = {'lunch': list(LUNCH), 'dinner': list(DINNER)}
+
+BUDGET_CATEGORIES = ['200元內', '200-500元', '500-1000元', '1000-1500元', '1500以上']
+BUDGET_UNKNOWN = '_unknown'
+
+# JS 的 \d 只認 ASCII 數字
+_RANGE = re.compile(r'(\d+)-(\d+)', re.ASCII)
+_ABOVE = re.compile(r'(\d+)以上', re.ASCII)
+_BELOW = re.compile(r'(\d+)以下', re.ASCII)
+
+
+def parse_budget_range(budget: str):
+    """同 parseBudgetRange：回傳 (min, max)，max 可能是 inf；解析不了回傳 None"""
+    if not budget:
+        return None
+    m = _RANGE.search(budget)
+    if m:
+        return int(m.group(1)), int(m.group(2))
+    m = _ABOVE.search(budget)
+    if m:
+        return int(m.group(1)), float('inf')
+    m = _BELOW.search(budget)
+    if m:
+        return 0, int(m.group(1))
+    return None
+
+
+def budget_category(budget: str):
+    """同 mapBudgetToCategory"""
+    rng = parse_budget_range(budget)
+    if rng is None:
+        return None
+    lo, hi = rng
+    center = lo + 500 if hi == float('inf') else (lo + hi) / 2
+    if center <= 200:
+        return '200元內'
+    if center <= 500:
+        return '200-500元'
+    if center <= 1000:
+        return '500-1000元'
+    if center <= 1500:
+        return '1000-1500元'
+    return '1500以上'
+
+
+def _only_general(tags: list) -> bool:
+    return len(tags) == 1 and tags[0] == '一般'
+
+
+def cuisine_categories(r: dict) -> list:
+    """同 matchesCuisineStyle：這間餐廳會被哪些前端料理分類選到"""
+    styles = r.get('cuisine_style') or []
+    if _only_general(styles):
+        return []
+    return [c for c, mapped in CUISINE_CATEGORY_MAP.items() if any(s in styles for s in mapped)]
+
+
+def type_categories(r: dict) -> list:
+    """同 matchesType：「吃到飽」只看 type 裡有沒有「吃到飽」，其他分類看對照表"""
+    types = r.get('type') or []
+    out = []
+    for c, mapped in TYPE_CATEGORY_MAP.items():
+        if c == '吃到飽':
+            hit = '吃到飽' in types
+        else:
+            hit = not _only_general(types) and any(t in types for t in mapped)
+        if hit:
+            out.append(c)
+    return out
+
+
+def encode_bits(positions, n: int) -> str:
+    bits = bytearray((n + 7) // 8)
+    for i in positions:
+        bits[i >> 3] |= 1 << (i & 7)
+    return base64.b64encode(bytes(bits)).decode('ascii')
+
+
+def grid_key(lat: float, lng: float) -> str:
+    """同 JS 的 Math.floor(lat / cell)（同樣的 IEEE 除法，格子編號兩邊一致）"""
+    return f"{math.floor(lat / GRID_CELL)}:{math.floor(lng / GRID_CELL)}"
+
+
+def build_grid(restaurants: list) -> dict:
+    cells = {}
+    for i, r in enumerate(restaurants):
+        coords = r.get('coordinates') or {}
+        # 同距離篩選：lat / lng 缺一（或是 0）就排除
+        if not coords.get('lat') or not coords.get('lng'):
+            continue
+        cells.setdefault(grid_key(coords['lat'], coords['lng']), []).append(i)
+    return {'cell': GRID_CELL, 'cells': cells}
+
+
+def build_dining(restaurants: list, n: int) -> dict:
+    postings = {w: [[] for _ in DAYS] for w in DINING_WINDOWS}
+    for i, r in enumerate(restaurants):
+        if not r.get('opening_hours'):
+            continue
+        bitmap = r.get('hours_bitmap') or compile_hours(r['opening_hours'])
+        for w, (start, end) in DINING_WINDOWS.items():
+            for day in range(len(DAYS)):
+                if is_open_during(bitmap, day, start, end):
+                    postings[w][day].append(i)
+    return {w: [encode_bits(p, n) for p in days] for w, days in postings.items()}
+
+
+def build_index(restaurants: list, city: str = None) -> dict:
+    n = len(restaurants)
+    groups = {
+        'cuisine_style': {c: [] for c in CUISINE_CATEGORY_MAP},
+        'type': {c: [] for c in TYPE_CATEGORY_MAP},
+        'budget': {c: [] for c in BUDGET_CATEGORIES + [BUDGET_UNKNOWN]},
+        'district': {},
+    }
+    flags = {'bookable': [], 'is_buffet': []}
+    for i, r in enumerate(restaurants):
+        for c in cuisine_categories(r):
+            groups['cuisine_style'][c].append(i)
+        for c in type_categories(r):
+            groups['type'][c].append(i)
+        groups['budget'][budget_category(r.get('budget')) or BUDGET_UNKNOWN].append(i)
+        if r.get('district'):
+            groups['district'].setdefault(r['district'], []).append(i)
+        for k in flags:
+            if r.get(k):
+                flags[k].append(i)
+    index = {
+        'version': INDEX_VERSION,
+        'count': n,
+        'city': city,
+        'mappings': {'cuisine_style': CUISINE_CATEGORY_MAP, 'type': TYPE_CATEGORY_MAP,
+                     'dining': DINING_WINDOWS},
+    }
+    for g, postings in groups.items():
+        index[g] = {k: encode_bits(v, n) for k, v in postings.items()}
+    for k, v in flags.items():
+        index[k] = encode_bits(v, n)
+    index['grid'] = build_grid(restaurants)
+    index['dining'] = build_dining(restaurants, n)
+    return index
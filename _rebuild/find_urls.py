@@ -14,14 +14,13 @@ OpenRice 搜尋頁是 JS 渲染的，靜態爬不到。用 Playwright headless 
       --headed  顯示瀏覽器（手動解 Captcha 用）
       --limit N 只跑前 N 筆
 
-產出: _rebuild/find_urls.progress.json
+產出: _rebuild/find_urls.progress.jsonl（journal.py 日誌，每筆 append 一行，中斷可 resume）
 完成後跑 06_merge_scraped.py 把 URL 寫回新 DB
 
 註：OpenRice 對自動化偵測強，連跑可能再次被 Captcha 擋。
 建議：每 20 筆隨機停 30-60 秒、整體配速每筆 5-10 秒。
 """
 import json
-import os
 import sys
 import time
 import random
@@ -34,20 +33,10 @@ except ImportError:
     print("  pip install playwright && python -m playwright install chromium")
     sys.exit(1)
 
-DB_FILE = '_rebuild/new_restaurants_database.json'
-PROGRESS = '_rebuild/find_urls.progress.json'
-
-
-def load_progress() -> dict:
-    if os.path.exists(PROGRESS):
-        with open(PROGRESS, encoding='utf-8') as f:
-            return json.load(f)
-    return {}
+from journal import Journal
 
-
-def save_progress(data: dict):
-    with open(PROGRESS, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+DB_FILE = '_rebuild/new_restaurants_database.json'
+PROGRESS = '_rebuild/find_urls.progress.jsonl'
 
 
 def find_url_for_restaurant(page, name: str, target_or_id: int, region: str = '') -> dict:
@@ -118,8 +107,8 @@ def main():
     restaurants = data['restaurants']
 
     targets = [r for r in restaurants if r.get('needs_scrape') and not r.get('url')]
-    progress = load_progress()
-    done = set(progress.keys())
+    progress_log = Journal(PROGRESS, sync_every=5)
+    done = set(progress_log.load().keys())
     todo = [r for r in targets if str(r['or_id']) not in done]
 
     print(f"需要找 URL: {len(targets)} 間")
@@ -161,25 +150,24 @@ def main():
             else:
                 print(f"✗ {result.get('error')}")
                 if result.get('error') == 'captcha':
-                    save_progress(progress)
+                    progress_log.close()
                     if args.headed:
                         print("\n   請手動解 Captcha，然後按 Enter 繼續")
                         input()
                     else:
                         print("\n❌ 停下，加 --headed 跑可以手動解")
                         return
-            progress[str(r['or_id'])] = result
+            progress_log.append(str(r['or_id']), result)
 
             if i % 20 == 0:
-                save_progress(progress)
                 # 隨機長休息
                 pause = random.uniform(30, 60)
-                print(f"  --- 已存進度，休息 {pause:.0f}s ---")
+                print(f"  --- 休息 {pause:.0f}s ---")
                 time.sleep(pause)
             else:
                 time.sleep(random.uniform(5, 9))
 
-        save_progress(progress)
+        progress_log.close()
         browser.close()
     print(f"\n完成。存在 {PROGRESS}")
     print(f"接著跑 _rebuild/06_merge_scraped.py 把 URL 寫回主 DB")
@@ -5,15 +5,16 @@
 用法:
   python3 _rebuild/generate_slogans.py --spike     # 只跑 spike 2-3 家看效果
   python3 _rebuild/generate_slogans.py --all       # 跑全部 enabled 餐廳並寫入 DB
+  python3 _rebuild/generate_slogans.py --all --no-export   # 只寫 store，之後 store.py export
 
 依賴：環境變數 GEMINI_API_KEY（沿用 line-menu-photo-bot 的 key + CF Worker proxy）
 """
 import os
-import json
 import argparse
 import time
 import requests
 from pathlib import Path
+from store import open_store, add_store_args, finish, NETLIFY_DB
 
 # 從 line-menu-photo-bot 的 .env 借用設定
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
@@ -134,15 +135,14 @@ def main():
     ap.add_argument('--all', action='store_true', help='跑全部 enabled 餐廳並寫入 DB')
     ap.add_argument('--target', default='restaurants_database.json')
     ap.add_argument('--limit', type=int)
+    add_store_args(ap)
     args = ap.parse_args()
 
     if not GEMINI_API_KEY:
         print('❌ 找不到 GEMINI_API_KEY')
         return
 
-    with open(args.target, encoding='utf-8') as f:
-        data = json.load(f)
-    db = data['restaurants']
+    store = open_store(args.store, args.target)
 
     if args.spike:
         # 之前 sample 看到的「問題店」 + 對照組
@@ -154,6 +154,7 @@ def main():
             '日光私廚',                    # 義式但之前「私廚約會」調性怪
             '椰糖 Coconut Sugar 南洋餐事', # 對照組
         ]
+        db = store.select()
         targets = []
         for name in target_names:
             for r in db:
@@ -175,7 +176,7 @@ def main():
         return
 
     if args.all:
-        targets = [r for r in db if r.get('enabled') and not r.get('slogans')]
+        targets = [r for r in store.select(enabled=True) if not r.get('slogans')]
         if args.limit:
             targets = targets[:args.limit]
         print(f'全量目標: {len(targets)} 家')
@@ -184,7 +185,8 @@ def main():
             try:
                 slogans = generate_for_restaurant(r)
                 if slogans:
-                    r['slogans'] = slogans
+                    # 每筆生成完直接寫進 store（單列交易），中斷也不會丟
+                    store.update(r['or_id'], {'slogans': slogans})
                     ok += 1
                     if i % 30 == 0 or i == 1:
                         print(f'  [{i}/{len(targets)}] {r["name"][:25]} → {len(slogans)} 條')
@@ -194,21 +196,12 @@ def main():
             except Exception as e:
                 fail += 1
                 print(f'  [{i}] ❌ {r["name"]}: {e}')
-            # 每 30 筆暫存
             if i % 30 == 0:
-                with open(args.target, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                print(f'    --- 已存 {i}/{len(targets)}（ok={ok} fail={fail}）---')
+                print(f'    --- 進度 {i}/{len(targets)}（ok={ok} fail={fail}）---')
             time.sleep(0.3)  # 0.3s 間隔避免被 rate limit
 
-        # 最終寫入
-        with open(args.target, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        # 同步 netlify
-        netlify_path = 'netlify/functions/restaurants_database.json'
-        if os.path.exists(netlify_path):
-            with open(netlify_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        # 最終寫入 + 同步 netlify
+        finish(store, args, [args.target] + ([NETLIFY_DB] if os.path.exists(NETLIFY_DB) else []))
         print(f'\n完成：ok={ok} fail={fail}')
         return
 
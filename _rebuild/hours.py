@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+營業時間編譯成每週 bitmap（build_bundle.py 寫進 bundle / shard 的 hours_bitmap）
+
+recommendation.js 的用餐時段篩選原本每個請求、每間餐廳都重新 split('-') / split(':')
+解析 opening_hours 字串。這裡 build 時先編好：
+- 一週 7 天（星期一起）× 96 個 15 分鐘格 = 672 bit，存成 21 個 uint32
+  （第 d 天第 q 格 = 第 d*96+q 個 bit，在第 (d*96+q)>>5 個整數的第 (d*96+q)&31 位）
+- 時段 [開始, 結束) 往外取整到 15 分鐘：開始往下、結束往上
+  → 和 15 分鐘對齊的時段（午餐 / 晚餐）比重疊與原本的分鐘計算完全相同
+- 跨日時段（17:00-02:00）超過午夜的部分記在隔天（星期日接回星期一）；開始 = 結束視為 24 小時
+- is_24h 且至少有一天有時段 → 全部 bit 設起來（同原本「現在營業」的判斷）
+沒有任何可用時段時回傳 None（篩選時段時這間餐廳不出現，同原本）。
+
+JS 端（recommendation.js 的 compileOpeningHours）是同一套規則，給沒有 bundle 的本地開發用。
+
+用法:
+  from hours import compile_hours, is_open_at
+  python3 _rebuild/hours.py                    # 檢查主 DB 營業時間（解析不了的時段 / 沒資料）
+  python3 _rebuild/hours.py --at "sat 12:00"   # 順便列出那個時間有開的餐廳數
+"""
+import re
+import sys
+import json
+import argparse
+
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WORDS = 7 * SLOTS_PER_DAY // 32
+
+# 午餐 / 晚餐時段（同 recommendation.js 的 DINING_WINDOWS）
+LUNCH = (11 * 60, 14 * 60 + 30)
+DINNER = (17 * 60 + 30, 21 * 60)
+
+_SLOT = re.compile(r'(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})', re.ASCII)
+
+
+def parse_slot(s: str):
+    """'11:30-14:00' → (690, 840)；跨日的結束時間加 24 小時；格式不對回傳 None"""
+    m = _SLOT.fullmatch(str(s).strip())
+    if not m:
+        return None
+    sh, sm, eh, em = map(int, m.groups())
+    start, end = sh * 60 + sm, eh * 60 + em
+    if sm > 59 or em > 59 or start >= 24 * 60 or end > 24 * 60:
+        return None
+    if end <= start:
+        end += 24 * 60
+    return start, end
+
+
+def _set_range(words: list, day: int, start: int, end: int):
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)  # 往上取整
+    for q in range(first, last):
+        bit = (day * SLOTS_PER_DAY + q) % (7 * SLOTS_PER_DAY)
+        words[bit >> 5] |= 1 << (bit & 31)
+
+
+def compile_hours(oh: dict):
+    """opening_hours → 21 個 uint32；沒有可用時段回傳 None"""
+    if not oh:
+        return None
+    words = [0] * WORDS
+    for d, day in enumerate(DAYS):
+        for s in oh.get(day) or []:
+            span = parse_slot(s)
+            if span:
+                _set_range(words, d, *span)
+    if not any(words):
+        return None
+    if oh.get('is_24h'):
+        return [0xFFFFFFFF] * WORDS
+    return words
+
+
+def invalid_slots(oh: dict) -> list:
+    """解析不了的時段字串（品質檢查用）"""
+    return [(day, s) for day in DAYS for s in (oh or {}).get(day) or [] if parse_slot(s) is None]
+
+
+def _bit(bitmap: list, day: int, q: int) -> bool:
+    bit = day * SLOTS_PER_DAY + q
+    return bool(bitmap[bit >> 5] >> (bit & 31) & 1)
+
+
+def is_open_at(bitmap: list, day: int, minute: int) -> bool:
+    """day：0 = 星期一；minute：當天第幾分鐘"""
+    return bool(bitmap) and _bit(bitmap, day, minute // SLOT_MINUTES)
+
+
+def is_open_during(bitmap: list, day: int, start: int, end: int) -> bool:
+    """[start, end) 內任一刻有營業（start / end 為當天分鐘數）"""
+    if not bitmap:
+        return False
+    return any(_bit(bitmap, day, q) for q in range(start // SLOT_MINUTES, -(-end // SLOT_MINUTES)))
+
+
+def _parse_at(text: str):
+    """'sat 12:00' → (5, 720)"""
+    day, hhmm = text.split()
+    d = next(i for i, name in enumerate(DAYS) if name.startswith(day.lower()[:3]))
+    h, m = map(int, hhmm.split(':'))
+    return d, h * 60 + m
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default='restaurants_database.json')
+    ap.add_argument('--at', help='例："sat 12:00"，列出那個時間有營業的餐廳數')
+    args = ap.parse_args()
+
+    with open(args.db, encoding='utf-8') as f:
+        restaurants = [r for r in json.load(f)['restaurants'] if r.get('enabled')]
+
+    compiled = [(r, compile_hours(r.get('opening_hours'))) for r in restaurants]
+    no_hours = [r for r, b in compiled if b is None]
+    bad = [(r, invalid_slots(r.get('opening_hours'))) for r in restaurants]
+    bad = [(r, slots) for r, slots in bad if slots]
+    always = sum(1 for r, b in compiled if b and all(w == 0xFFFFFFFF for w in b))
+
+    print(f"enabled 餐廳 {len(restaurants)} 間")
+    print(f"  沒有可用營業時間: {len(no_hours)}")
+    print(f"  全天營業: {always}")
+    print(f"  有解析不了的時段: {len(bad)}")
+    for r, slots in bad[:20]:
+        print(f"    {r['or_id']} {r['name'][:30]}  {slots}")
+    if args.at:
+        d, minute = _parse_at(args.at)
+        n = sum(1 for _, b in compiled if is_open_at(b, d, minute))
+        print(f"  {args.at} 有營業: {n}")
+    if bad:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+append-only JSONL 進度日誌（取代「整份 dict 每 N 筆 json.dump 一次」的 progress 檔）
+
+舊做法每次 checkpoint 都把整份 dict 重寫（indent=2），跑越久寫越多（總成本 O(n²)），
+而且寫到一半當掉整個檔案就壞了。改成每完成一筆 append 一行：
+
+  {"k": "12345", "v": {...}}
+
+- 每筆寫完就 flush 給 OS，每 sync_every 筆 fsync 一次：程式當掉最多丟正在寫的那一行，
+  機器斷電最多丟最後一批未 fsync 的
+- resume：從頭串流讀一遍，同一個 key 後面的覆蓋前面的（不用整份 json.load）
+- 最後一行寫到一半（當掉）→ 讀的時候略過，下次 append 前先截掉
+- 同一個 key 重複寫會讓檔案變大，需要時手動 compact（每個 key 只留最後一筆，原子替換）
+- 相容舊版：.jsonl 不存在但舊 .json 在 → 讀舊檔並轉成 .jsonl
+
+用法（檢視 / 壓縮）:
+  python3 _rebuild/journal.py stats _rebuild/rescrape.progress.jsonl
+  python3 _rebuild/journal.py compact _rebuild/rescrape.progress.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+SYNC_EVERY = 30
+
+
+def legacy_path(path: str) -> str:
+    """foo.progress.jsonl → foo.progress.json（舊版整份 dict 的檔名）"""
+    return path[:-1] if path.endswith('.jsonl') else None
+
+
+def replay(path: str):
+    """逐行讀出 (key, value)；壞掉的行（寫到一半當掉）略過"""
+    if not os.path.exists(path):
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.endswith('\n'):
+                return  # 最後一行沒寫完
+            try:
+                rec = json.loads(line)
+                yield rec['k'], rec['v']
+            except (ValueError, KeyError, TypeError):
+                continue
+
+
+def read_state(path: str) -> dict:
+    """讀出最新狀態 {key: value}；path 可以是 .jsonl 日誌或舊版 .json"""
+    if path.endswith('.jsonl') and not os.path.exists(path):
+        old = legacy_path(path)
+        if os.path.exists(old):
+            path = old
+    if not path.endswith('.jsonl'):
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return dict(replay(path))
+
+
+class Journal:
+    def __init__(self, path: str, sync_every: int = SYNC_EVERY):
+        self.path = path
+        self.sync_every = sync_every
+        self._f = None
+        self._pending = 0
+
+    def load(self) -> dict:
+        """讀出目前狀態；只有舊版 .json 時順便轉成 .jsonl"""
+        if not os.path.exists(self.path):
+            old = legacy_path(self.path)
+            if old and os.path.exists(old):
+                with open(old, encoding='utf-8') as f:
+                    state = json.load(f)
+                self.compact(state)
+                print(f"已把舊版 {old} 轉成 {self.path}（{len(state)} 筆）")
+                return state
+        return dict(replay(self.path))
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if os.path.exists(self.path):
+            # 上次當掉留下半行 → 截到最後一個換行，不然新紀錄會黏在壞行後面一起讀不到
+            with open(self.path, 'rb+') as f:
+                end = f.seek(0, os.SEEK_END)
+                f.seek(max(0, end - 1))
+                if end and f.read(1) != b'\n':
+                    pos = end
+                    while pos > 0:
+                        start = max(0, pos - 65536)
+                        f.seek(start)
+                        cut = f.read(pos - start).rfind(b'\n')
+                        if cut >= 0:
+                            pos = start + cut + 1
+                            break
+                        pos = start
+                    f.truncate(pos)
+        self._f = open(self.path, 'a', encoding='utf-8')
+
+    def append(self, key: str, value):
+        if self._f is None:
+            self._open()
+        self._f.write(json.dumps({'k': key, 'v': value}, ensure_ascii=False) + '\n')
+        self._f.flush()
+        self._pending += 1
+        if self._pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        if self._f is not None and self._pending:
+            self._f.flush()
+            os.fsync(self._f.fileno())
+        self._pending = 0
+
+    def close(self):
+        if self._f is not None:
+            self.sync()
+            self._f.close()
+            self._f = None
+
+    def compact(self, state: dict = None) -> int:
+        """重寫成每個 key 一行（temp 檔 + fsync + os.replace，中途當掉原檔不受影響）"""
+        self.close()
+        if state is None:
+            state = dict(replay(self.path))
+        d = os.path.dirname(self.path) or '.'
+        os.makedirs(d, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=d, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for k, v in state.items():
+                f.write(json.dumps({'k': k, 'v': v}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        return len(state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('cmd', choices=['stats', 'compact'])
+    ap.add_argument('path', help='.jsonl 日誌（或只有舊版 .json 時的 .jsonl 目標路徑）')
+    args = ap.parse_args()
+
+    if not os.path.exists(args.path) and not os.path.exists(legacy_path(args.path) or ''):
+        print(f"找不到 {args.path}")
+        sys.exit(1)
+
+    j = Journal(args.path)
+    if args.cmd == 'compact':
+        before = os.path.getsize(args.path) if os.path.exists(args.path) else 0
+        n = j.compact(j.load())
+        print(f"{args.path}: {n} 筆，{before // 1024} KB → {os.path.getsize(args.path) // 1024} KB")
+        return
+
+    state = j.load()
+    lines = sum(1 for _ in replay(args.path))
+    print(f"{args.path}: {len(state)} 筆，{lines} 行（{lines - len(state)} 行是被覆蓋的舊紀錄），"
+          f"{os.path.getsize(args.path) // 1024} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+OpenRice 原始 HTML 快取（content-addressed，gzip 壓縮）
+
+parser 一改就得重新下載 900+ 頁太浪費：fetch_and_parse 把抓到的 HTML 存在這裡，
+之後 05_rescrape.py --replay 直接從快取重新 parse，完全不打網路。
+
+結構：
+  _rebuild/page_cache/
+  ├── objects/ab/ab12….html.gz   頁面內容，以內容 sha256 命名（內容相同只存一份）
+  └── urls/cd/cd34….json         每個 URL 一個小檔（以 URL sha1 命名）：
+                                 {url, final_url, sha256, fetched_at}
+
+每個 URL 各自一個索引小檔，寫入只動到自己那一筆，不用整份 index 重寫。
+
+用法（檢視快取）:
+  python3 _rebuild/page_cache.py            # 印出筆數、大小
+"""
+import os
+import gzip
+import json
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime
+
+DEFAULT_ROOT = '_rebuild/page_cache'
+
+
+def _atomic_write(path: str, data: bytes):
+    # 暫存檔名要每次唯一：同一頁可能被好幾個抓取執行緒同時寫
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class PageCache:
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = root
+
+    def _object_path(self, sha: str) -> str:
+        return os.path.join(self.root, 'objects', sha[:2], f'{sha}.html.gz')
+
+    def _url_path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, 'urls', key[:2], f'{key}.json')
+
+    def put(self, url: str, html: str, final_url: str = None) -> dict:
+        """存一頁；內容已存在就只更新 URL 索引（fetched_at）"""
+        raw = html.encode('utf-8')
+        sha = hashlib.sha256(raw).hexdigest()
+        obj = self._object_path(sha)
+        if not os.path.exists(obj):
+            _atomic_write(obj, gzip.compress(raw, compresslevel=6))
+        entry = {
+            'url': url,
+            'final_url': final_url or url,
+            'sha256': sha,
+            'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        _atomic_write(self._url_path(url),
+                      json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        return entry
+
+    def get(self, url: str):
+        """回傳 URL 的索引 entry（不含 HTML），沒快取過回傳 None"""
+        p = self._url_path(url)
+        if not os.path.exists(p):
+            return None
+        with open(p, encoding='utf-8') as f:
+            return json.load(f)
+
+    def read(self, entry: dict) -> str:
+        with gzip.open(self._object_path(entry['sha256']), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def load(self, url: str):
+        """直接拿 URL 的 HTML，沒快取過回傳 None"""
+        entry = self.get(url)
+        return self.read(entry) if entry else None
+
+    def entries(self):
+        """逐筆列出所有 URL 索引"""
+        base = os.path.join(self.root, 'urls')
+        if not os.path.isdir(base):
+            return
+        for d in sorted(os.listdir(base)):
+            for name in sorted(os.listdir(os.path.join(base, d))):
+                if name.endswith('.json'):
+                    with open(os.path.join(base, d, name), encoding='utf-8') as f:
+                        yield json.load(f)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--root', default=DEFAULT_ROOT)
+    args = ap.parse_args()
+
+    cache = PageCache(args.root)
+    entries = list(cache.entries())
+    shas = {e['sha256'] for e in entries}
+    size = sum(os.path.getsize(cache._object_path(s)) for s in shas
+               if os.path.exists(cache._object_path(s)))
+    print(f"快取位置: {args.root}")
+    print(f"URL 數: {len(entries)}")
+    print(f"不重複頁面: {len(shas)}（壓縮後 {size // 1024} KB）")
+    if entries:
+        times = sorted(e['fetched_at'] for e in entries)
+        print(f"抓取時間: {times[0]} ~ {times[-1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+重爬排程：每次只爬「最值得爬」的一批，而不是全部或只爬 needs_scrape
+
+每間 enabled 餐廳的分數 = 權重 × 預期過期程度
+- 預期過期程度：把頁面變動當成固定速率 λ（次 / 天）的 Poisson 過程，
+  λ = 觀察到的變動次數 / 觀察天數（兩次檢查之間的天數加總，加先驗平滑），
+  上次成功檢查距今 age 天 → 現在頁面已經跟我們手上資料不同的機率 = 1 - exp(-λ·age)（沒爬過 = 1）
+  每天爬和每月爬的店用同一個單位估，不會因為檢查頻率不同而高估 / 低估
+- 權重：DB 裡已有的訊號
+    needs_scrape        → 最優先（骨架資料）
+    today_status 空白 / 全日休息 → 可能資料缺或已歇業，要確認
+    review_count        → 越熱門越常被抽到，過期代價越高
+    booking_* / bookable → 有訂位導流，資料錯誤代價高
+    缺 opening_hours / budget → 補資料
+
+檢查紀錄存在 05_rescrape.py 的 rescrape.validators.jsonl（journal.py 日誌；每個 or_id：
+checked_at / checks / changes / observed_days，和 conditional GET 的 validators 放在一起）。
+
+用法（預覽排程，不爬）:
+  python3 _rebuild/scheduler.py --budget 100
+實際爬：
+  python3 _rebuild/05_rescrape.py --budget 100
+"""
+import json
+import math
+import argparse
+from datetime import datetime
+from journal import read_state
+
+DEFAULT_DB = 'restaurants_database.json'
+STATE_FILE = '_rebuild/rescrape.validators.jsonl'
+
+# 變動速率的先驗：20 天 1 次 ≈ 每週 30% 機率變動；觀察天數越多，先驗的影響越小
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 20.0
+
+
+def _days_between(earlier: str, now: datetime) -> float:
+    return max(0.0, (now - datetime.fromisoformat(earlier)).total_seconds() / 86400)
+
+
+def record_check(state: dict, or_id: str, validators: dict, changed: bool, now: datetime = None):
+    """05_rescrape.py 每爬完一筆呼叫：更新 validators + 檢查次數 / 變動次數 / 觀察天數"""
+    now = now or datetime.now()
+    prev = state.get(or_id, {})
+    observed = prev.get('checked_at') is not None
+    # 舊格式（沒有 observed_days）的 changes 不知道是多少天內發生的，從這次重新累計
+    carried = 'observed_days' in prev
+    state[or_id] = {
+        **validators,
+        'checked_at': now.isoformat(timespec='seconds'),
+        'checks': prev.get('checks', 0) + 1,
+        # 第一次檢查沒有比較基準：不算變動，也不算觀察天數
+        'changes': (prev.get('changes', 0) if carried else 0) + (1 if observed and changed else 0),
+        'observed_days': round((prev.get('observed_days', 0.0) if carried else 0.0)
+                               + (_days_between(prev['checked_at'], now) if observed else 0.0), 3),
+    }
+
+
+def change_rate(entry: dict) -> float:
+    """每天的變動速率 λ（先驗平滑）"""
+    days = entry.get('observed_days')
+    changes = entry.get('changes', 0) if days is not None else 0
+    return (changes + PRIOR_CHANGES) / ((days or 0.0) + PRIOR_DAYS)
+
+
+def change_probability(entry: dict, now: datetime) -> float:
+    """距上次檢查這段時間內頁面已變動的機率"""
+    if not entry or not entry.get('checked_at'):
+        return 1.0
+    return 1 - math.exp(-change_rate(entry) * _days_between(entry['checked_at'], now))
+
+
+def priority_weight(r: dict) -> float:
+    if r.get('needs_scrape'):
+        return 10.0
+    w = 1.0
+    status = r.get('today_status')
+    if not status:
+        w *= 1.5
+    elif status == '全日休息':
+        w *= 1.3
+    w *= 1 + math.log1p(r.get('review_count') or 0) / math.log1p(100)
+    if r.get('has_booking_offer') or r.get('has_booking_menu'):
+        w *= 1.5
+    elif r.get('bookable'):
+        w *= 1.2
+    if not r.get('opening_hours') or not r.get('budget'):
+        w *= 1.5
+    return w
+
+
+def score(r: dict, state: dict, now: datetime) -> float:
+    return priority_weight(r) * change_probability(state.get(str(r['or_id'])), now)
+
+
+def plan(restaurants: list, state: dict, budget: int, now: datetime = None) -> list:
+    """從有 URL 的 enabled 餐廳挑出分數最高的 budget 間（依分數高→低）"""
+    now = now or datetime.now()
+    candidates = [r for r in restaurants if r.get('enabled') and r.get('url')]
+    ranked = sorted(candidates, key=lambda r: score(r, state, now), reverse=True)
+    return ranked[:budget]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--budget', type=int, default=100, help='這次最多爬幾間')
+    ap.add_argument('--db', default=DEFAULT_DB)
+    ap.add_argument('--state', default=STATE_FILE)
+    ap.add_argument('--show', type=int, default=20, help='列出前幾名')
+    args = ap.parse_args()
+
+    with open(args.db, encoding='utf-8') as f:
+        restaurants = json.load(f)['restaurants']
+    state = read_state(args.state)
+
+    now = datetime.now()
+    chosen = plan(restaurants, state, args.budget, now)
+    never = sum(1 for r in chosen if str(r['or_id']) not in state)
+    print(f"候選: {sum(1 for r in restaurants if r.get('enabled') and r.get('url'))} 間")
+    print(f"這次排程: {len(chosen)} 間（從沒爬過 {never} 間）")
+    for r in chosen[:args.show]:
+        entry = state.get(str(r['or_id']), {})
+        print(f"  {score(r, state, now):6.2f}  or_id={r['or_id']:<7} "
+              f"上次={entry.get('checked_at', '從未')[:10]:<10} "
+              f"變動={entry.get('changes', 0)} 次/{entry.get('observed_days', 0):.0f} 天  {r['name'][:25]}")
+
+
+if __name__ == '__main__':
+    main()
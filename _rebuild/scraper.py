@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 """
 OpenRice 整合 parser：一次抓 cuisine/type/budget/images/opening_hours/dish/coordinates
-模組形式提供，供 rescrape_all.py / find_urls.py 使用
+模組形式提供，供 05_rescrape.py / find_urls.py 使用
+
+每個欄位是一個註冊在 EXTRACTORS 的 extractor（closed / cuisine / budget / hours /
+images / dish / coordinates）。每頁只下載、parse 一次，只跑選到的 extractor，
+取代舊的 update_*_batch.py 每個欄位各打一次 OpenRice 的做法。
 """
 import re
 import json
 import time
 import random
+import asyncio
+import hashlib
 import requests
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
 from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -57,10 +66,12 @@ def parse_day_range(date_txt: str):
     return []
 
 
-def make_session() -> requests.Session:
+def make_session(pool_size: int = 10) -> requests.Session:
     s = requests.Session()
     retry = Retry(total=3, backoff_factor=1.5, status_forcelist=[429, 500, 502, 503, 504])
-    s.mount('https://', HTTPAdapter(max_retries=retry))
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount('https://', adapter)
+    s.mount('http://', adapter)
     s.headers.update({
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -74,18 +85,61 @@ def is_captcha(html: str, final_url: str = '') -> bool:
     return 'captcha' in final_url.lower() or 'OpenRice Captcha' in html or '/fragments/captcha' in html
 
 
-def parse_openrice_page(html: str) -> dict:
-    """從 OpenRice 餐廳頁 HTML 解出所有欄位"""
-    soup = BeautifulSoup(html, 'html.parser')
-    out = {}
+class Page:
+    """單頁 parse 狀態：soup / 全文都是 lazy，只有選到的 extractor 需要時才建一次"""
+
+    def __init__(self, html: str):
+        self.html = html
+        self._soup = None
+        self._text = None
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, 'html.parser')
+        return self._soup
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+
+# 欄位 extractor 註冊表：name → fn(page) -> dict（回傳要寫進結果的欄位）
+# 順序即執行順序，也是 --fields 預設的「全部」
+EXTRACTORS = {}
+
 
-    # 結業偵測
-    text_all = soup.get_text()
-    out['closed'] = any(k in text_all for k in ['已結業', '已歇業', '已停業'])
+def extractor(name: str):
+    def register(fn):
+        EXTRACTORS[name] = fn
+        return fn
+    return register
 
-    # cuisine_style + type
+
+def resolve_fields(spec) -> list:
+    """把 --fields 參數（'budget,hours' 或 list）轉成 extractor 名單；None/空 = 全部"""
+    if not spec:
+        return list(EXTRACTORS)
+    names = [s.strip() for s in spec.split(',')] if isinstance(spec, str) else list(spec)
+    names = [n for n in names if n]
+    unknown = [n for n in names if n not in EXTRACTORS]
+    if unknown:
+        raise ValueError(f"未知欄位 extractor: {', '.join(unknown)}（可用: {', '.join(EXTRACTORS)}）")
+    return names
+
+
+@extractor('closed')
+def extract_closed(page: Page) -> dict:
+    return {'closed': any(k in page.text for k in ['已結業', '已歇業', '已停業'])}
+
+
+@extractor('cuisine')
+def extract_cuisine_and_type(page: Page) -> dict:
+    """cuisine_style + type（順帶判斷 is_buffet）"""
     sec = re.search(r'<div[^>]*class=["\']pdhs-filter-tags-section["\'][^>]*>(.*?)</div>',
-                    html, re.DOTALL | re.IGNORECASE)
+                    page.html, re.DOTALL | re.IGNORECASE)
     cuisines, types = [], []
     if sec:
         sh = sec.group(1)
@@ -99,10 +153,16 @@ def parse_openrice_page(html: str) -> dict:
             txt = re.sub(r'<!--.*?-->', '', m.group(1), flags=re.DOTALL)
             txt = re.sub(r'<[^>]+>', '', txt).strip()
             if txt: types.append(txt)
-    out['cuisine_style'] = list(dict.fromkeys(cuisines))
-    out['type'] = list(dict.fromkeys(types))
+    return {
+        'cuisine_style': list(dict.fromkeys(cuisines)),
+        'type': list(dict.fromkeys(types)),
+        'is_buffet': any(k in (cuisines + types) for k in ['吃到飽', '放題', 'Buffet']),
+    }
+
 
-    # budget
+@extractor('budget')
+def extract_budget(page: Page) -> dict:
+    text_all = page.text
     budget = None
     m = re.search(r'NT\$(\d+)\s*[-~至]\s*(?:NT\$)?(\d+)', text_all)
     if m:
@@ -115,11 +175,18 @@ def parse_openrice_page(html: str) -> dict:
             m = re.search(r'NT\$(\d+)(?!\d)', text_all)
             if m:
                 budget = f"NT${m.group(1)}"
-    out['budget'] = budget
+    return {'budget': budget}
+
+
+@extractor('hours')
+def extract_opening_hours(page: Page) -> dict:
+    return {'opening_hours': hours_from_list(page.soup.select_one('.opening-hours-list'))}
 
-    # opening_hours
+
+def hours_from_list(oh) -> dict:
+    """從 .opening-hours-list 節點解出每天時段；oh 只需支援 select / select_one /
+    find_all / get_text（bs4 Tag 或 fastparse 的 Node 都行）"""
     hours = {d: [] for d in DAYS}
-    oh = soup.select_one('.opening-hours-list')
     if oh:
         for de in oh.select('.opening-hours-day'):
             date_e = de.select_one('.opening-hours-date')
@@ -142,29 +209,41 @@ def parse_openrice_page(html: str) -> dict:
                     if ln: slots.append(ln)
             for dk in day_keys:
                 hours[dk] = slots
-    out['opening_hours'] = hours
+    return hours
+
 
-    # images
+@extractor('images')
+def extract_images(page: Page) -> dict:
     images = []
-    for img in soup.find_all('img'):
+    for img in page.soup.find_all('img'):
         src = img.get('src') or img.get('data-src') or img.get('data-lazy-src') or ''
         if 'orstatic.com' in src and 'userphoto' in src:
             images.append(src)
-    out['images'] = list(dict.fromkeys(images))[:20]
+    return {'images': list(dict.fromkeys(images))[:20]}
 
-    # dish
+
+@extractor('dish')
+def extract_dish(page: Page) -> dict:
     dish = []
     for sel in ['.recommend-dish', '.signature-dish', '.dish-name']:
-        for el in soup.select(sel):
+        for el in page.soup.select(sel):
             t = el.get_text(strip=True)
             if t: dish.append(t)
-    out['dish'] = list(dict.fromkeys(dish))
+    return {'dish': list(dict.fromkeys(dish))}
+
 
-    # coordinates - 從 JSON-LD
+@extractor('coordinates')
+def extract_coordinates(page: Page) -> dict:
+    lds = [ld.string for ld in page.soup.find_all('script', type='application/ld+json')]
+    return {'coordinates': coordinates_from(lds, page.html)}
+
+
+def coordinates_from(ld_jsons: list, html: str):
+    """先找 JSON-LD geo，找不到再用 regex 掃 raw HTML"""
     coords = None
-    for ld in soup.find_all('script', type='application/ld+json'):
+    for ld in ld_jsons:
         try:
-            data = json.loads(ld.string or '{}')
+            data = json.loads(ld or '{}')
             if isinstance(data, dict):
                 geo = data.get('geo') or {}
                 if geo.get('latitude'):
@@ -177,23 +256,85 @@ def parse_openrice_page(html: str) -> dict:
                       html, re.IGNORECASE)
         if m:
             coords = {'lat': float(m.group(1)), 'lng': float(m.group(2))}
-    out['coordinates'] = coords
+    return coords
+
+
+# parser backend：bs4 = BeautifulSoup 建整棵樹（原本的做法）；
+# fast = fastparse.py 的單趟事件 parser，輸出和 bs4 相同（bench_parsers.py 驗證）
+PARSERS = ('bs4', 'fast')
 
-    # is_buffet
-    out['is_buffet'] = any(k in (cuisines + types) for k in ['吃到飽', '放題', 'Buffet'])
 
+def parse_openrice_page(html: str, fields=None, parser: str = 'bs4') -> dict:
+    """從 OpenRice 餐廳頁 HTML 解出欄位
+
+    fields: 要跑的 extractor 名單（見 EXTRACTORS），None = 全部。
+    parser: 'bs4' 或 'fast'（見 PARSERS）
+    同一頁只 parse 一次，各 extractor 共用同一份 soup / 全文。
+    """
+    if parser == 'fast':
+        import fastparse  # fastparse 反過來 import scraper，放這裡避免循環 import
+        return fastparse.parse_openrice_page(html, fields)
+    if parser != 'bs4':
+        raise ValueError(f"未知 parser: {parser}（可用: {', '.join(PARSERS)}）")
+    page = Page(html)
+    out = {}
+    for name in resolve_fields(fields):
+        out.update(EXTRACTORS[name](page))
     return out
 
 
-def fetch_and_parse(session: requests.Session, url: str, retries: int = 2) -> dict:
-    """打 URL → 偵測 captcha → parse；遇 captcha 拋例外停下"""
+# 指紋計算前先拿掉的「每次載入都會變」的部分：一般 script（JSON-LD 有座標，保留）、
+# style、HTML 註解、hidden input / meta（csrf token 之類）
+_VOLATILE_RE = re.compile(
+    r'<script(?![^>]*ld\+json)[^>]*>.*?</script>'
+    r'|<style[^>]*>.*?</style>'
+    r'|<!--.*?-->'
+    r'|<input[^>]*type=["\']hidden["\'][^>]*>'
+    r'|<meta[^>]*>',
+    re.DOTALL | re.IGNORECASE)
+
+
+def page_fingerprint(html: str) -> str:
+    """正規化後的內容指紋：去掉易變區塊、壓掉空白差異後 sha256"""
+    norm = _VOLATILE_RE.sub('', html)
+    norm = re.sub(r'\s+', ' ', norm).strip()
+    return hashlib.sha256(norm.encode('utf-8')).hexdigest()
+
+
+def fetch_page(session: requests.Session, url: str, retries: int = 2, cache=None,
+               validators=None) -> dict:
+    """IO 階段：打 URL → 偵測 captcha → 存快取 → 比對 validators，不 parse；遇 captcha 拋例外
+
+    cache: page_cache.PageCache，有給就把原始 HTML 存起來（captcha 頁不存），供 --replay 重 parse
+    validators: 上次的 {etag, last_modified, fingerprint}。有給就送 conditional GET，
+        回 304 或內容指紋沒變 → 回傳 {'ok': True, 'unchanged': True, ...}（不帶 html）
+    需要 parse 的頁面回傳 {'ok': True, 'final_url', 'validators', 'html'}
+    """
+    validators = validators or {}
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
     for attempt in range(retries + 1):
         try:
-            r = session.get(url, timeout=20)
+            r = session.get(url, timeout=20, headers=headers)
+            if r.status_code == 304:
+                return {'ok': True, 'unchanged': True, 'final_url': r.url, 'validators': validators}
             r.raise_for_status()
             if is_captcha(r.text, r.url):
                 raise CaptchaError(f"被 Captcha 擋: {r.url}")
-            return {**parse_openrice_page(r.text), 'final_url': r.url, 'ok': True}
+            if cache is not None:
+                cache.put(url, r.text, r.url)
+            new_validators = {
+                'etag': r.headers.get('ETag'),
+                'last_modified': r.headers.get('Last-Modified'),
+                'fingerprint': page_fingerprint(r.text),
+            }
+            if validators.get('fingerprint') == new_validators['fingerprint']:
+                return {'ok': True, 'unchanged': True, 'final_url': r.url,
+                        'validators': new_validators}
+            return {'final_url': r.url, 'ok': True, 'validators': new_validators, 'html': r.text}
         except CaptchaError:
             raise
         except requests.RequestException as e:
@@ -204,6 +345,47 @@ def fetch_and_parse(session: requests.Session, url: str, retries: int = 2) -> di
     return {'ok': False, 'error': 'unknown'}
 
 
+def fetch_and_parse(session: requests.Session, url: str, retries: int = 2, fields=None,
+                    cache=None, validators=None, parser: str = 'bs4') -> dict:
+    """fetch_page + parse（只跑 fields 指定的 extractor，用 parser backend）；參數見 fetch_page
+
+    結果都會帶 'validators'（這次的 ETag / Last-Modified / 指紋）供下次使用
+    """
+    page = fetch_page(session, url, retries, cache=cache, validators=validators)
+    return finish_page(page, fields, parser=parser)
+
+
+def finish_page(page: dict, fields=None, parsed: dict = None, parser: str = 'bs4') -> dict:
+    """把 fetch_page 的結果換成最終結果：拿掉 html，換成 parse 出的欄位"""
+    html = page.pop('html', None)
+    if html is None:
+        return page
+    if parsed is None:
+        parsed = parse_openrice_page(html, fields, parser)
+    return {**parsed, **page}
+
+
+def parse_many(htmls, fields=None, workers: int = 0, window: int = None, parser: str = 'bs4'):
+    """依序 parse 一串 HTML（generator，輸出順序 = 輸入順序）
+
+    workers > 0 時丟到 process pool 平行 parse（BeautifulSoup 是 CPU-bound，執行緒會被 GIL 卡住）；
+    最多 window 頁同時在 pool 裡，避免整批 HTML 一次讀進記憶體。
+    """
+    if workers <= 0:
+        for html in htmls:
+            yield parse_openrice_page(html, fields, parser)
+        return
+    window = window or workers * 2
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for html in htmls:
+            pending.append(pool.submit(parse_openrice_page, html, fields, parser))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 class CaptchaError(Exception):
     """被 OpenRice Captcha 擋下時拋出"""
     pass
@@ -212,3 +394,129 @@ class CaptchaError(Exception):
 def sleep_jitter(base: float = 3.0, jitter: float = 2.0):
     """隨機延遲，避免被反爬蟲"""
     time.sleep(base + random.random() * jitter)
+
+
+class TokenBucket:
+    """Token bucket：平均每秒 rate 個請求，最多累積 burst 個（瞬間可連發的量）"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError('rate 必須 > 0')
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """每個 host 各自一個 TokenBucket（tw.openrice.com 和圖片 CDN 互不影響）"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+
+    async def acquire(self, url: str):
+        host = urlsplit(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.rate, self.burst)
+        await self.buckets[host].acquire()
+
+
+async def crawl(session: requests.Session, items, on_result, rate: float = 0.25,
+                burst: int = 1, concurrency: int = 2, fields=None, cache=None,
+                validators=None, parse_workers: int = 0, queue_size: int = None,
+                parser: str = 'bs4'):
+    """asyncio 爬取引擎：per-host token bucket 配速 + 最多 concurrency 個請求同時在飛
+
+    items: [(key, url), ...]；每筆完成就呼叫 on_result(key, result)（在 event loop 執行緒，
+    不用加鎖）。requests 是同步的，實際 HTTP 用 asyncio.to_thread 丟到執行緒跑。
+    validators: {key: 上次的 validators}，有的話送 conditional GET（見 fetch_page）
+
+    parse_workers > 0：pipeline 模式。fetcher 只做 IO，把原始 HTML 丟進有上限的
+    queue（queue_size，預設 parse_workers * 2），由 process pool 平行 parse；
+    parse 慢時 fetcher 會在 queue 滿時等待，不會無限堆 HTML。
+    parse_workers = 0：在 fetch 的執行緒裡直接 parse（單頁延遲最低，適合小批量）。
+
+    遇 CaptchaError：不再派新請求，等在飛的請求和已抓到的頁面收尾（結果照樣 on_result），
+    然後把 CaptchaError 拋給呼叫端存進度。
+    """
+    limiter = HostRateLimiter(rate, burst)
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    stop = asyncio.Event()
+    captcha = []
+    validators = validators or {}
+    pipeline = parse_workers > 0
+    parse_q = asyncio.Queue(maxsize=queue_size or parse_workers * 2) if pipeline else None
+
+    async def fetcher():
+        while not stop.is_set():
+            try:
+                key, url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await limiter.acquire(url)
+            if stop.is_set():
+                return
+            try:
+                if pipeline:
+                    page = await asyncio.to_thread(fetch_page, session, url, cache=cache,
+                                                   validators=validators.get(key))
+                else:
+                    result = await asyncio.to_thread(fetch_and_parse, session, url,
+                                                    fields=fields, cache=cache,
+                                                    validators=validators.get(key),
+                                                    parser=parser)
+            except CaptchaError as e:
+                captcha.append(e)
+                stop.set()
+                return
+            if not pipeline:
+                on_result(key, result)
+            elif 'html' in page:
+                await parse_q.put((key, page))
+            else:
+                on_result(key, page)
+
+    async def parse_worker(pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await parse_q.get()
+            if item is None:
+                return
+            key, page = item
+            try:
+                parsed = await loop.run_in_executor(pool, parse_openrice_page, page['html'],
+                                                    fields, parser)
+            except Exception as e:
+                # 單頁 parse 壞掉不能讓 parser 消失，不然 fetcher 會卡在滿的 queue
+                on_result(key, {'ok': False, 'error': f'parse: {type(e).__name__}: {e}'})
+                continue
+            on_result(key, finish_page(page, fields, parsed, parser))
+
+    fetchers = [fetcher() for _ in range(max(1, concurrency))]
+    if not pipeline:
+        await asyncio.gather(*fetchers)
+    else:
+        with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+            parsers = [asyncio.ensure_future(parse_worker(pool)) for _ in range(parse_workers)]
+            await asyncio.gather(*fetchers)
+            for _ in parsers:
+                await parse_q.put(None)
+            await asyncio.gather(*parsers)
+    if captcha:
+        raise captcha[0]
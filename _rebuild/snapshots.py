@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+內容定址的 DB snapshot（取代 shutil.copy 整份備份）
+
+原本 08_split_and_deploy.py 每次都把主檔和 netlify 副本整份複製到 _rebuild/backups/，
+根目錄也放著 restaurants_database_backup.json 這種整份副本。這裡：
+- 每間餐廳序列化成一個 object，用內容的 sha256 命名：_rebuild/snapshots/objects/ab/cdef….json
+  同樣內容只存一次 → 一次備份的成本 ≈ 這次改了幾間
+- 一個 snapshot 是一份 manifest（_rebuild/snapshots/index/<id>.json）：依序列出每間餐廳的
+  (or_id, object hash)、restaurants 以外的頂層欄位（_metadata），以及原檔的 sha256
+- restore 依 manifest 組回來，驗證 sha256 和存的時候一樣才寫（原檔不是 dbwriter 的格式時，
+  另外存一份原始 bytes 當 object，照樣逐 byte 還原）
+- diff 兩個 snapshot 時 object hash 一樣的直接跳過，只讀有變的 object
+
+用法:
+  python3 _rebuild/snapshots.py save restaurants_database.json --label before-merge
+  python3 _rebuild/snapshots.py list
+  python3 _rebuild/snapshots.py diff 20260601_120000 latest              # 也可以直接給 JSON 檔路徑
+  python3 _rebuild/snapshots.py restore latest --out restaurants_database.json
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from collections import Counter
+from dbwriter import dumps_db, atomic_write, write_bytes
+from diff import field_changes, record_key, Summary
+
+SNAPSHOT_DIR = '_rebuild/snapshots'
+KEY = 'or_id'
+
+
+class SnapshotError(Exception):
+    """找不到 snapshot / object 遺失 / 還原結果和原檔 hash 不符"""
+
+
+def encode_record(r) -> bytes:
+    return json.dumps(r, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _sha256(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+class SnapshotStore:
+
+    def __init__(self, root: str = SNAPSHOT_DIR):
+        self.root = root
+        self.objects = os.path.join(root, 'objects')
+        self.index = os.path.join(root, 'index')
+
+    # ---- object ----
+    def _object_path(self, h: str) -> str:
+        return os.path.join(self.objects, h[:2], h[2:] + '.json')
+
+    def put(self, payload: bytes) -> tuple:
+        """存一個 object；回傳 (hash, 這次新寫了幾 bytes)"""
+        h = _sha256(payload)
+        path = self._object_path(h)
+        if os.path.exists(path):
+            return h, 0
+        atomic_write(path, payload)
+        return h, len(payload)
+
+    def get(self, h: str) -> bytes:
+        try:
+            with open(self._object_path(h), 'rb') as f:
+                payload = f.read()
+        except FileNotFoundError:
+            raise SnapshotError(f"object {h[:12]} 遺失")
+        if _sha256(payload) != h:
+            raise SnapshotError(f"object {h[:12]} 內容和 hash 不符（檔案損壞？）")
+        return payload
+
+    # ---- snapshot ----
+    def save(self, data: dict, label: str = '', source: str = None, raw: bytes = None,
+             key: str = KEY) -> dict:
+        """存一個 snapshot；raw = 原檔 bytes（用來判斷能不能從 records 逐 byte 重建）"""
+        created = datetime.now()
+        records, new_objects, new_bytes = [], 0, 0
+        for r in data['restaurants']:
+            h, written = self.put(encode_record(r))
+            records.append([record_key(r, key), h])
+            new_objects += bool(written)
+            new_bytes += written
+        canonical = dumps_db(data).encode('utf-8')
+        raw = canonical if raw is None else raw
+        raw_object = None
+        if raw != canonical:
+            raw_object, written = self.put(raw)
+            new_objects += bool(written)
+            new_bytes += written
+        sid = created.strftime('%Y%m%d_%H%M%S_%f')
+        if label:
+            sid += '-' + ''.join(c if c.isalnum() or c in '-_' else '_' for c in label)
+        manifest = {
+            'id': sid,
+            'label': label,
+            'created': created.isoformat(timespec='seconds'),
+            'source': source,
+            'sha256': _sha256(raw),
+            'bytes': len(raw),
+            'raw_object': raw_object,
+            'key': key,
+            'layout': list(data),
+            'top': {k: v for k, v in data.items() if k != 'restaurants'},
+            'count': len(records),
+            'new_objects': new_objects,
+            'new_bytes': new_bytes,
+            'records': records,
+        }
+        atomic_write(os.path.join(self.index, sid + '.json'),
+                     json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        return manifest
+
+    def save_file(self, path: str, label: str = '') -> dict:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return self.save(json.loads(raw), label=label, source=path, raw=raw)
+
+    def ids(self) -> list:
+        if not os.path.isdir(self.index):
+            return []
+        return sorted(n[:-5] for n in os.listdir(self.index) if n.endswith('.json'))
+
+    def manifest(self, ref: str) -> dict:
+        """ref：完整 id、唯一的 id 前綴、'latest'，或 label（取最新一個）"""
+        ids = self.ids()
+        if ref == 'latest':
+            matches = ids[-1:]
+        else:
+            matches = [i for i in ids if i == ref] or [i for i in ids if i.startswith(ref)]
+            if not matches:
+                labelled = [i for i in ids if i.endswith('-' + ref)]
+                matches = labelled[-1:]
+        if len(matches) != 1:
+            raise SnapshotError(f"找不到 snapshot {ref!r}" if not matches
+                                else f"{ref!r} 對到 {len(matches)} 個 snapshot，請給更長的 id")
+        with open(os.path.join(self.index, matches[0] + '.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def materialize(self, manifest: dict) -> bytes:
+        """組回原檔 bytes，並驗證 sha256"""
+        if manifest['raw_object']:
+            payload = self.get(manifest['raw_object'])
+        else:
+            restaurants = [json.loads(self.get(h)) for _, h in manifest['records']]
+            data = {k: restaurants if k == 'restaurants' else manifest['top'][k] for k in manifest['layout']}
+            payload = dumps_db(data).encode('utf-8')
+        if _sha256(payload) != manifest['sha256']:
+            raise SnapshotError(f"{manifest['id']} 還原結果的 sha256 和存的時候不同")
+        return payload
+
+    def load_record(self, h: str) -> dict:
+        return json.loads(self.get(h))
+
+
+def save_snapshot(path: str, label: str = '', root: str = SNAPSHOT_DIR) -> dict:
+    """給其他腳本用：覆蓋 path 之前先存 snapshot（檔案不存在回傳 None）"""
+    if not os.path.exists(path):
+        return None
+    m = SnapshotStore(root).save_file(path, label)
+    print(f"📦 snapshot {m['id']}：{path}（{m['count']} 筆，新 object {m['new_objects']} 個 / "
+          f"{m['new_bytes'] / 1024:.1f}KB）")
+    return m
+
+
+def _side(store: SnapshotStore, ref: str, key: str):
+    """diff 的一邊：回傳 ([(key, hash)], {hash: record})；ref 可以是 snapshot 或 JSON 檔"""
+    if os.path.isfile(ref):
+        with open(ref, encoding='utf-8') as f:
+            restaurants = json.load(f)['restaurants']
+        pairs, loaded = [], {}
+        for r in restaurants:
+            h = _sha256(encode_record(r))
+            pairs.append((record_key(r, key), h))
+            loaded[h] = r
+        return pairs, loaded
+    return [tuple(p) for p in store.manifest(ref)['records']], {}
+
+
+def diff_refs(store: SnapshotStore, a: str, b: str, key: str = KEY, stats: Counter = None):
+    """兩個 snapshot（或檔案）的 changeset（格式同 diff.diff_snapshots）；object hash 相同的不讀"""
+    stats = stats if stats is not None else Counter()
+    a_pairs, a_loaded = _side(store, a, key)
+    b_pairs, b_loaded = _side(store, b, key)
+    stats.update(old=len(a_pairs), new=len(b_pairs), partitions=1)
+
+    def load(h, loaded):
+        return loaded[h] if h in loaded else store.load_record(h)
+
+    yield {'op': 'header', 'format': 1, 'key': key, 'old': {'ref': a}, 'new': {'ref': b}}
+    old = {}
+    for k, h in a_pairs:
+        stats['duplicate_old'] += k in old
+        old[k] = h
+    seen = set()
+    for k, h in b_pairs:
+        if k in seen:
+            stats['duplicate_new'] += 1
+            continue
+        seen.add(k)
+        before = old.pop(k, None)
+        if before is None:
+            yield {'op': 'add', key: k, 'record': load(h, b_loaded)}
+            continue
+        fields = field_changes(load(before, a_loaded), load(h, b_loaded)) if before != h else None
+        if fields:
+            yield {'op': 'modify', key: k, 'name': load(h, b_loaded).get('name'), 'fields': fields}
+        else:
+            stats['unchanged'] += 1
+    for k, h in old.items():
+        yield {'op': 'remove', key: k, 'record': load(h, a_loaded)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--dir', default=SNAPSHOT_DIR)
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p = sub.add_parser('save', help='存一個 snapshot')
+    p.add_argument('path', nargs='?', default='restaurants_database.json')
+    p.add_argument('--label', default='')
+    sub.add_parser('list', help='列出所有 snapshot')
+    p = sub.add_parser('diff', help='比較兩個 snapshot（或 JSON 檔）')
+    p.add_argument('a')
+    p.add_argument('b', nargs='?', default='restaurants_database.json')
+    p.add_argument('--out', help='changeset 寫到這裡（JSONL）')
+    p.add_argument('--samples', type=int, default=10)
+    p = sub.add_parser('restore', help='還原 snapshot')
+    p.add_argument('ref')
+    p.add_argument('--out', help='寫到哪裡（預設：存 snapshot 時的來源路徑）')
+    args = ap.parse_args()
+    store = SnapshotStore(args.dir)
+
+    if args.cmd == 'save':
+        save_snapshot(args.path, args.label, args.dir)
+    elif args.cmd == 'list':
+        ids = store.ids()
+        if not ids:
+            print(f"{args.dir} 還沒有 snapshot")
+        for sid in ids:
+            m = store.manifest(sid)
+            print(f"{sid:<48} {m['count']:>6} 筆  新 object {m['new_objects']:>5} 個 "
+                  f"{m['new_bytes'] / 1024:>8.1f}KB  {m['source'] or ''}")
+    elif args.cmd == 'diff':
+        summary = Summary(args.samples)
+        stats = Counter()
+        out = open(args.out, 'w', encoding='utf-8') if args.out else None
+        try:
+            for change in diff_refs(store, args.a, args.b, stats=stats):
+                summary.add(change)
+                if out:
+                    out.write(json.dumps(change, ensure_ascii=False) + '\n')
+        finally:
+            if out:
+                out.close()
+        print(f"{args.a} → {args.b}")
+        summary.print(stats)
+    elif args.cmd == 'restore':
+        m = store.manifest(args.ref)
+        out = args.out or m['source']
+        if not out:
+            raise SnapshotError('這個 snapshot 沒有記來源路徑，請給 --out')
+        written = write_bytes(store.materialize(m), [out])
+        print(f"{'已還原' if written[out] else '內容相同，略過'} {m['id']} → {out}（sha256 已驗證）")
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (SnapshotError, OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+餐廳營業狀態檢查（已結業 / 404）— 取代根目錄的
+check_closed_restaurants.py / check_all_restaurants.py / check_closed_quick.py
+
+舊腳本每間店都序列下載整頁（1.4MB+）、sleep 0.5–1 秒，再對全文找「已結業」。
+這裡：
+- stream 讀 body，一看到結業字樣就停；OpenRice 的結業標記在頁頭店名旁
+  （<span class="pdhs-status-text">(已結業)</span>，約第 25KB），頁頭結束
+  （pdhs-action-box）都沒出現就判定營業中、不讀剩下的 98%
+- 404 / 410 看 status code 就回，不讀 body
+- 找不到頁頭結尾（版面改了）才讀完整頁，用和 05 一樣的 extract_closed 判斷
+- 共用連線池的 session + asyncio，per-host token bucket 配速（同 05_rescrape.py）
+- 遇 Captcha 停止派新請求，已檢查的照樣寫出
+
+輸出格式同舊腳本的 restaurant_status_check.json（update_restaurant_database.py 直接吃）：
+  {closed_restaurants, error_404_restaurants, error_other_restaurants, summary}
+
+用法:
+  python3 _rebuild/status_check.py                     # 檢查全部 enabled 餐廳
+  python3 _rebuild/status_check.py --no-budget         # 只檢查 budget 為 null 的（舊腳本的範圍）
+  python3 _rebuild/status_check.py --rate 2 --concurrency 6 --limit 50
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import requests
+from scraper import make_session, HostRateLimiter, CaptchaError, Page, extract_closed
+
+DEFAULT_DB = 'restaurants_database.json'
+OUT_FILE = 'restaurant_status_check.json'
+
+CLOSED_MARKERS = [k.encode('utf-8') for k in ('已結業', '已歇業', '已停業')]
+CAPTCHA_MARKERS = [b'OpenRice Captcha', b'/fragments/captcha']
+# 頁頭（店名 + 狀態）之後的第一個區塊，讀到這裡還沒有結業字樣 = 營業中
+HEADER_END = b'pdhs-action-box'
+# chunk 之間保留的重疊，避免標記剛好被切在兩個 chunk 中間
+OVERLAP = max(len(m) for m in CLOSED_MARKERS + CAPTCHA_MARKERS + [HEADER_END]) - 1
+CHUNK_SIZE = 16 * 1024
+
+
+def check_status(session: requests.Session, url: str, timeout: int = 15) -> dict:
+    """回傳 {'status': 'closed' | 'normal' | '404' | 'error', 'bytes': 讀了多少, 'error'?}；
+    遇 captcha 拋 CaptchaError"""
+    try:
+        with session.get(url, stream=True, timeout=timeout) as r:
+            if 'captcha' in r.url.lower():
+                raise CaptchaError(f"被 Captcha 擋: {r.url}")
+            if r.status_code in (404, 410):
+                return {'status': '404', 'bytes': 0}
+            r.raise_for_status()
+            buf = bytearray()
+            for chunk in r.iter_content(CHUNK_SIZE):
+                start = max(0, len(buf) - OVERLAP)
+                buf += chunk
+                window = bytes(buf[start:])
+                if any(m in window for m in CAPTCHA_MARKERS):
+                    raise CaptchaError(f"被 Captcha 擋: {r.url}")
+                end = window.find(HEADER_END)
+                head = window if end < 0 else window[:end]
+                if any(m in head for m in CLOSED_MARKERS):
+                    return {'status': 'closed', 'bytes': len(buf)}
+                if end >= 0:
+                    return {'status': 'normal', 'bytes': len(buf)}
+            # 沒看到頁頭結尾：整頁都讀了，改用全文判斷（同 05 的 closed extractor）
+            page = Page(buf.decode('utf-8', errors='replace'))
+            closed = extract_closed(page)['closed']
+            return {'status': 'closed' if closed else 'normal', 'bytes': len(buf)}
+    except CaptchaError:
+        raise
+    except requests.HTTPError as e:
+        return {'status': 'error', 'error': f"HTTP {e.response.status_code}", 'bytes': 0}
+    except requests.RequestException as e:
+        return {'status': 'error', 'error': str(e), 'bytes': 0}
+
+
+async def sweep(session: requests.Session, items, on_result, rate: float = 1.0, burst: int = 1,
+                concurrency: int = 4):
+    """items: [(key, url)]；每筆檢查完呼叫 on_result(key, result)（event loop 執行緒）"""
+    limiter = HostRateLimiter(rate, burst)
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait(item)
+    stop = asyncio.Event()
+    captcha = []
+
+    async def worker():
+        while not stop.is_set():
+            try:
+                key, url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await limiter.acquire(url)
+            if stop.is_set():
+                return
+            try:
+                result = await asyncio.to_thread(check_status, session, url)
+            except CaptchaError as e:
+                captcha.append(e)
+                stop.set()
+                return
+            on_result(key, result)
+
+    await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    if captcha:
+        raise captcha[0]
+
+
+def build_report(restaurants: list, results: dict) -> dict:
+    """組成 restaurant_status_check.json 的格式（沒 URL 的算 error_other）"""
+    closed, e404, other = [], [], []
+    normal = 0
+    for i, r in enumerate(restaurants):
+        entry = {'name': r['name'], 'address': r.get('address'), 'url': r.get('url')}
+        if not r.get('url'):
+            other.append({**entry, 'error': '無URL'})
+            continue
+        res = results.get(i)
+        if res is None:
+            continue  # captcha 中斷，沒檢查到
+        if res['status'] == 'closed':
+            closed.append(entry)
+        elif res['status'] == '404':
+            e404.append(entry)
+        elif res['status'] == 'error':
+            other.append({**entry, 'error': res.get('error', '未知錯誤')})
+        else:
+            normal += 1
+    return {
+        'closed_restaurants': closed,
+        'error_404_restaurants': e404,
+        'error_other_restaurants': other,
+        'summary': {
+            'total': normal + len(closed) + len(e404) + len(other),
+            'normal': normal,
+            'closed': len(closed),
+            'error_404': len(e404),
+            'error_other': len(other),
+        },
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--db', default=DEFAULT_DB)
+    ap.add_argument('--out', default=OUT_FILE, help='結果檔（update_restaurant_database.py 讀這個）')
+    ap.add_argument('--no-budget', action='store_true', help='只檢查 budget 為 null 的餐廳')
+    ap.add_argument('--all', action='store_true', help='連 enabled=false 的也檢查')
+    ap.add_argument('--limit', type=int, default=None)
+    ap.add_argument('--rate', type=float, default=1.0, help='每個 host 每秒請求數（預設 1）')
+    ap.add_argument('--burst', type=int, default=1)
+    ap.add_argument('--concurrency', type=int, default=4, help='同時在飛的請求上限')
+    args = ap.parse_args()
+
+    with open(args.db, encoding='utf-8') as f:
+        restaurants = json.load(f)['restaurants']
+    if not args.all:
+        restaurants = [r for r in restaurants if r.get('enabled', True)]
+    if args.no_budget:
+        restaurants = [r for r in restaurants if r.get('budget') is None]
+    if args.limit:
+        restaurants = restaurants[:args.limit]
+
+    items = [(i, r['url']) for i, r in enumerate(restaurants) if r.get('url')]
+    print(f"檢查 {len(items)} 間（無 URL {len(restaurants) - len(items)} 間），"
+          f"每個 host 每秒 {args.rate} 筆，同時最多 {args.concurrency} 筆")
+
+    results = {}
+    total_bytes = [0]
+    started = time.perf_counter()
+    labels = {'closed': '⚠️  已結業', 'normal': '✓ 正常', '404': '❌ URL失效(404)'}
+
+    def on_result(i, res):
+        results[i] = res
+        total_bytes[0] += res['bytes']
+        label = labels.get(res['status']) or f"❌ 檢查失敗: {res.get('error')}"
+        print(f"[{len(results)}/{len(items)}] {restaurants[i]['name'][:40]}  {label}  "
+              f"({res['bytes'] // 1024}KB)")
+
+    session = make_session(pool_size=max(10, args.concurrency))
+    interrupted = False
+    try:
+        asyncio.run(sweep(session, items, on_result, rate=args.rate, burst=args.burst,
+                          concurrency=args.concurrency))
+    except CaptchaError as e:
+        print(f"\n❌ 被 Captcha 擋住: {e}（已檢查的 {len(results)} 間照樣寫出）")
+        interrupted = True
+    except KeyboardInterrupt:
+        print("\n中斷，寫出已檢查的結果")
+        interrupted = True
+
+    report = build_report(restaurants, results)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    s = report['summary']
+    elapsed = time.perf_counter() - started
+    print(f"\n完成 {len(results)} 間，用時 {elapsed:.1f}s，共讀 {total_bytes[0] / 1024 / 1024:.1f} MB")
+    print(f"正常 {s['normal']} | 已結業 {s['closed']} | 404 {s['error_404']} | 其他錯誤 {s['error_other']}")
+    print(f"結果存在 {args.out}，確認後跑 update_restaurant_database.py 移除")
+    if interrupted:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
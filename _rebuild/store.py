@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+SQLite 版主 DB（以 or_id 為 key），取代各腳本「整份 json.load → 改幾個欄位 → 整份 json.dump」
+
+restaurants_database.json 有 2.6MB，06 / 10–13 / generate_slogans 每支都整份讀進來、
+改幾十筆、再 indent=2 整份寫回（netlify 副本再寫一次）。兩支腳本同時跑，後寫的會把
+先寫的改動整份蓋掉。改成：
+- 每筆餐廳一列（doc 欄放整筆 JSON），city / district / enabled / bookable 拉成有 index 的欄位
+- 改欄位 = 讀一列、寫一列；每次寫都在 BEGIN IMMEDIATE 交易裡，多支腳本同時跑會排隊而不是互蓋
+- JSON 仍是給前端 / Netlify / git 的正式格式：export() 依原本順序寫出和今天一模一樣的檔案
+- 開啟時比對 restaurants_database.json 的 sha256：JSON 在外面被改過（git pull、手動編輯）
+  就自動重新匯入；但 store 裡還有沒 export 的改動時拒絕覆蓋（StoreConflict），要人決定
+
+restaurants.sqlite 可以隨時從 JSON 重建，不進 git。
+
+用法:
+  python3 _rebuild/store.py stats
+  python3 _rebuild/store.py export    # 各腳本用 --no-export 批次改完後，一次寫出 JSON
+  python3 _rebuild/store.py import    # 丟掉 store 的改動，從 JSON 重建
+  python3 _rebuild/store.py selfcheck # 在暫存目錄跑一遍「--no-export 改動 → export 到別的檔 → 重開」不會丟改動
+"""
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+from contextlib import contextmanager
+from dbwriter import dumps_db, write_bytes, report
+from delta import record as record_delta
+
+STORE_PATH = '_rebuild/restaurants.sqlite'
+MAIN_DB = 'restaurants_database.json'
+NETLIFY_DB = 'netlify/functions/restaurants_database.json'
+
+# 拉出來建 index 的欄位（select() 只能用這些過濾）
+INDEXED = ('city', 'district', 'enabled', 'bookable')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS restaurants (
+    or_id    INTEGER PRIMARY KEY,
+    pos      INTEGER NOT NULL,
+    city     TEXT,
+    district TEXT,
+    enabled  INTEGER,
+    bookable INTEGER,
+    doc      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_restaurants_pos ON restaurants(pos);
+CREATE INDEX IF NOT EXISTS idx_restaurants_city ON restaurants(city);
+CREATE INDEX IF NOT EXISTS idx_restaurants_district ON restaurants(district);
+CREATE INDEX IF NOT EXISTS idx_restaurants_enabled ON restaurants(enabled);
+CREATE INDEX IF NOT EXISTS idx_restaurants_bookable ON restaurants(bookable);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class StoreConflict(Exception):
+    """JSON 在外面被改過，store 裡又有還沒 export 的改動"""
+
+
+def file_sha256(path: str):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _bool_col(v):
+    return None if v is None else int(bool(v))
+
+
+class Store:
+    def __init__(self, path: str = STORE_PATH, source: str = MAIN_DB):
+        self.path = path
+        self.source = source
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # isolation_level=None：交易自己用 BEGIN IMMEDIATE 管，不讓 sqlite3 模組偷開
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self._depth = 0
+        self._changed = False
+
+    # --- 交易 ---
+    @contextmanager
+    def transaction(self):
+        """寫入交易；可以巢狀（只有最外層真的 BEGIN / COMMIT）。
+        BEGIN IMMEDIATE 一開始就拿寫鎖，另一支腳本同時寫會等，不會讀到舊值再蓋回去"""
+        if self._depth:
+            self._depth += 1
+            try:
+                yield self
+            finally:
+                self._depth -= 1
+            return
+        self.db.execute('BEGIN IMMEDIATE')
+        self._depth, self._changed = 1, False
+        try:
+            yield self
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        else:
+            if self._changed:
+                self._bump_version()
+            self.db.execute('COMMIT')
+        finally:
+            self._depth = 0
+
+    def _get_meta(self, key: str, default=None):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def _set_meta(self, key: str, value):
+        self.db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                        (key, json.dumps(value, ensure_ascii=False)))
+
+    def _bump_version(self):
+        self._set_meta('version', self._get_meta('version', 0) + 1)
+
+    @property
+    def dirty(self) -> bool:
+        """有沒有還沒 export 成 JSON 的改動"""
+        return self._get_meta('version', 0) != self._get_meta('exported_version', 0)
+
+    # --- 讀 ---
+    def get(self, or_id):
+        row = self.db.execute('SELECT doc FROM restaurants WHERE or_id = ?', (int(or_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _where(filters: dict) -> tuple:
+        where, params = [], []
+        for k, v in filters.items():
+            if k not in INDEXED:
+                raise ValueError(f"不能用 {k} 過濾（可用: {', '.join(INDEXED)}）")
+            if v is None:
+                where.append(f'{k} IS NULL')
+                continue
+            where.append(f'{k} = ?')
+            params.append(_bool_col(v) if k in ('enabled', 'bookable') else v)
+        return (' WHERE ' + ' AND '.join(where) if where else ''), params
+
+    def select(self, **filters) -> list:
+        """依原本順序回傳餐廳，可用 INDEXED 欄位過濾，例：select(enabled=True, city='台北市')"""
+        where, params = self._where(filters)
+        return [json.loads(doc) for (doc,) in
+                self.db.execute(f'SELECT doc FROM restaurants{where} ORDER BY pos', params)]
+
+    def ids(self) -> set:
+        return {or_id for (or_id,) in self.db.execute('SELECT or_id FROM restaurants')}
+
+    def count(self, **filters) -> int:
+        where, params = self._where(filters)
+        return self.db.execute(f'SELECT COUNT(*) FROM restaurants{where}', params).fetchone()[0]
+
+    @property
+    def metadata(self) -> dict:
+        return self._get_meta('metadata', {})
+
+    def to_json(self) -> dict:
+        return {'restaurants': self.select(), '_metadata': self.metadata}
+
+    # --- 寫 ---
+    def _write(self, doc: dict, pos: int):
+        self._changed = True
+        self.db.execute(
+            'INSERT OR REPLACE INTO restaurants (or_id, pos, city, district, enabled, bookable, doc) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (int(doc['or_id']), pos, doc.get('city'), doc.get('district'),
+             _bool_col(doc.get('enabled')), _bool_col(doc.get('bookable')),
+             json.dumps(doc, ensure_ascii=False)))
+
+    def update(self, or_id, fields: dict = None, remove=()) -> bool:
+        """改一筆的部分欄位（fields 設值、remove 刪掉），有變才寫；回傳是否有變。
+        找不到 or_id 拋 KeyError"""
+        with self.transaction():
+            row = self.db.execute('SELECT pos, doc FROM restaurants WHERE or_id = ?',
+                                  (int(or_id),)).fetchone()
+            if row is None:
+                raise KeyError(or_id)
+            pos, raw = row
+            doc = json.loads(raw)
+            before = dict(doc)
+            doc.update(fields or {})
+            for k in remove:
+                doc.pop(k, None)
+            if doc == before and list(doc) == list(before):
+                return False
+            self._write(doc, pos)
+            return True
+
+    def upsert(self, doc: dict):
+        """整筆寫入；已存在的保留原本順序，新的排在最後"""
+        with self.transaction():
+            row = self.db.execute('SELECT pos FROM restaurants WHERE or_id = ?',
+                                  (int(doc['or_id']),)).fetchone()
+            if row is None:
+                row = self.db.execute('SELECT COALESCE(MAX(pos) + 1, 0) FROM restaurants').fetchone()
+            self._write(doc, row[0])
+
+    def replace_all(self, restaurants: list, metadata: dict = None):
+        """整個 DB 換掉（10_merge_external_xlsx 那種重建整份的用）"""
+        with self.transaction():
+            self.db.execute('DELETE FROM restaurants')
+            for pos, doc in enumerate(restaurants):
+                self._write(doc, pos)
+            if metadata is not None:
+                self.set_metadata(metadata)
+
+    def set_metadata(self, metadata: dict):
+        with self.transaction():
+            self._changed = True
+            self._set_meta('metadata', metadata)
+
+    # --- 和 JSON 同步 ---
+    def load_json(self, path: str = None):
+        """從 JSON 匯入（丟掉 store 目前內容）"""
+        path = path or self.source
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        missing = [r.get('name') for r in data['restaurants'] if not r.get('or_id')]
+        if missing:
+            raise ValueError(f"{path} 有 {len(missing)} 筆沒有 or_id，無法匯入: {missing[:5]}")
+        with self.transaction():
+            self.replace_all(data['restaurants'], data.get('_metadata', {}))
+            self._set_meta('source_sha256', file_sha256(path))
+        self._mark_exported(self._get_meta('version'), self._get_meta('source_sha256'))
+
+    def _mark_exported(self, version: int, sha: str):
+        """export 期間如果又有人寫入（version 變了），就維持 dirty"""
+        self.db.execute('BEGIN IMMEDIATE')
+        if self._get_meta('version', 0) == version:
+            self._set_meta('exported_version', version)
+        self._set_meta('source_sha256', sha)
+        self.db.execute('COMMIT')
+
+    def sync_from_source(self):
+        """source JSON 和 store 上次同步時不同 → 重新匯入；store 有未 export 的改動則拋 StoreConflict"""
+        sha = file_sha256(self.source)
+        if sha is None or sha == self._get_meta('source_sha256'):
+            return
+        if self.count() and self.dirty:
+            raise StoreConflict(
+                f"{self.source} 在 store 外被改過，而 {self.path} 還有沒 export 的改動。\n"
+                f"  要保留 store 的改動: python3 _rebuild/store.py export\n"
+                f"  要以 JSON 為準:     python3 _rebuild/store.py import")
+        fresh = not self.count()
+        self.load_json()
+        print(f"{'建立' if fresh else 'JSON 有更新，重新匯入'} {self.path}（{self.count()} 筆，來源 {self.source}）")
+
+    def export(self, targets: list = None) -> dict:
+        """寫出 JSON（dbwriter 序列化一次、原子替換、沒變的略過），回傳 {路徑: 有沒有真的寫}
+        targets 一定要包含 source：store 標成「已 export」、記下 source 的 sha256 都是以 source 為準，
+        只寫到別的檔卻標成已 export，下次 sync_from_source 會把舊的 source 重新匯入、蓋掉 store 的改動"""
+        targets = targets or [self.source, NETLIFY_DB]
+        if os.path.abspath(self.source) not in {os.path.abspath(t) for t in targets}:
+            raise ValueError(f"export 的 targets 沒有 source {self.source}"
+                             f"（{', '.join(targets)}）；store 的改動要先寫回 source")
+        self.db.execute('BEGIN')  # 讀一致的快照
+        version = self._get_meta('version', 0)
+        payload = dumps_db(self.to_json()).encode('utf-8')
+        self.db.execute('COMMIT')
+        written = write_bytes(payload, targets)
+        self._mark_exported(version, hashlib.sha256(payload).hexdigest())
+        return written
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_store(path: str = STORE_PATH, source: str = MAIN_DB) -> Store:
+    """開 store，並確認和 source JSON 同步（第一次用會自動從 JSON 建立）"""
+    store = Store(path, source)
+    store.sync_from_source()
+    return store
+
+
+def add_store_args(ap: argparse.ArgumentParser):
+    """各 merge 腳本共用的參數"""
+    ap.add_argument('--store', default=STORE_PATH, help='SQLite store 路徑')
+    ap.add_argument('--no-export', action='store_true',
+                    help='只寫 store，不寫出 JSON（批次跑多支腳本時最後再 store.py export 一次）')
+    ap.add_argument('--delta', action='store_true',
+                    help='export 後把主檔的變更記成 deltas/ 的 patch（delta.py）')
+
+
+def finish(store: Store, args, targets: list = None):
+    """腳本收尾：依 --no-export 決定要不要寫出 JSON"""
+    if args.no_export:
+        print(f"\n已寫入 {store.path}（--no-export，記得跑 python3 _rebuild/store.py export）")
+        return
+    report(store.export(targets))
+    if getattr(args, 'delta', False):
+        record_delta(store.source)
+
+
+def selfcheck():
+    """暫存目錄裡重現：--no-export 改一筆 → export --targets 只給別的檔 → 重開 store，改動必須還在"""
+    with tempfile.TemporaryDirectory() as tmp:
+        source, other = os.path.join(tmp, 'db.json'), os.path.join(tmp, 'other.json')
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(dumps_db({'_metadata': {}, 'restaurants': [{'or_id': 1, 'name': '舊名'}]}))
+        store = open_store(os.path.join(tmp, 'store.sqlite'), source)
+        store.update(1, {'name': '新名'})  # 等同 merge 腳本 --no-export
+        try:
+            store.export([other])
+            raise AssertionError('targets 沒有 source 卻 export 成功')
+        except ValueError:
+            pass
+        assert store.dirty and not os.path.exists(other), 'export 失敗後 store 應維持 dirty、不寫任何檔'
+        store.close()
+        store = open_store(os.path.join(tmp, 'store.sqlite'), source)
+        assert store.get(1)['name'] == '新名', '重開 store 後改動不見了'
+        store.export([source, other])
+        assert not store.dirty and store._get_meta('source_sha256') == file_sha256(source)
+        store.close()
+        with open_store(os.path.join(tmp, 'store.sqlite'), source) as store:
+            assert store.get(1)['name'] == '新名'
+    print("✓ selfcheck 通過：export 不含 source 會被拒絕，store 的改動保留")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('cmd', choices=['stats', 'export', 'import', 'selfcheck'])
+    ap.add_argument('--store', default=STORE_PATH)
+    ap.add_argument('--source', default=MAIN_DB, help='對應的 JSON 主檔')
+    ap.add_argument('--targets', nargs='*', default=None,
+                    help=f"export 寫到哪些檔，必須包含 --source（預設 --source 和 {NETLIFY_DB}）")
+    args = ap.parse_args()
+
+    if args.cmd == 'selfcheck':
+        selfcheck()
+        return
+    store = Store(args.store, args.source)
+    if args.cmd == 'import':
+        store.load_json()
+        print(f"已從 {args.source} 匯入 {store.count()} 筆到 {args.store}")
+        return
+    if args.cmd == 'export':
+        if not store.count():
+            print(f"{args.store} 是空的，先跑 import")
+            sys.exit(1)
+        try:
+            report(store.export(args.targets or [args.source, NETLIFY_DB]))
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        return
+
+    try:
+        store.sync_from_source()
+    except StoreConflict as e:
+        print(f"⚠️  {e}")
+    print(f"{args.store}: {store.count()} 筆，enabled {store.count(enabled=True)}，"
+          f"bookable {store.count(enabled=True, bookable=True)}")
+    print(f"未 export 的改動: {'有' if store.dirty else '無'}")
+
+
+if __name__ == '__main__':
+    main()
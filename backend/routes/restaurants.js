@@ -1,6 +1,6 @@
 const express = require('express');
 const router = express.Router();
-const { recommendRestaurants, getFilterOptions } = require('../utils/recommendation');
+const { recommendRestaurants, getFilterOptions, updateSeenToken } = require('../utils/recommendation');
 
 /**
  * GET /api/restaurants/recommend
@@ -11,6 +11,10 @@ const { recommendRestaurants, getFilterOptions } = require('../utils/recommendat
  * - type: 餐廳類型（可多選，用逗號分隔）
  * - budget: 預算區間
  * - limit: 返回數量（預設5）
+ * - exclude_ids: 要排除的 or_id（逗號分隔；exclude 是舊的店名版本）
+ * - seen: 上次回應的 seen token（排除這一輪已經抽過的，回應會帶更新後的 token）
+ * - seed: 隨機種子（同 seed + 同條件 = 同結果）
+ * - weight: 加權抽樣（rating / review_count / is_paid_account）
  * 
  * Example:
  * GET /api/restaurants/recommend?cuisine_style=韓式,日式&type=燒肉&budget=500-800&limit=5
@@ -66,6 +70,21 @@ router.get('/recommend', (req, res) => {
       filters.exclude = req.query.exclude.split(',').map(s => s.trim());
     }
     
+    if (req.query.exclude_ids) {
+      filters.excludeIds = req.query.exclude_ids.split(',').map(s => s.trim());
+    }
+    if (req.query.seen) {
+      filters.seen = req.query.seen;
+    }
+    
+    // 隨機種子 / 加權抽樣
+    if (req.query.seed) {
+      filters.seed = req.query.seed;
+    }
+    if (req.query.weight) {
+      filters.weightBy = req.query.weight;
+    }
+    
     // 返回數量
     const limit = parseInt(req.query.limit) || 5;
     
@@ -81,7 +100,8 @@ router.get('/recommend', (req, res) => {
       success: true,
       count: recommendations.length,
       filters: filters,
-      restaurants: recommendations
+      restaurants: recommendations,
+      seen: updateSeenToken(filters.seen, recommendations)
     });
   } catch (error) {
     console.error('推薦餐廳時發生錯誤:', error);
@@ -93,6 +113,31 @@ router.get('/recommend', (req, res) => {
   }
 });
 
+/**
+ * GET /api/restaurants/facets
+ * 各篩選選項在目前條件下的結果數（參數同 /recommend），前端用來把 0 間的選項反灰
+ * 沒有 shard 索引時 facets 為 null
+ */
+router.get('/facets', (req, res) => {
+  try {
+    const { getFacets, facetFiltersFromQuery } = require('../utils/recommendation');
+    const filters = facetFiltersFromQuery(req.query);
+    res.json({ success: true, filters, facets: getFacets(filters) });
+  } catch (error) {
+    console.error('計算 facet 時發生錯誤:', error);
+    res.status(500).json({ success: false, error: error.message });
+  }
+});
+
+/**
+ * GET /api/restaurants/cache-stats
+ * 推薦候選池快取的統計（hits / misses / evictions / hitRate...），每個 process 各自計算
+ */
+router.get('/cache-stats', (req, res) => {
+  const { getCandidateCacheStats } = require('../utils/recommendation');
+  res.json({ success: true, candidates: getCandidateCacheStats() });
+});
+
 /**
  * GET /api/restaurants/filter-options
  * 獲取所有可用的篩選選項
@@ -166,10 +211,9 @@ router.get('/all', (req, res) => {
  */
 router.get('/with-booking-offers', (req, res) => {
   try {
-    const { loadRestaurantDatabase } = require('../utils/recommendation');
-    const data = loadRestaurantDatabase();
-    const list = (data.restaurants || [])
-      .filter(r => r.enabled && r.has_booking_offer && (r.booking_offers || []).length > 0);
+    const { getRestaurantPool } = require('../utils/recommendation');
+    const list = getRestaurantPool()
+      .filter(r => r.has_booking_offer && (r.booking_offers || []).length > 0);
     res.json({ success: true, count: list.length, restaurants: list });
   } catch (error) {
     res.status(500).json({ success: false, error: error.message });
@@ -182,10 +226,9 @@ router.get('/with-booking-offers', (req, res) => {
  */
 router.get('/sponsored', (req, res) => {
   try {
-    const { loadRestaurantDatabase } = require('../utils/recommendation');
-    const data = loadRestaurantDatabase();
-    const sponsored = (data.restaurants || [])
-      .filter(r => r.enabled && r.is_paid_account);
+    const { getRestaurantPool } = require('../utils/recommendation');
+    const sponsored = getRestaurantPool()
+      .filter(r => r.is_paid_account);
     res.json({ success: true, count: sponsored.length, restaurants: sponsored });
   } catch (error) {
     console.error('獲取贊助餐廳時發生錯誤:', error);
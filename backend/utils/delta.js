@@ -0,0 +1,115 @@
+const fs = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+
+/**
+ * 差量資料庫（_rebuild/delta.py 產生的 deltas/：base snapshot + patch 鏈 + manifest.json）
+ *
+ * 套用規則同 delta.py 的 apply_changes。JS 沒辦法重現 Python 的序列化（5.0 會變 5），
+ * 所以這裡驗的是檔案本身：base 和每個 patch 的 sha256 要和 manifest 一致、
+ * 每個 patch 的 header.old 要接在前一個的 header.new 後面；
+ * 內容 hash 的逐步驗證由 build 時的 `python3 _rebuild/delta.py verify` 負責。
+ *
+ * base 解析過一次就留在記憶體（warm instance），manifest 換了只重套 patch。
+ */
+
+const baseCache = new Map(); // base sha256 -> 解析好的 base（不可修改，套 patch 前先複製）
+
+function sha256(buffer) {
+  return crypto.createHash('sha256').update(buffer).digest('hex');
+}
+
+function readVerified(dir, entry) {
+  const buffer = fs.readFileSync(path.join(dir, entry.file));
+  if (sha256(buffer) !== entry.sha256) {
+    throw new Error(`Delta: ${entry.file} 的 sha256 和 manifest 不符`);
+  }
+  return buffer;
+}
+
+function recordKey(restaurant, key) {
+  const value = restaurant[key];
+  return value === null || value === undefined || value === '' ? `name:${restaurant.name}` : String(value);
+}
+
+/**
+ * 把 changeset 套到 data（就地修改並回傳）
+ */
+function applyChanges(data, changes, key) {
+  let records = data.restaurants;
+  let position = new Map(records.map((r, i) => [recordKey(r, key), i]));
+  let removed = new Set();
+  for (const change of changes) {
+    switch (change.op) {
+      case 'header':
+        break;
+      case 'top':
+        if ('value' in change) data[change.field] = change.value;
+        else delete data[change.field];
+        break;
+      case 'add':
+        position.set(change[key], records.length);
+        records.push(change.record);
+        break;
+      case 'remove':
+        removed.add(position.get(change[key]));
+        break;
+      case 'replace':
+        records[position.get(change[key])] = change.record;
+        break;
+      case 'modify': {
+        const record = records[position.get(change[key])];
+        for (const [field, value] of Object.entries(change.fields)) {
+          if ('new' in value) record[field] = value.new;
+          else delete record[field];
+        }
+        break;
+      }
+      case 'order':
+        records = change.keys.map(k => records[position.get(k)]);
+        position = new Map(change.keys.map((k, i) => [k, i]));
+        removed = new Set();
+        break;
+      default:
+        throw new Error(`Delta: 不認得的 op ${change.op}`);
+    }
+  }
+  data.restaurants = removed.size > 0 ? records.filter((r, i) => !removed.has(i)) : records;
+  return data;
+}
+
+function parsePatch(buffer) {
+  return buffer.toString('utf-8').split('\n').filter(line => line.trim()).map(line => JSON.parse(line));
+}
+
+/**
+ * 讀 deltas/ 目錄：base（有快取就不重讀）+ 依序套所有 patch
+ * @returns {Object} {restaurants, _metadata, ...}，和 delta.py apply 的結果相同
+ */
+function loadDeltaDatabase(dir) {
+  const manifest = JSON.parse(fs.readFileSync(path.join(dir, 'manifest.json'), 'utf-8'));
+  let base = baseCache.get(manifest.base.sha256);
+  if (!base) {
+    base = JSON.parse(readVerified(dir, manifest.base).toString('utf-8'));
+    baseCache.clear(); // 只留目前的 base
+    baseCache.set(manifest.base.sha256, base);
+  }
+  const data = structuredClone(base);
+  let current = manifest.base.sha256;
+  for (const entry of manifest.patches) {
+    const changes = parsePatch(readVerified(dir, entry));
+    const header = changes[0];
+    if (!header || header.op !== 'header' || header.old.sha256 !== current || entry.from !== current) {
+      throw new Error(`Delta: ${entry.file} 不是接在 ${current.slice(0, 12)} 後面的 patch`);
+    }
+    applyChanges(data, changes, manifest.key);
+    current = header.new.sha256;
+  }
+  console.log(`Delta: base ${manifest.base.sha256.slice(0, 12)} + ${manifest.patches.length} patches -> ${current.slice(0, 12)}`);
+  return data;
+}
+
+module.exports = {
+  applyChanges,
+  loadDeltaDatabase
+};
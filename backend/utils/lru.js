@@ -0,0 +1,67 @@
+/**
+ * 有 TTL、容量上限和命中統計的 LRU 快取
+ *
+ * 用 Map 的插入順序當 LRU 順序：get 命中就刪掉重插（移到最新），超過上限時刪最舊的。
+ * 過期的項目在 get 時才清（不開 timer，serverless instance 凍結時也不會有殘留工作）。
+ */
+class LruCache {
+  /**
+   * @param {Object} options
+   * @param {number} options.max - 最多幾筆
+   * @param {number} options.ttlMs - 每筆存活多久（毫秒）
+   */
+  constructor({ max, ttlMs }) {
+    this.max = max;
+    this.ttlMs = ttlMs;
+    this.entries = new Map(); // key -> {value, expires}
+    this.stats = { hits: 0, misses: 0, expired: 0, evictions: 0, clears: 0 };
+  }
+
+  get(key) {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      this.stats.misses++;
+      return undefined;
+    }
+    this.entries.delete(key);
+    if (entry.expires <= Date.now()) {
+      this.stats.expired++;
+      this.stats.misses++;
+      return undefined;
+    }
+    this.entries.set(key, entry);
+    this.stats.hits++;
+    return entry.value;
+  }
+
+  set(key, value) {
+    if (this.max <= 0) return;
+    this.entries.delete(key);
+    this.entries.set(key, { value, expires: Date.now() + this.ttlMs });
+    while (this.entries.size > this.max) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.stats.evictions++;
+    }
+  }
+
+  clear() {
+    if (this.entries.size > 0) this.stats.clears++;
+    this.entries.clear();
+  }
+
+  /**
+   * 統計：hits / misses / expired / evictions / clears + 目前筆數與命中率
+   */
+  snapshot() {
+    const lookups = this.stats.hits + this.stats.misses;
+    return {
+      ...this.stats,
+      size: this.entries.size,
+      max: this.max,
+      ttlMs: this.ttlMs,
+      hitRate: lookups > 0 ? this.stats.hits / lookups : 0
+    };
+  }
+}
+
+module.exports = { LruCache };
@@ -1,5 +1,9 @@
 const fs = require('fs');
 const path = require('path');
+const { loadDeltaDatabase } = require('./delta');
+const { makeRandom, sample, weightedSample } = require('./sampling');
+const { fnv1a, emptySeen, setBit, hasBit, decodeSeen, encodeSeen } = require('./seen');
+const { LruCache } = require('./lru');
 
 // 全域城市白名單：只服務北北基（改這裡 = 全站生效）
 const CITY_ALLOWLIST = new Set(['台北市', '新北市', '基隆市']);
@@ -15,15 +19,52 @@ function applyCityAllowlist(data) {
   return data;
 }
 
+// 模組層快取：warm instance（Netlify function 重用 / 常駐的 express）跨請求共用
+// 以 inode + mtime + size 驗證，檔案被換掉（dbwriter / build 都是原子替換 → 新 inode）才重讀、重 parse
+// 快取的物件是共用的：呼叫端不要修改（要排序 / 增刪先複製）
+const fileCache = new Map(); // 檔案路徑 -> {stamp, value}
+const poolCache = new WeakMap(); // 資料庫物件 -> enabled 的餐廳
+const shardSlot = new WeakMap(); // shard 裡的餐廳 -> 在 shard 內的位置（目錄編號用）
+const catalogueCache = new WeakMap(); // shard manifest / 推薦池 -> 目錄
+let resolvedDbPath = null; // 找到過的資料庫路徑，之後不再逐一探測
+let resolvedShardDir = null;
+
+function fileStamp(file) {
+  const stat = fs.statSync(file);
+  return `${stat.ino}:${stat.mtimeMs}:${stat.size}`;
+}
+
 /**
- * 載入餐廳資料庫
+ * 讀檔並快取 load(file) 的結果；檔案沒變直接回傳上次的結果（不存在時 statSync 會丟錯）
  */
-function loadRestaurantDatabase() {
+function cachedFile(file, load) {
+  const stamp = fileStamp(file);
+  const hit = fileCache.get(file);
+  if (hit && hit.stamp === stamp) return hit.value;
+  const value = load(file);
+  fileCache.set(file, { stamp, value });
+  return value;
+}
+
+/**
+ * 讀一份資料庫 JSON 並套用城市白名單（有快取；netlify/functions/restaurants.js 也用這個）
+ */
+function loadDatabaseFile(dbPath) {
+  return cachedFile(dbPath, file => {
+    console.log(`Loading database: ${file}`);
+    return applyCityAllowlist(JSON.parse(fs.readFileSync(file, 'utf-8')));
+  });
+}
+
+function findDatabasePath() {
+  if (resolvedDbPath && fs.existsSync(resolvedDbPath)) return resolvedDbPath;
+  resolvedDbPath = null;
+
   // 如果設置了環境變數，優先使用它（Netlify Functions）
   if (process.env.RESTAURANT_DB_PATH && fs.existsSync(process.env.RESTAURANT_DB_PATH)) {
     console.log(`Found database via env var: ${process.env.RESTAURANT_DB_PATH}`);
-    const data = fs.readFileSync(process.env.RESTAURANT_DB_PATH, 'utf-8');
-    return applyCityAllowlist(JSON.parse(data));
+    resolvedDbPath = process.env.RESTAURANT_DB_PATH;
+    return resolvedDbPath;
   }
   
   // 嘗試多個可能的路徑（支持本地開發和 Netlify Functions）
@@ -40,19 +81,12 @@ function loadRestaurantDatabase() {
   
   const errors = [];
   for (const dbPath of possiblePaths) {
-    try {
-      if (fs.existsSync(dbPath)) {
-        console.log(`Found database at: ${dbPath}`);
-        const data = fs.readFileSync(dbPath, 'utf-8');
-        return applyCityAllowlist(JSON.parse(data));
-      } else {
-        errors.push(`Path does not exist: ${dbPath}`);
-      }
-    } catch (err) {
-      errors.push(`Error reading ${dbPath}: ${err.message}`);
-      // 繼續嘗試下一個路徑
-      continue;
+    if (fs.existsSync(dbPath)) {
+      console.log(`Found database at: ${dbPath}`);
+      resolvedDbPath = dbPath;
+      return resolvedDbPath;
     }
+    errors.push(`Path does not exist: ${dbPath}`);
   }
   
   // 如果所有路徑都失敗，拋出詳細錯誤
@@ -61,6 +95,152 @@ function loadRestaurantDatabase() {
   throw new Error(errorMsg);
 }
 
+/**
+ * 載入餐廳資料庫（已套用城市白名單；有快取，回傳的物件不要修改）
+ */
+function loadRestaurantDatabase() {
+  // 差量資料庫（_rebuild/delta.py：base + patch 鏈），有設定就優先；manifest 沒變就不重套 patch
+  const deltaDir = process.env.RESTAURANT_DELTA_DIR;
+  if (deltaDir && fs.existsSync(path.join(deltaDir, 'manifest.json'))) {
+    return cachedFile(path.join(deltaDir, 'manifest.json'),
+      () => applyCityAllowlist(loadDeltaDatabase(deltaDir)));
+  }
+  return loadDatabaseFile(findDatabasePath());
+}
+
+/**
+ * 推薦池：白名單內、enabled 的餐廳（每份資料庫只算一次）
+ */
+function getRestaurantPool(data = loadRestaurantDatabase()) {
+  let pool = poolCache.get(data);
+  if (!pool) {
+    pool = (data.restaurants || []).filter(r => r.enabled);
+    poolCache.set(data, pool);
+  }
+  return pool;
+}
+
+/**
+ * 縣市 shard 目錄（_rebuild/build_bundle.py 產生：每個縣市一個檔 + manifest.json）
+ */
+function findShardDir() {
+  if (resolvedShardDir && fs.existsSync(path.join(resolvedShardDir, 'manifest.json'))) return resolvedShardDir;
+  const candidates = [
+    process.env.RESTAURANT_SHARDS_DIR, // Netlify Functions（restaurants.js 設定）
+    path.join(__dirname, '../../netlify/functions/shards'), // 本地開發
+    path.join(process.cwd(), 'netlify/functions/shards') // 當前工作目錄
+  ];
+  resolvedShardDir = candidates.find(dir => dir && fs.existsSync(path.join(dir, 'manifest.json'))) || null;
+  return resolvedShardDir;
+}
+
+/**
+ * 載入 shard manifest（各縣市的檔名、筆數、行政區、sha256）
+ * @returns {Object|null} 沒跑過 build_bundle.py 時回傳 null（呼叫端退回整份資料庫）
+ */
+function loadShardManifest() {
+  const dir = findShardDir();
+  if (!dir) return null;
+  return cachedFile(path.join(dir, 'manifest.json'), file => {
+    const manifest = JSON.parse(fs.readFileSync(file, 'utf-8'));
+    manifest.dir = dir;
+    return manifest;
+  });
+}
+
+/**
+ * 載入單一縣市的 shard（{restaurants, _metadata, _index}；shard 內只有 enabled 餐廳）
+ */
+function loadCityShard(manifest, city) {
+  const entry = manifest.cities[city];
+  if (!entry) return { restaurants: [] };
+  return cachedFile(path.join(manifest.dir, entry.file), file => {
+    const data = JSON.parse(fs.readFileSync(file, 'utf-8'));
+    data.restaurants = data.restaurants || [];
+    data.restaurants.forEach((r, i) => shardSlot.set(r, i));
+    return data;
+  });
+}
+
+/**
+ * 推薦目錄：推薦池每間餐廳的固定編號（seen token 的 bit 位置）
+ * shard：白名單縣市依 manifest 順序接起來，版本 = 各 shard sha256 的 hash；
+ * 沒有 shard：推薦池的順序，版本 = or_id 序列的 hash
+ * @returns {{version: string, size: number, positionOf: function(Object): (number|undefined)}}
+ */
+function getCatalogue() {
+  const manifest = loadShardManifest();
+  const owner = manifest || getRestaurantPool();
+  let catalogue = catalogueCache.get(owner);
+  if (catalogue) return catalogue;
+
+  if (manifest) {
+    const offsets = {};
+    let size = 0;
+    const parts = [];
+    for (const [city, entry] of Object.entries(manifest.cities)) {
+      if (!CITY_ALLOWLIST.has(city)) continue;
+      offsets[city] = size;
+      size += entry.count;
+      parts.push(`${city}:${entry.sha256}`);
+    }
+    catalogue = {
+      version: fnv1a(parts.join('\n')),
+      size,
+      positionOf: r => (r.city in offsets && shardSlot.has(r) ? offsets[r.city] + shardSlot.get(r) : undefined)
+    };
+  } else {
+    const positions = new WeakMap(owner.map((r, i) => [r, i]));
+    catalogue = {
+      version: fnv1a(owner.map(r => r.or_id ?? `name:${r.name}`).join('\n')),
+      size: owner.length,
+      positionOf: r => positions.get(r)
+    };
+  }
+  catalogueCache.set(owner, catalogue);
+  return catalogue;
+}
+
+/**
+ * 把這次推薦的餐廳加進 seen token（token 沒給 / 過期就從空的開始），回傳新的 token
+ */
+function updateSeenToken(token, restaurants) {
+  const catalogue = getCatalogue();
+  const bits = decodeSeen(token, catalogue) || emptySeen(catalogue.size);
+  for (const r of restaurants) {
+    const position = catalogue.positionOf(r);
+    if (position !== undefined && position < catalogue.size) setBit(bits, position);
+  }
+  return encodeSeen(bits, catalogue);
+}
+
+/**
+ * 載入這次推薦需要的餐廳：有選縣市只載那個縣市的 shard，否則載白名單內全部縣市
+ * 每個 shard 的索引都可用時，料理 / 類型 / 預算 / 地區直接用索引篩好（indexed=true）；
+ * 沒有 shard 或索引過期時回傳未篩選的餐廳，由呼叫端逐筆篩選
+ * 回傳的都是 enabled 的餐廳（shard 只收 enabled、整份資料庫用推薦池）；可能是共用的陣列，不要修改
+ * @returns {{restaurants: Array, indexed: boolean}}
+ */
+function loadRestaurantsFor(filters = {}) {
+  const manifest = loadShardManifest();
+  if (!manifest) {
+    return { restaurants: getRestaurantPool(), indexed: false };
+  }
+  const cities = (filters.city ? [filters.city] : Object.keys(manifest.cities))
+    .filter(city => CITY_ALLOWLIST.has(city));
+  const shards = cities.map(city => loadCityShard(manifest, city));
+  const total = shards.reduce((sum, shard) => sum + shard.restaurants.length, 0);
+  console.log(`Shards: loaded ${cities.join(', ') || '(none)'} -> ${total}/${manifest.total}`);
+
+  if (shards.every(shard => isIndexUsable(shard._index, shard.restaurants))) {
+    const restaurants = [].concat(...shards.map(shard => filterByIndex(shard, filters)));
+    console.log(`索引篩選: ${total} -> ${restaurants.length}`);
+    return { restaurants, indexed: true };
+  }
+  console.log('Shard 索引不存在或已過期，改用逐筆篩選');
+  return { restaurants: [].concat(...shards.map(shard => shard.restaurants)), indexed: false };
+}
+
 /**
  * 計算兩點之間的距離（使用 Haversine 公式）
  * @param {number} lat1 - 起點緯度
@@ -282,63 +462,280 @@ function matchesType(restaurant, userTypes) {
 }
 
 /**
- * 推薦餐廳
+ * Shard 倒排索引（_rebuild/filter_index.py 產生）
+ * 每個 posting 是 base64 bitset：第 i 個 bit = shard 裡第 i 間餐廳（byte 內低位在前）
+ * 同一條件選多個分類 = OR，不同條件 = AND，最後一次取出餐廳
+ */
+const INDEX_VERSION = 3;
+const BUDGET_UNKNOWN = '_unknown'; // 沒預算或無法解析：matchesBudget 一律放行
+const EARTH_RADIUS_KM = 6371; // 同 calculateDistance
+
+/**
+ * 索引是否能用：版本、筆數要對得上，建索引時的分類對照表要和現在的一樣
+ * （改了 CUISINE_CATEGORY_MAP / TYPE_CATEGORY_MAP 卻沒重跑 build_bundle.py 時退回逐筆篩選）
+ */
+function isIndexUsable(index, restaurants) {
+  return Boolean(index) &&
+    index.version === INDEX_VERSION &&
+    index.count === restaurants.length &&
+    JSON.stringify(index.mappings) ===
+      JSON.stringify({ cuisine_style: CUISINE_CATEGORY_MAP, type: TYPE_CATEGORY_MAP, dining: DINING_WINDOWS });
+}
+
+const decodedPostings = new WeakMap(); // shard 索引裡的 posting 物件 -> Map(key -> Uint8Array)，shard 快取住就只解一次
+
+/**
+ * 取一個 posting 的 bitset（唯讀，要修改先複製）；沒有的分類回傳 null
+ */
+function postingBits(postings, key) {
+  if (!postings || !postings[key]) return null;
+  let decoded = decodedPostings.get(postings);
+  if (!decoded) {
+    decoded = new Map();
+    decodedPostings.set(postings, decoded);
+  }
+  let bits = decoded.get(key);
+  if (!bits) {
+    bits = new Uint8Array(Buffer.from(postings[key], 'base64'));
+    decoded.set(key, bits);
+  }
+  return bits;
+}
+
+/**
+ * 把一組 posting OR 起來；沒有的分類當作空集合
+ */
+function unionPostings(postings, keys, byteLength) {
+  const bits = new Uint8Array(byteLength);
+  for (const key of keys) {
+    const posting = postingBits(postings, key);
+    if (!posting) continue;
+    for (let i = 0; i < byteLength; i++) bits[i] |= posting[i];
+  }
+  return bits;
+}
+
+/**
+ * 附近餐廳模式的候選：半徑外接框碰到的 grid 格子裡的餐廳（bitset）
+ * 和使用者距離 ≤ maxDistance 的點一定落在框內，精確距離仍由距離篩選的 Haversine 判斷
+ * 框內格子數比 shard 餐廳數還多時（半徑很大），改成掃 shard 裡有餐廳的格子
+ */
+function nearbyPostings(grid, location, maxDistance, byteLength) {
+  const bits = new Uint8Array(byteLength);
+  const angular = maxDistance / EARTH_RADIUS_KM;
+  const cosLat = Math.cos(location.lat * Math.PI / 180);
+  const dLat = angular * 180 / Math.PI;
+  // 外接框的經度半寬：asin(sin r / cos φ)；圓碰到極點時不限經度
+  const dLng = angular >= Math.PI / 2 || Math.sin(angular) >= cosLat
+    ? Infinity
+    : Math.asin(Math.sin(angular) / cosLat) * 180 / Math.PI;
+  const pad = 1e-9; // 浮點誤差，寧可多看一格
+  const latLo = Math.floor((location.lat - dLat - pad) / grid.cell);
+  const latHi = Math.floor((location.lat + dLat + pad) / grid.cell);
+  const lngLo = Math.floor((location.lng - dLng - pad) / grid.cell);
+  const lngHi = Math.floor((location.lng + dLng + pad) / grid.cell);
+
+  const mark = positions => {
+    for (const i of positions) bits[i >> 3] |= 1 << (i & 7);
+  };
+  if ((latHi - latLo + 1) * (lngHi - lngLo + 1) <= byteLength * 8) {
+    for (let a = latLo; a <= latHi; a++) {
+      for (let b = lngLo; b <= lngHi; b++) {
+        const positions = grid.cells[`${a}:${b}`];
+        if (positions) mark(positions);
+      }
+    }
+  } else {
+    for (const key of Object.keys(grid.cells)) {
+      const [a, b] = key.split(':').map(Number);
+      if (a >= latLo && a <= latHi && b >= lngLo && b <= lngHi) mark(grid.cells[key]);
+    }
+  }
+  return bits;
+}
+
+/**
+ * 用索引篩選一個 shard，結果和 matchesCuisineStyle / matchesType / matchesBudget /
+ * 地區篩選逐筆跑完相同（順序同 shard）；附近餐廳模式只留 grid 候選，距離篩選再算精確距離
+ */
+function filterByIndex(shard, filters) {
+  const { restaurants, _index: index } = shard;
+  const byteLength = (restaurants.length + 7) >> 3;
+  const clauses = [];
+
+  if (filters.cuisine_style && filters.cuisine_style.length > 0) {
+    clauses.push(unionPostings(index.cuisine_style, filters.cuisine_style, byteLength));
+  }
+  if (filters.type && filters.type.length > 0) {
+    clauses.push(unionPostings(index.type, filters.type, byteLength));
+  }
+  if (filters.budget && filters.budget !== 'all') {
+    clauses.push(unionPostings(index.budget, [filters.budget, BUDGET_UNKNOWN], byteLength));
+  }
+  if (filters.userLocation && filters.maxDistance) {
+    clauses.push(nearbyPostings(index.grid, filters.userLocation, filters.maxDistance, byteLength));
+  }
+  if (filters.city) {
+    if (index.city !== filters.city) return [];
+    if (filters.district) {
+      clauses.push(unionPostings(index.district, [filters.district], byteLength));
+    }
+  }
+  if (clauses.length === 0) return restaurants.slice();
+
+  const bits = clauses[0];
+  for (const clause of clauses.slice(1)) {
+    for (let i = 0; i < byteLength; i++) bits[i] &= clause[i];
+  }
+  const result = [];
+  for (let i = 0; i < byteLength; i++) {
+    let byte = bits[i];
+    while (byte) {
+      const low = byte & -byte;
+      result.push(restaurants[(i << 3) + 31 - Math.clz32(low)]);
+      byte ^= low;
+    }
+  }
+  return result;
+}
+
+/**
+ * 營業時間 bitmap（規則同 _rebuild/hours.py）
+ * 一週 7 天（星期一起）× 96 個 15 分鐘格 = 21 個 uint32；時段往外取整到 15 分鐘，
+ * 跨日時段超過午夜的部分算在隔天，is_24h（且有時段）= 全部營業
+ * bundle / shard 已經編好放在 hours_bitmap，直接讀整份資料庫時才在這裡編
+ */
+const HOURS_DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'];
+const SLOT_MINUTES = 15;
+const SLOTS_PER_DAY = 24 * 60 / SLOT_MINUTES;
+const HOURS_WORDS = 7 * SLOTS_PER_DAY / 32;
+
+// 午餐 11:00-14:30、晚餐 17:30-21:00（當天分鐘數，[開始, 結束)）
+const DINING_WINDOWS = {
+  lunch: [11 * 60, 14 * 60 + 30],
+  dinner: [17 * 60 + 30, 21 * 60]
+};
+
+/**
+ * '11:30-14:00' → [690, 840]；跨日的結束時間加 24 小時；格式不對回傳 null
+ */
+function parseTimeSlot(timeRange) {
+  const m = /^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$/.exec(String(timeRange).trim());
+  if (!m) return null;
+  const [sh, sm, eh, em] = m.slice(1).map(Number);
+  const start = sh * 60 + sm;
+  let end = eh * 60 + em;
+  if (sm > 59 || em > 59 || start >= 24 * 60 || end > 24 * 60) return null;
+  if (end <= start) end += 24 * 60;
+  return [start, end];
+}
+
+/**
+ * opening_hours → 21 個 uint32；沒有可用時段回傳 null
+ */
+function compileOpeningHours(openingHours) {
+  if (!openingHours) return null;
+  const words = new Array(HOURS_WORDS).fill(0);
+  HOURS_DAYS.forEach((day, d) => {
+    for (const timeRange of openingHours[day] || []) {
+      const span = parseTimeSlot(timeRange);
+      if (!span) continue;
+      const last = Math.ceil(span[1] / SLOT_MINUTES);
+      for (let q = Math.floor(span[0] / SLOT_MINUTES); q < last; q++) {
+        const bit = (d * SLOTS_PER_DAY + q) % (7 * SLOTS_PER_DAY);
+        words[bit >> 5] = (words[bit >> 5] | (1 << (bit & 31))) >>> 0;
+      }
+    }
+  });
+  if (words.every(w => w === 0)) return null;
+  return openingHours.is_24h ? new Array(HOURS_WORDS).fill(0xFFFFFFFF) : words;
+}
+
+function getHoursBitmap(restaurant) {
+  return restaurant.hours_bitmap || compileOpeningHours(restaurant.opening_hours);
+}
+
+/**
+ * day（0 = 星期一）的 [start, end) 分鐘內是否有任何一格營業
+ */
+function isOpenDuring(bitmap, day, start, end) {
+  if (!bitmap) return false;
+  const last = Math.ceil(end / SLOT_MINUTES);
+  for (let q = Math.floor(start / SLOT_MINUTES); q < last; q++) {
+    const bit = day * SLOTS_PER_DAY + q;
+    if ((bitmap[bit >> 5] >>> (bit & 31)) & 1) return true;
+  }
+  return false;
+}
+
+// 加權抽樣的權重（filters.weightBy）：都 > 0，沒資料的給中間值，不會因為缺欄位就抽不到
+const PAID_ACCOUNT_BOOST = 3;
+const RECOMMEND_WEIGHTS = {
+  rating: r => (typeof r.rating === 'number' && r.rating > 0 ? r.rating : 3),
+  review_count: r => 1 + Math.log1p(r.review_count > 0 ? r.review_count : 0),
+  is_paid_account: r => (r.is_paid_account ? PAID_ACCOUNT_BOOST : 1)
+};
+
+/**
+ * 餐廳和使用者的距離是否在 maxDistance 內（沒有座標無法計算距離，一律排除）
+ */
+function isWithinDistance(r, location, maxDistance) {
+  if (!r.coordinates || !r.coordinates.lat || !r.coordinates.lng) {
+    return false;
+  }
+  const distance = calculateDistance(location.lat, location.lng, r.coordinates.lat, r.coordinates.lng);
+  return distance <= maxDistance;
+}
+
+/**
+ * 推薦候選池：套用料理 / 類型 / 預算 / 距離 / 地區 / 用餐時段
+ * （排除已顯示的餐廳每個 session 都不同，不在這裡做）
  * @param {Object} filters - 篩選條件
- * @param {number} limit - 返回的餐廳數量上限（預設5）
- * @returns {Array} 推薦的餐廳陣列
+ * @param {Date} now - 「現在營業」和今天星期幾用的時間
+ * @returns {Array} 候選餐廳（可能是共用的陣列，不要修改）
  */
-function recommendRestaurants(filters = {}, limit = 5) {
-  const data = loadRestaurantDatabase();
+function filterCandidates(filters, now) {
   // 第一道濾網：enabled=false 的店絕對不出現在推薦池
   // （空殼餐廳 / 測試店 / status≠Normal / 手動 blocklist 都已標 enabled=false）
-  let restaurants = (data.restaurants || []).filter(r => r.enabled);
+  // shard 只收 enabled、整份資料庫的推薦池載入時就篩好，這裡不用再逐筆檢查
+  const loaded = loadRestaurantsFor(filters);
+  let restaurants = loaded.restaurants;
 
   // 調試：記錄初始數量
   console.log('推薦餐廳 - 初始數量:', restaurants.length);
-  console.log('篩選條件:', filters);
   
+  // 料理風格 / 類型 / 預算 / 地區：有索引時 loadRestaurantsFor 已經篩好
   // 篩選：料理風格
-  if (filters.cuisine_style) {
+  if (filters.cuisine_style && !loaded.indexed) {
     const beforeCount = restaurants.length;
     restaurants = restaurants.filter(r => matchesCuisineStyle(r, filters.cuisine_style));
     console.log(`料理風格篩選: ${beforeCount} -> ${restaurants.length} (條件: ${filters.cuisine_style.join(', ')})`);
   }
   
   // 篩選：餐廳類型
-  if (filters.type) {
+  if (filters.type && !loaded.indexed) {
     const beforeCount = restaurants.length;
     restaurants = restaurants.filter(r => matchesType(r, filters.type));
     console.log(`餐廳類型篩選: ${beforeCount} -> ${restaurants.length} (條件: ${filters.type.join(', ')})`);
   }
   
   // 篩選：預算
-  if (filters.budget) {
+  if (filters.budget && !loaded.indexed) {
     const beforeCount = restaurants.length;
     restaurants = restaurants.filter(r => matchesBudget(r, filters.budget));
     console.log(`預算篩選: ${beforeCount} -> ${restaurants.length} (條件: ${filters.budget})`);
   }
   
   // 距離篩選（需要座標資料）- 附近餐廳模式
+  // 有索引時這裡只剩 grid 格子裡的候選，逐筆算精確距離
   if (filters.userLocation && filters.maxDistance) {
     const beforeCount = restaurants.length;
-    restaurants = restaurants.filter(r => {
-      // 如果餐廳沒有座標，無法計算距離，應該排除
-      if (!r.coordinates || !r.coordinates.lat || !r.coordinates.lng) {
-        return false;
-      }
-      const distance = calculateDistance(
-        filters.userLocation.lat,
-        filters.userLocation.lng,
-        r.coordinates.lat,
-        r.coordinates.lng
-      );
-      return distance <= filters.maxDistance;
-    });
+    restaurants = restaurants.filter(r => isWithinDistance(r, filters.userLocation, filters.maxDistance));
     console.log(`距離篩選: ${beforeCount} -> ${restaurants.length} (距離: ${filters.maxDistance}km)`);
   }
   
   // 地區篩選（縣市和行政區）- 選擇地區模式
-  if (filters.city) {
+  if (filters.city && !loaded.indexed) {
     const beforeCount = restaurants.length;
     restaurants = restaurants.filter(r => {
       const restaurantCity = r.city;
@@ -363,143 +760,165 @@ function recommendRestaurants(filters = {}, limit = 5) {
     console.log(`地區篩選: ${beforeCount} -> ${restaurants.length} (條件: ${filters.city}${filters.district ? ' ' + filters.district : ''})`);
   }
   
-  // 排除已顯示的餐廳
-  if (filters.exclude && filters.exclude.length > 0) {
-    const beforeCount = restaurants.length;
-    restaurants = restaurants.filter(r => !filters.exclude.includes(r.name));
-    console.log(`排除已顯示: ${beforeCount} -> ${restaurants.length} (排除: ${filters.exclude.length} 間)`);
-  }
-  
-  // 用餐時段篩選
+  // 用餐時段篩選（營業時間 bitmap：現在 = 查一格，午餐 / 晚餐 = 查時段內的格子）
   if (filters.diningTime && filters.diningTime !== 'all') {
     const beforeCount = restaurants.length;
-    const now = new Date();
-    const currentDay = ['sunday', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday'][now.getDay()];
+    const currentDay = (now.getDay() + 6) % 7; // 0 = 星期一
     const currentHour = now.getHours();
     const currentMinute = now.getMinutes();
     const currentTime = currentHour * 60 + currentMinute; // 轉換為分鐘數
     
     const minuteStr = currentMinute < 10 ? '0' + currentMinute : currentMinute.toString();
-    console.log(`用餐時段篩選 - 當前時間: ${currentHour}:${minuteStr}, 當前日期: ${currentDay}, 當前時間（分鐘）: ${currentTime}`);
+    console.log(`用餐時段篩選 - 當前時間: ${currentHour}:${minuteStr}, 當前日期: ${HOURS_DAYS[currentDay]}, 當前時間（分鐘）: ${currentTime}`);
     
+    const window = filters.diningTime === 'now'
+      ? [currentTime, currentTime + 1]
+      : DINING_WINDOWS[filters.diningTime];
     restaurants = restaurants.filter(r => {
-      const openingHours = r.opening_hours;
-      if (!openingHours) return false; // 沒有營業時間資料，排除
-      
-      // 根據選擇的時段進行篩選
-      if (filters.diningTime === 'now') {
-        // 現在：檢查當前時間是否在營業時間內
-        
-        // 24 小時營業的餐廳，需要檢查是否有實際的營業時間資料
-        // 如果 is_24h 為 true，但所有天的列表都是空的，可能是資料錯誤
-        if (openingHours.is_24h) {
-          // 檢查是否至少有一天的列表不是空的
-          const hasAnyTime = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
-            .some(day => openingHours[day] && openingHours[day].length > 0);
-          
-          // 如果至少有一天的列表不是空的，或者所有天的列表都是空的（可能是資料錯誤，但標記為 24 小時）
-          // 為了安全起見，如果所有天的列表都是空的，我們不認為它是 24 小時營業
-          if (hasAnyTime) {
-            return true; // 24 小時營業且有實際時間資料
-          } else {
-            // 所有天的列表都是空的，可能是資料錯誤，不應該顯示
-            return false;
-          }
-        }
-        
-        // 非 24 小時營業：檢查當前時間是否在營業時間內
-        const dayTimes = openingHours[currentDay] || [];
-        if (dayTimes.length === 0) return false; // 今天休息
-        
-        // 檢查當前時間是否在任何一個營業時段內
-        const isOpen = dayTimes.some(timeRange => {
-          const [start, end] = timeRange.split('-');
-          const [startHour, startMin] = start.split(':').map(Number);
-          const [endHour, endMin] = end.split(':').map(Number);
-          const startTime = startHour * 60 + startMin;
-          let endTime = endHour * 60 + endMin;
-          
-          // 處理跨日情況（如 17:30-00:00）
-          if (endTime < startTime) {
-            endTime += 24 * 60; // 加一天
-          }
-          
-          const inRange = currentTime >= startTime && currentTime <= endTime;
-          
-          // 調試日誌：只記錄 R77餐酒館的情況
-          if (r.name && r.name.includes && r.name.includes('R77')) {
-            console.log(`  R77餐酒館 - 時段 ${timeRange}: 開始=${startTime}, 結束=${endTime}, 當前=${currentTime}, 在範圍內=${inRange}`);
-          }
-          
-          return inRange;
-        });
-        
-        // 調試日誌：只記錄 R77餐酒館的情況
-        if (r.name && r.name.includes && r.name.includes('R77')) {
-          console.log(`  R77餐酒館 - 今天營業時段: ${dayTimes.join(', ')}, 是否營業: ${isOpen}`);
-        }
-        
-        return isOpen;
-      } else if (filters.diningTime === 'lunch') {
-        // 午餐：11:00-14:30
-        const dayTimes = openingHours[currentDay] || [];
-        if (dayTimes.length === 0) return false;
-        
-        // 檢查是否有任何營業時段包含 11:00-14:30
-        const lunchStart = 11 * 60; // 11:00
-        const lunchEnd = 14 * 60 + 30; // 14:30
-        
-        return dayTimes.some(timeRange => {
-          const [start, end] = timeRange.split('-');
-          const [startHour, startMin] = start.split(':').map(Number);
-          const [endHour, endMin] = end.split(':').map(Number);
-          const startTime = startHour * 60 + startMin;
-          let endTime = endHour * 60 + endMin;
-          
-          // 處理跨日情況
-          if (endTime < startTime) {
-            endTime += 24 * 60;
-          }
-          
-          // 檢查午餐時段是否與營業時段重疊
-          return lunchStart < endTime && lunchEnd > startTime;
-        });
-      } else if (filters.diningTime === 'dinner') {
-        // 晚餐：17:30-21:00
-        const dayTimes = openingHours[currentDay] || [];
-        if (dayTimes.length === 0) return false;
-        
-        // 檢查是否有任何營業時段包含 17:30-21:00
-        const dinnerStart = 17 * 60 + 30; // 17:30
-        const dinnerEnd = 21 * 60; // 21:00
-        
-        return dayTimes.some(timeRange => {
-          const [start, end] = timeRange.split('-');
-          const [startHour, startMin] = start.split(':').map(Number);
-          const [endHour, endMin] = end.split(':').map(Number);
-          const startTime = startHour * 60 + startMin;
-          let endTime = endHour * 60 + endMin;
-          
-          // 處理跨日情況
-          if (endTime < startTime) {
-            endTime += 24 * 60;
-          }
-          
-          // 檢查晚餐時段是否與營業時段重疊
-          return dinnerStart < endTime && dinnerEnd > startTime;
-        });
-      }
-      
-      return true;
+      if (!r.opening_hours) return false; // 沒有營業時間資料，排除
+      if (!window) return true; // 不認得的時段：只要求有營業時間資料
+      return isOpenDuring(getHoursBitmap(r), currentDay, window[0], window[1]);
     });
     console.log(`用餐時段篩選: ${beforeCount} -> ${restaurants.length} (時段: ${filters.diningTime})`);
   }
   
   // TODO: 線上訂位篩選（需要訂位資料）
   
-  // 隨機排序並返回指定數量
-  const shuffled = restaurants.sort(() => Math.random() - 0.5);
-  return shuffled.slice(0, limit);
+  return restaurants;
+}
+
+// 候選池快取：同樣的篩選條件（大多數流量都是同縣市 + 現在營業 + 某個預算）只算一次，之後每個請求只付抽樣的成本
+// 資料換了（shard manifest / 資料庫重新載入）整個清掉；TTL 只是保險
+const candidateCache = new LruCache({
+  max: Number(process.env.RECOMMEND_CACHE_SIZE) || 500,
+  ttlMs: Number(process.env.RECOMMEND_CACHE_TTL_MS) || 5 * 60 * 1000
+});
+let candidateSnapshot = null; // 快取內容是從哪一份資料（manifest / 資料庫物件）算出來的
+// 附近餐廳模式的快取格子（同 filter_index.py 的 GRID_CELL）：GPS 座標每次都不同，直接當 key 幾乎不會命中
+const NEARBY_CACHE_CELL = 0.01;
+
+/**
+ * 附近餐廳模式改用「格子」查候選池：位置移到所在格子的中心、半徑加上中心到格子最遠角的距離，
+ * 同一格內任何位置的結果都是它的子集；精確的距離篩選在查完快取後對每個請求再做
+ * @returns {Object} 不是附近餐廳模式時原樣回傳 filters
+ */
+function nearbyCellFilters(filters) {
+  if (!filters.userLocation || !filters.maxDistance) return filters;
+  const latCell = Math.floor(filters.userLocation.lat / NEARBY_CACHE_CELL);
+  const lngCell = Math.floor(filters.userLocation.lng / NEARBY_CACHE_CELL);
+  const center = {
+    lat: (latCell + 0.5) * NEARBY_CACHE_CELL,
+    lng: (lngCell + 0.5) * NEARBY_CACHE_CELL
+  };
+  let reach = 0;
+  for (const a of [latCell, latCell + 1]) {
+    for (const b of [lngCell, lngCell + 1]) {
+      reach = Math.max(reach, calculateDistance(center.lat, center.lng, a * NEARBY_CACHE_CELL, b * NEARBY_CACHE_CELL));
+    }
+  }
+  return {
+    ...filters,
+    userLocation: center,
+    maxDistance: filters.maxDistance + reach + 1e-6 // 浮點誤差，寧可多收
+  };
+}
+
+/**
+ * 候選池的快取 key：正規化的篩選條件 + 時間桶
+ * 「現在營業」以營業時間 bitmap 的 15 分鐘格為單位（同一格內結果相同），午餐 / 晚餐以星期幾為單位
+ */
+function candidateCacheKey(filters, now) {
+  const sorted = list => (list && list.length > 0 ? [...list].sort() : null);
+  const day = (now.getDay() + 6) % 7;
+  let dining = null;
+  if (filters.diningTime && filters.diningTime !== 'all') {
+    if (filters.diningTime === 'now') {
+      dining = `now@${day}:${Math.floor((now.getHours() * 60 + now.getMinutes()) / SLOT_MINUTES)}`;
+    } else {
+      dining = DINING_WINDOWS[filters.diningTime] ? `${filters.diningTime}@${day}` : filters.diningTime;
+    }
+  }
+  // 附近餐廳模式由 nearbyCellFilters 換成格子中心，同一格、同半徑共用一筆
+  const nearby = filters.userLocation && filters.maxDistance
+    ? [filters.userLocation.lat, filters.userLocation.lng, filters.maxDistance]
+    : null;
+  return JSON.stringify([
+    sorted(filters.cuisine_style),
+    sorted(filters.type),
+    filters.budget && filters.budget !== 'all' ? filters.budget : null,
+    nearby,
+    filters.city || null,
+    filters.city && filters.district ? filters.district : null,
+    dining
+  ]);
+}
+
+function cachedCandidates(filters, now) {
+  const snapshot = loadShardManifest() || loadRestaurantDatabase();
+  if (snapshot !== candidateSnapshot) {
+    candidateCache.clear();
+    candidateSnapshot = snapshot;
+  }
+  const cellFilters = nearbyCellFilters(filters);
+  const key = candidateCacheKey(cellFilters, now);
+  let candidates = candidateCache.get(key);
+  if (candidates) {
+    console.log(`候選池快取命中: ${candidates.length} 間 ${key}`);
+  } else {
+    candidates = filterCandidates(cellFilters, now);
+    candidateCache.set(key, candidates);
+  }
+  if (cellFilters !== filters) {
+    const beforeCount = candidates.length;
+    candidates = candidates.filter(r => isWithinDistance(r, filters.userLocation, filters.maxDistance));
+    console.log(`距離篩選（精確）: ${beforeCount} -> ${candidates.length} (距離: ${filters.maxDistance}km)`);
+  }
+  return candidates;
+}
+
+/**
+ * 候選池快取的統計（hits / misses / expired / evictions / clears / size / hitRate）
+ */
+function getCandidateCacheStats() {
+  return candidateCache.snapshot();
+}
+
+/**
+ * 推薦餐廳
+ * @param {Object} filters - 篩選條件（另可帶 seed：結果可重現；weightBy：rating / review_count / is_paid_account 加權；
+ *   excludeIds：要排除的 or_id；seen：updateSeenToken 發的 token，排除這一輪抽過的）
+ * @param {number} limit - 返回的餐廳數量上限（預設5）
+ * @returns {Array} 推薦的餐廳陣列
+ */
+function recommendRestaurants(filters = {}, limit = 5) {
+  console.log('篩選條件:', filters);
+  let restaurants = cachedCandidates(filters, new Date());
+
+  // 排除已顯示的餐廳：or_id（excludeIds）、seen token（這一輪抽過的）、店名（exclude，舊版前端；分店可能同名）
+  const excludedIds = new Set((filters.excludeIds || []).map(String));
+  const excludedNames = new Set(filters.exclude || []);
+  const catalogue = filters.seen ? getCatalogue() : null;
+  const seen = catalogue ? decodeSeen(filters.seen, catalogue) : null;
+  if (filters.seen && !seen) {
+    console.log('seen token 無效或目錄已更新，忽略');
+  }
+  if (excludedIds.size > 0 || excludedNames.size > 0 || seen) {
+    const beforeCount = restaurants.length;
+    restaurants = restaurants.filter(r => {
+      if (excludedIds.has(String(r.or_id)) || excludedNames.has(r.name)) return false;
+      if (!seen) return true;
+      const position = catalogue.positionOf(r);
+      return position === undefined || !hasBit(seen, position);
+    });
+    console.log(`排除已顯示: ${beforeCount} -> ${restaurants.length} (or_id ${excludedIds.size} / 店名 ${excludedNames.size} / seen ${seen ? 'token' : '-'})`);
+  }
+  
+  // 隨機抽 limit 間（sampling.js：O(limit)、不改動候選陣列；加權模式一趟掃完，不排序）
+  const random = makeRandom(filters.seed);
+  const weight = RECOMMEND_WEIGHTS[filters.weightBy];
+  return weight
+    ? weightedSample(restaurants, limit, weight, random)
+    : sample(restaurants, limit, random);
 }
 
 /**
@@ -507,15 +926,7 @@ function recommendRestaurants(filters = {}, limit = 5) {
  * @returns {Object} 包含所有可選項的物件
  */
 function getFilterOptions() {
-  const data = loadRestaurantDatabase();
-  const types = new Set();
-  const budgets = new Set();
-  
-  data.restaurants.forEach(restaurant => {
-    (restaurant.type || []).forEach(t => types.add(t));
-    if (restaurant.budget) budgets.add(restaurant.budget);
-  });
-  
+  // 分類都是固定的，不需要載入資料庫
   // 前端只顯示7個料理風格分類
   const frontendCuisineCategories = [
     '台式料理',
@@ -557,11 +968,22 @@ function getFilterOptions() {
  * @returns {Object} 包含縣市列表和縣市-行政區對應關係的物件
  */
 function getLocationOptions() {
-  const data = loadRestaurantDatabase();
   const cities = new Set();
   const districtsByCity = {};
 
-  (data.restaurants || []).filter(r => r.enabled).forEach(restaurant => {
+  // 有 shard manifest 就直接用它的縣市 / 行政區，不載入任何餐廳
+  const manifest = loadShardManifest();
+  const restaurants = manifest ? [] : getRestaurantPool();
+  if (manifest) {
+    Object.keys(manifest.cities)
+      .filter(city => CITY_ALLOWLIST.has(city) && manifest.cities[city].count > 0)
+      .forEach(city => {
+        cities.add(city);
+        districtsByCity[city] = new Set(manifest.cities[city].districts);
+      });
+  }
+
+  restaurants.forEach(restaurant => {
     const city = restaurant.city;
     const district = restaurant.district;
     
@@ -638,9 +1060,193 @@ function getLocationOptions() {
   };
 }
 
+const BUDGET_CATEGORIES = ['200元內', '200-500元', '500-1000元', '1000-1500元', '1500以上'];
+const POPCOUNT8 = Uint8Array.from({ length: 256 }, (_, byte) => {
+  let count = 0;
+  for (let b = byte; b; b &= b - 1) count++;
+  return count;
+});
+
+/**
+ * n 筆全選的 bitset（最後一個 byte 超出 n 的 bit 保持 0，popcount 才不會多算）
+ */
+function allBits(n) {
+  const bits = new Uint8Array((n + 7) >> 3).fill(0xFF);
+  if (n & 7) bits[bits.length - 1] = (1 << (n & 7)) - 1;
+  return bits;
+}
+
+function intersectAll(clauses, n) {
+  const bits = allBits(n);
+  for (const clause of clauses) {
+    for (let i = 0; i < bits.length; i++) bits[i] &= clause[i];
+  }
+  return bits;
+}
+
+/**
+ * |a ∧ b|；b 為 null（沒有這個分類）= 0
+ */
+function countAnd(a, b) {
+  if (!b) return 0;
+  let count = 0;
+  for (let i = 0; i < a.length; i++) count += POPCOUNT8[a[i] & b[i]];
+  return count;
+}
+
+/**
+ * 附近餐廳模式的精確 bitset：grid 候選再逐一算 Haversine（只看半徑附近的格子）
+ */
+function nearbyBits(shard, filters, byteLength) {
+  const bits = nearbyPostings(shard._index.grid, filters.userLocation, filters.maxDistance, byteLength);
+  for (let i = 0; i < byteLength; i++) {
+    let byte = bits[i];
+    while (byte) {
+      const low = byte & -byte;
+      const r = shard.restaurants[(i << 3) + 31 - Math.clz32(low)];
+      const distance = calculateDistance(
+        filters.userLocation.lat, filters.userLocation.lng, r.coordinates.lat, r.coordinates.lng);
+      if (!(distance <= filters.maxDistance)) bits[i] &= ~low;
+      byte ^= low;
+    }
+  }
+  return bits;
+}
+
+/**
+ * 用餐時段的 bitset：午餐 / 晚餐查索引裡今天的 posting；「現在」隨時間變，逐筆查 hours_bitmap 的一格
+ */
+function diningBits(shard, diningTime, day, time, byteLength) {
+  if (DINING_WINDOWS[diningTime]) {
+    return postingBits(shard._index.dining[diningTime], day) || new Uint8Array(byteLength);
+  }
+  const bits = new Uint8Array(byteLength);
+  shard.restaurants.forEach((r, i) => {
+    const open = diningTime === 'now'
+      ? r.opening_hours && isOpenDuring(getHoursBitmap(r), day, time, time + 1)
+      : r.opening_hours; // 不認得的時段：同 recommendRestaurants，只要求有營業時間資料
+    if (open) bits[i >> 3] |= 1 << (i & 7);
+  });
+  return bits;
+}
+
+/**
+ * query string → facet 用的篩選條件（參數同 /recommend：cuisine_style, type, budget, diningTime,
+ * userLat + userLng + maxDistance, city, district）
+ */
+function facetFiltersFromQuery(query = {}) {
+  const filters = {};
+  const list = value => value.split(',').map(s => s.trim()).filter(Boolean);
+  if (query.cuisine_style) filters.cuisine_style = list(query.cuisine_style);
+  if (query.type) filters.type = list(query.type);
+  if (query.budget) filters.budget = query.budget;
+  if (query.diningTime) filters.diningTime = query.diningTime;
+  if (query.userLat && query.userLng && query.maxDistance) {
+    filters.userLocation = { lat: parseFloat(query.userLat), lng: parseFloat(query.userLng) };
+    filters.maxDistance = parseFloat(query.maxDistance);
+  }
+  if (query.city) {
+    filters.city = query.city;
+    if (query.district) filters.district = query.district;
+  }
+  return filters;
+}
+
+/**
+ * 各篩選選項的結果數（facet），條件格式同 recommendRestaurants
+ * 每個維度用「其他條件都套用、只看這個選項」計算（料理 / 類型可複選，選了某項至少會有這麼多間）；
+ * 預算同篩選規則連沒預算資料的一起算。全部是 shard 索引 bitset 的 AND + popcount，不逐筆掃餐廳
+ * （例外：附近餐廳模式對 grid 候選算精確距離、「現在營業」逐筆查一格 bitmap）
+ * @returns {Object|null} 沒有 shard 或索引過期時回傳 null（前端就不顯示數字、不反灰）
+ */
+function getFacets(filters = {}) {
+  const manifest = loadShardManifest();
+  if (!manifest) return null;
+  const shards = Object.keys(manifest.cities)
+    .filter(city => CITY_ALLOWLIST.has(city))
+    .map(city => [city, loadCityShard(manifest, city)]);
+  if (!shards.every(([, shard]) => isIndexUsable(shard._index, shard.restaurants))) return null;
+
+  const now = new Date();
+  const day = (now.getDay() + 6) % 7; // 0 = 星期一
+  const time = now.getHours() * 60 + now.getMinutes();
+  const zeros = keys => Object.fromEntries(keys.map(key => [key, 0]));
+  const facets = {
+    total: 0,
+    cuisine_style: zeros(Object.keys(CUISINE_CATEGORY_MAP)),
+    type: zeros(Object.keys(TYPE_CATEGORY_MAP)),
+    budget: zeros(BUDGET_CATEGORIES),
+    diningTime: zeros(['now', ...Object.keys(DINING_WINDOWS)]),
+    city: {},
+    district: {}
+  };
+
+  for (const [city, shard] of shards) {
+    const index = shard._index;
+    const n = shard.restaurants.length;
+    const byteLength = (n + 7) >> 3;
+    const clauses = {};
+    if (filters.cuisine_style && filters.cuisine_style.length > 0) {
+      clauses.cuisine_style = unionPostings(index.cuisine_style, filters.cuisine_style, byteLength);
+    }
+    if (filters.type && filters.type.length > 0) {
+      clauses.type = unionPostings(index.type, filters.type, byteLength);
+    }
+    if (filters.budget && filters.budget !== 'all') {
+      clauses.budget = unionPostings(index.budget, [filters.budget, BUDGET_UNKNOWN], byteLength);
+    }
+    if (filters.userLocation && filters.maxDistance) {
+      clauses.location = nearbyBits(shard, filters, byteLength);
+    }
+    if (filters.diningTime && filters.diningTime !== 'all') {
+      clauses.diningTime = diningBits(shard, filters.diningTime, day, time, byteLength);
+    }
+    if (filters.city === city && filters.district) {
+      clauses.district = unionPostings(index.district, [filters.district], byteLength);
+    }
+    const without = dimension => intersectAll(
+      Object.entries(clauses).filter(([key]) => key !== dimension).map(([, bits]) => bits), n);
+
+    // 縣市 / 行政區：不管目前選的縣市和行政區
+    const cityBase = without('district');
+    facets.city[city] = countAnd(cityBase, allBits(n));
+    facets.district[city] = {};
+    for (const district of Object.keys(index.district)) {
+      facets.district[city][district] = countAnd(cityBase, postingBits(index.district, district));
+    }
+
+    if (filters.city && filters.city !== city) continue;
+    facets.total += countAnd(without(null), allBits(n));
+    let base = without('cuisine_style');
+    for (const option of Object.keys(facets.cuisine_style)) {
+      facets.cuisine_style[option] += countAnd(base, postingBits(index.cuisine_style, option));
+    }
+    base = without('type');
+    for (const option of Object.keys(facets.type)) {
+      facets.type[option] += countAnd(base, postingBits(index.type, option));
+    }
+    base = without('budget');
+    for (const option of BUDGET_CATEGORIES) {
+      facets.budget[option] += countAnd(base, unionPostings(index.budget, [option, BUDGET_UNKNOWN], byteLength));
+    }
+    base = without('diningTime');
+    for (const option of Object.keys(facets.diningTime)) {
+      facets.diningTime[option] += countAnd(base, diningBits(shard, option, day, time, byteLength));
+    }
+  }
+  return facets;
+}
+
 module.exports = {
   recommendRestaurants,
   getFilterOptions,
   getLocationOptions,
-  loadRestaurantDatabase
+  loadRestaurantDatabase,
+  loadDatabaseFile,
+  getRestaurantPool,
+  updateSeenToken,
+  getFacets,
+  facetFiltersFromQuery,
+  getCandidateCacheStats,
+  loadShardManifest
 };
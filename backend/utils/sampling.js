@@ -0,0 +1,100 @@
+/**
+ * 推薦結果的隨機抽樣
+ *
+ * 取代 `restaurants.sort(() => Math.random() - 0.5).slice(0, limit)`：那是 O(n log n)、
+ * 分佈不均（比較函式不一致，各引擎結果不同），還會就地改掉傳進來的陣列。
+ * - sample：稀疏 Fisher–Yates，只記被換過的位置 → O(k) 時間 / 空間，不改動輸入
+ * - weightedSample：Efraimidis–Spirakis A-Res，每筆 key = ln(u) / w，取最大的 k 個 → 一趟 O(n·k)
+ * - 給 seed 就用 mulberry32，同一個 seed + 同一批候選 = 同樣的結果（測試 / 分享連結可重現）
+ */
+
+/**
+ * mulberry32 PRNG：回傳 [0, 1) 的函式
+ */
+function mulberry32(seed) {
+  let a = seed >>> 0;
+  return function random() {
+    a = (a + 0x6D2B79F5) >>> 0;
+    let t = a;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+/**
+ * seed（數字或字串）→ uint32；字串用 FNV-1a
+ */
+function seedToUint32(seed) {
+  if (typeof seed === 'number' && Number.isFinite(seed)) return Math.trunc(seed) >>> 0;
+  let h = 0x811C9DC5;
+  for (const ch of String(seed)) {
+    h = Math.imul(h ^ ch.codePointAt(0), 0x01000193) >>> 0;
+  }
+  return h;
+}
+
+/**
+ * 沒給 seed 用 Math.random，有給就用 seed 起始的 mulberry32
+ */
+function makeRandom(seed) {
+  if (seed === undefined || seed === null || seed === '') return Math.random;
+  return mulberry32(seedToUint32(seed));
+}
+
+function clampCount(k, n) {
+  const count = Math.floor(Number(k));
+  return Number.isFinite(count) ? Math.max(0, Math.min(count, n)) : 0;
+}
+
+/**
+ * 從 items 均勻抽 k 個（不重複、順序也是隨機的），不改動 items
+ */
+function sample(items, k, random = Math.random) {
+  const n = items.length;
+  const count = clampCount(k, n);
+  const swapped = new Map(); // 虛擬陣列中被換過的位置 -> 目前放的原始 index
+  const result = new Array(count);
+  for (let i = 0; i < count; i++) {
+    const j = i + Math.floor(random() * (n - i));
+    const picked = swapped.has(j) ? swapped.get(j) : j;
+    swapped.set(j, swapped.has(i) ? swapped.get(i) : i);
+    result[i] = items[picked];
+  }
+  return result;
+}
+
+/**
+ * 依 weight(item) 加權抽 k 個（不重複）；權重越大越容易被抽到、也越容易排前面
+ * 權重 <= 0 或不是數字的不會被抽到
+ */
+function weightedSample(items, k, weight, random = Math.random) {
+  const count = clampCount(k, items.length);
+  const top = []; // {key, item}，依 key 遞減，最多 count 個
+  if (count === 0) return [];
+  for (const item of items) {
+    const w = weight(item);
+    if (!(w > 0)) continue;
+    const key = Math.log(random()) / w; // = ln(u^(1/w))，log 空間避免 u^(1/w) 在小權重時下溢
+    if (top.length === count) {
+      if (key <= top[count - 1].key) continue;
+      top.pop();
+    }
+    let i = top.length;
+    top.push(null);
+    while (i > 0 && top[i - 1].key < key) {
+      top[i] = top[i - 1];
+      i--;
+    }
+    top[i] = { key, item };
+  }
+  return top.map(entry => entry.item);
+}
+
+module.exports = {
+  mulberry32,
+  seedToUint32,
+  makeRandom,
+  sample,
+  weightedSample
+};
@@ -0,0 +1,122 @@
+/**
+ * 「這一輪已經抽過」的 session token：推薦目錄位置的 bitset
+ *
+ * 格式：`<目錄版本>.<編碼><base64url>`
+ * - 目錄 = 推薦池依固定順序編號（recommendation.js 的 getCatalogue），bit i = 目錄第 i 間抽過了
+ * - 目錄版本 = 目錄內容的 hash；重新部署 / 資料更新後版本不同，舊 token 直接作廢，不會誤排除別間
+ * - 編碼取短的：b = 原始 bitset（目錄大小 / 8 bytes）、d = 排序後位置差的 varint（抽過的少時只有幾 bytes）
+ * 不管排除了幾間，token 最長就是目錄大小 / 8 bytes，query string 不會跟著抽的次數變長。
+ */
+
+const DENSE = 'b';
+const SPARSE = 'd';
+
+/**
+ * FNV-1a（32 bit）→ 8 位 hex
+ */
+function fnv1a(text) {
+  let h = 0x811C9DC5;
+  for (let i = 0; i < text.length; i++) {
+    h = Math.imul(h ^ text.charCodeAt(i), 0x01000193) >>> 0;
+  }
+  return h.toString(16).padStart(8, '0');
+}
+
+function emptySeen(size) {
+  return new Uint8Array((size + 7) >> 3);
+}
+
+function setBit(bits, position) {
+  bits[position >> 3] |= 1 << (position & 7);
+}
+
+function hasBit(bits, position) {
+  return ((bits[position >> 3] >> (position & 7)) & 1) === 1;
+}
+
+function positionsOf(bits) {
+  const positions = [];
+  for (let i = 0; i < bits.length; i++) {
+    let byte = bits[i];
+    while (byte) {
+      const low = byte & -byte;
+      positions.push((i << 3) + 31 - Math.clz32(low));
+      byte ^= low;
+    }
+  }
+  return positions;
+}
+
+function encodeVarints(positions) {
+  const bytes = [];
+  let previous = -1;
+  for (const position of positions) {
+    let gap = position - previous - 1;
+    previous = position;
+    while (gap >= 0x80) {
+      bytes.push((gap & 0x7F) | 0x80);
+      gap >>>= 7;
+    }
+    bytes.push(gap);
+  }
+  return Uint8Array.from(bytes);
+}
+
+function decodeVarints(bytes, bits, size) {
+  let previous = -1;
+  let gap = 0;
+  let shift = 0;
+  for (const byte of bytes) {
+    gap |= (byte & 0x7F) << shift;
+    if (byte & 0x80) {
+      shift += 7;
+      if (shift > 21) return false; // 目錄不會超過 2^28 間
+      continue;
+    }
+    previous += gap + 1;
+    if (previous >= size) return false;
+    setBit(bits, previous);
+    gap = 0;
+    shift = 0;
+  }
+  return shift === 0;
+}
+
+/**
+ * token → bitset；沒給、格式錯或目錄版本不同都回傳 null（當作沒抽過）
+ */
+function decodeSeen(token, catalogue) {
+  if (typeof token !== 'string') return null;
+  const dot = token.indexOf('.');
+  if (dot < 0 || token.slice(0, dot) !== catalogue.version) return null;
+  const mode = token[dot + 1];
+  const payload = Buffer.from(token.slice(dot + 2), 'base64url');
+  const bits = emptySeen(catalogue.size);
+  if (mode === DENSE) {
+    if (payload.length !== bits.length) return null;
+    bits.set(payload);
+    return bits;
+  }
+  if (mode === SPARSE) {
+    return decodeVarints(payload, bits, catalogue.size) ? bits : null;
+  }
+  return null;
+}
+
+/**
+ * bitset → token（dense / sparse 取短的）
+ */
+function encodeSeen(bits, catalogue) {
+  const sparse = encodeVarints(positionsOf(bits));
+  const [mode, payload] = sparse.length < bits.length ? [SPARSE, sparse] : [DENSE, bits];
+  return `${catalogue.version}.${mode}${Buffer.from(payload).toString('base64url')}`;
+}
+
+module.exports = {
+  fnv1a,
+  emptySeen,
+  setBit,
+  hasBit,
+  decodeSeen,
+  encodeSeen
+};
@@ -30,6 +30,8 @@ let locationOptions = {
 
 let userLocation = null;
 let displayedRestaurants = [];
+// 這一輪的抽選 session：伺服器發的 seen token 記住已經抽過哪些（重抽不用把整串店名塞進 URL）
+let drawSession = { seen: null };
 let locationRequestInProgress = false;
 
 // 廣告插入：每抽 N 次插一個（OpenRice 小知識 + 贊助餐廳合併池）
@@ -528,6 +530,7 @@ function setupFormSubmit() {
 
             // 重置整個 session（新表單提交視為新一輪）
             displayedRestaurants = [];
+            drawSession = { seen: null };
             drawCount = 0;
 
             track('submit_draw', {
@@ -544,7 +547,7 @@ function setupFormSubmit() {
             // 一次只抽 1 間，強化「抽獎」感
             const minDelay = new Promise(r => setTimeout(r, 500));
             const [restaurants] = await Promise.all([
-                fetchRecommendations(formData, [], 1),
+                fetchRecommendations(formData, [], 1, drawSession),
                 minDelay,
             ]);
             console.log('API 返回的餐廳數量:', restaurants.length);
@@ -1210,12 +1213,8 @@ async function refreshSingleCard(cardIndex, currentList) {
 
     try {
         const formData = collectFormData();
-        // exclude 用當前 list 全部 + displayedRestaurants（避免抽到已顯示過的）
-        const excludeSet = new Set([
-            ...currentList.map(r => r.name),
-            ...displayedRestaurants,
-        ]);
-        const newResults = await fetchRecommendations(formData, Array.from(excludeSet), 1);
+        // 已顯示過的由 session 的 seen token 排除，另外排除當前 list（用 or_id）
+        const newResults = await fetchRecommendations(formData, currentList, 1, drawSession);
 
         if (!newResults || newResults.length === 0) {
             card.classList.remove('is-refreshing');
@@ -1294,7 +1293,7 @@ function setupResetButton() {
             } else {
                 const formData = collectFormData();
                 const [restaurants] = await Promise.all([
-                    fetchRecommendations(formData, displayedRestaurants, 1),
+                    fetchRecommendations(formData, [], 1, drawSession),
                     minDelay,
                 ]);
 
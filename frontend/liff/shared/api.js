@@ -97,13 +97,11 @@ export async function loadLocationOptions() {
 }
 
 /**
- * 獲取推薦餐廳
+ * 表單篩選條件 → query 參數（/recommend 和 /facets 共用）
  * @param {Object} formData - 表單數據
- * @param {Array<string>} excludeNames - 要排除的餐廳名稱列表
- * @returns {Promise<Array>} 推薦的餐廳列表
+ * @returns {URLSearchParams}
  */
-export async function fetchRecommendations(formData, excludeNames = [], limitOverride = null) {
-    // 建立查詢參數
+function buildFilterParams(formData) {
     const params = new URLSearchParams();
     
     if (formData.cuisine_style && formData.cuisine_style.length > 0) {
@@ -140,10 +138,39 @@ export async function fetchRecommendations(formData, excludeNames = [], limitOve
         }
     }
     
-    // 排除已顯示的餐廳
-    if (excludeNames && excludeNames.length > 0) {
+    return params;
+}
+
+/**
+ * 獲取推薦餐廳
+ * @param {Object} formData - 表單數據
+ * @param {Array<Object|string>} exclude - 要排除的餐廳（餐廳物件用 or_id 排除；字串視為店名，舊用法）
+ * @param {number|null} limitOverride - 這次要幾間（預設用 formData.limit）
+ * @param {Object|null} session - 抽選 session（{seen: null}）：會帶上伺服器發的 seen token 排除這一輪抽過的，
+ *   回應後更新 session.seen；開新一輪就換一個新的 session 物件
+ * @returns {Promise<Array>} 推薦的餐廳列表
+ */
+export async function fetchRecommendations(formData, exclude = [], limitOverride = null, session = null) {
+    // 建立查詢參數
+    const params = buildFilterParams(formData);
+    
+    // 排除已顯示的餐廳（有 or_id 用 or_id：分店可能同名，query string 也比較短）
+    const excludeIds = [];
+    const excludeNames = [];
+    (exclude || []).forEach(item => {
+        if (item && typeof item === 'object' && item.or_id != null) excludeIds.push(item.or_id);
+        else if (item && typeof item === 'object') { if (item.name) excludeNames.push(item.name); }
+        else if (item) excludeNames.push(item);
+    });
+    if (excludeIds.length > 0) {
+        params.append('exclude_ids', excludeIds.join(','));
+    }
+    if (excludeNames.length > 0) {
         params.append('exclude', excludeNames.join(','));
     }
+    if (session && session.seen) {
+        params.append('seen', session.seen);
+    }
     
     params.append('limit', limitOverride ?? formData.limit ?? 5);
     
@@ -166,9 +193,31 @@ export async function fetchRecommendations(formData, excludeNames = [], limitOve
         throw new Error(data.error || '獲取推薦餐廳失敗');
     }
     
+    if (session && data.seen) {
+        session.seen = data.seen;
+    }
+    
     return data.restaurants || [];
 }
 
+/**
+ * 各篩選選項在目前條件下的結果數（前端把 0 間的選項反灰）
+ * @param {Object} formData - 表單數據（同 fetchRecommendations）
+ * @returns {Promise<Object|null>} {total, cuisine_style: {選項: 間數}, type, budget, diningTime, city, district}；
+ *   伺服器沒有索引時為 null
+ */
+export async function fetchFacets(formData) {
+    const response = await fetch(`${API_BASE_URL}/restaurants/facets?${buildFilterParams(formData).toString()}`);
+    if (!response.ok) {
+        throw new Error(`API 請求失敗: ${response.status}`);
+    }
+    const data = await response.json();
+    if (!data.success) {
+        throw new Error(data.error || '獲取篩選統計失敗');
+    }
+    return data.facets;
+}
+
 /**
  * 抽獎相關 API
  */
@@ -15,6 +15,38 @@ if [ -f "restaurants_database.json" ]; then
     echo "❌ 數據庫文件複製失敗"
     exit 1
   fi
+
+  # 有差量資料庫（_rebuild/delta.py）時：逐個 patch 驗 hash 到 head，head 必須和主檔一致，
+  # 再把 head 寫成 function 的資料庫，bundle / shard 都從 head 產生；deltas/ 一起打包進函數
+  SRC_DB="restaurants_database.json"
+  if [ -f "deltas/manifest.json" ]; then
+    echo "驗證差量資料庫..."
+    if python3 _rebuild/delta.py verify; then
+      echo "✅ 差量資料庫驗證通過"
+    else
+      echo "❌ 差量資料庫驗證失敗（patch 鏈 hash 不符，或主檔和 head 不同：跑 python3 _rebuild/delta.py make 補 patch）"
+      exit 1
+    fi
+    python3 _rebuild/delta.py apply --out netlify/functions/restaurants_database.json
+    if [ $? -ne 0 ]; then
+      echo "❌ 套用差量資料庫失敗"
+      exit 1
+    fi
+    SRC_DB="netlify/functions/restaurants_database.json"
+    rm -rf netlify/functions/deltas
+    cp -r deltas netlify/functions/deltas
+    echo "✅ 差量資料庫 head 已寫入函數目錄"
+  fi
+
+  # 產生函數實際載入的精簡 bundle（只含 enabled 餐廳 + API 用到的欄位，附 .gz/.br）
+  echo "產生精簡餐廳 bundle..."
+  python3 _rebuild/build_bundle.py --src "$SRC_DB"
+  if [ $? -eq 0 ]; then
+    echo "✅ 餐廳 bundle 產生成功"
+  else
+    echo "❌ 餐廳 bundle 產生失敗"
+    exit 1
+  fi
 else
   echo "❌ 找不到數據庫文件 restaurants_database.json"
   exit 1
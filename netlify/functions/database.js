@@ -1,4 +1,5 @@
 // 將數據庫文件作為模組導出
 // 這樣 Netlify Functions 會自動包含它
-const database = require('./restaurants_database.json');
+// 構建時由 _rebuild/build_bundle.py 產生精簡版（只含 enabled 餐廳 + API 用到的欄位、單行 JSON）
+const database = require('./restaurants_bundle.json');
 module.exports = database;
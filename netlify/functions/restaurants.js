@@ -16,9 +16,15 @@ function applyCityAllowlist(data) {
   return data;
 }
 
+// 找到過的資料庫路徑：warm invocation 直接用（解析結果由 recommendation 模組依 mtime 快取）
+let resolvedDbPath = null;
+
 // 覆蓋 loadRestaurantDatabase 函數以使用正確的路徑
 // 在 Netlify Functions 中，嘗試從模組導入數據庫
 function loadRestaurantDatabase() {
+  if (resolvedDbPath && fs.existsSync(resolvedDbPath)) {
+    return recommendationModule.loadDatabaseFile(resolvedDbPath);
+  }
   console.log('loadRestaurantDatabase called');
   console.log('__dirname:', __dirname);
   console.log('process.cwd():', process.cwd());
@@ -50,10 +56,10 @@ function loadRestaurantDatabase() {
     try {
       const stats = fs.statSync(functionDbPath);
       console.log('File size:', stats.size, 'bytes');
-      const data = fs.readFileSync(functionDbPath, 'utf-8');
-      const parsed = JSON.parse(data);
+      const parsed = recommendationModule.loadDatabaseFile(functionDbPath);
       console.log('Database loaded successfully, restaurants count:', parsed.restaurants?.length || 0);
-      return applyCityAllowlist(parsed);
+      resolvedDbPath = functionDbPath;
+      return parsed;
     } catch (err) {
       console.error('Error reading database file:', err);
       console.error('Error stack:', err.stack);
@@ -80,10 +86,10 @@ function loadRestaurantDatabase() {
       try {
         const stats = fs.statSync(dbPath);
         console.log('File size:', stats.size, 'bytes');
-        const data = fs.readFileSync(dbPath, 'utf-8');
-        const parsed = JSON.parse(data);
+        const parsed = recommendationModule.loadDatabaseFile(dbPath);
         console.log('Database loaded successfully, restaurants count:', parsed.restaurants?.length || 0);
-        return applyCityAllowlist(parsed);
+        resolvedDbPath = dbPath;
+        return parsed;
       } catch (err) {
         console.error('Error reading database file:', err);
         console.error('Error stack:', err.stack);
@@ -137,6 +143,12 @@ function getFilterOptions() {
 
 function getLocationOptions() {
   try {
+    // 構建時有產生縣市 shard 就直接從 manifest 回答（不載入餐廳）
+    if (recommendationModule.loadShardManifest()) {
+      console.log('getLocationOptions: answering from shard manifest');
+      return recommendationModule.getLocationOptions();
+    }
+
     console.log('getLocationOptions: Loading database...');
     const data = loadRestaurantDatabase();
     console.log('getLocationOptions: Database loaded, restaurants count:', data.restaurants?.length || 0);
@@ -228,7 +240,18 @@ function getLocationOptions() {
 }
 
 // 設置環境變數，讓 recommendation.js 知道數據庫文件的位置
-process.env.RESTAURANT_DB_PATH = path.join(__dirname, 'restaurants_database.json');
+// 優先用構建時產生的精簡 bundle，本地沒跑過 build_bundle.py 時退回完整檔
+const bundlePath = path.join(__dirname, 'restaurants_bundle.json');
+process.env.RESTAURANT_DB_PATH = fs.existsSync(bundlePath)
+  ? bundlePath
+  : path.join(__dirname, 'restaurants_database.json');
+// 縣市 shard（build_bundle.py 產生，netlify.toml included_files 會打包進函數）
+process.env.RESTAURANT_SHARDS_DIR = path.join(__dirname, 'shards');
+// 差量資料庫（netlify-build.sh 驗證後複製進來；shard 也是從同一個 head 產生的）
+const deltaDir = path.join(__dirname, 'deltas');
+if (fs.existsSync(path.join(deltaDir, 'manifest.json'))) {
+  process.env.RESTAURANT_DELTA_DIR = deltaDir;
+}
 
 // 使用 recommendation 模組中的函數
 const { recommendRestaurants } = recommendationModule;
@@ -344,6 +367,22 @@ exports.handler = async (event, context) => {
         filters.exclude = queryParams.exclude.split(',').map(s => s.trim());
       }
       
+      if (queryParams.exclude_ids) {
+        filters.excludeIds = queryParams.exclude_ids.split(',').map(s => s.trim());
+      }
+      
+      if (queryParams.seen) {
+        filters.seen = queryParams.seen;
+      }
+      
+      if (queryParams.seed) {
+        filters.seed = queryParams.seed;
+      }
+      
+      if (queryParams.weight) {
+        filters.weightBy = queryParams.weight;
+      }
+      
       const limit = parseInt(queryParams.limit) || 5;
       const recommendations = recommendRestaurants(filters, limit);
       
@@ -354,7 +393,30 @@ exports.handler = async (event, context) => {
           success: true,
           count: recommendations.length,
           filters: filters,
-          restaurants: recommendations
+          restaurants: recommendations,
+          seen: recommendationModule.updateSeenToken(filters.seen, recommendations)
+        })
+      };
+    } else if (apiPath === '/facets') {
+      // 各篩選選項在目前條件下的結果數（shard 索引的 bitset popcount）
+      const filters = recommendationModule.facetFiltersFromQuery(queryParams);
+      return {
+        statusCode: 200,
+        headers,
+        body: JSON.stringify({
+          success: true,
+          filters,
+          facets: recommendationModule.getFacets(filters)
+        })
+      };
+    } else if (apiPath === '/cache-stats') {
+      // 候選池快取統計（只反映這個 warm instance）
+      return {
+        statusCode: 200,
+        headers,
+        body: JSON.stringify({
+          success: true,
+          candidates: recommendationModule.getCandidateCacheStats()
         })
       };
     } else if (apiPath === '/filter-options') {
@@ -430,8 +492,7 @@ exports.handler = async (event, context) => {
       }
     } else if (apiPath === '/all') {
       // 獲取所有「可推薦」的餐廳（enabled=true，跟主推薦池一致）
-      const data = loadRestaurantDatabase();
-      const enabled = (data.restaurants || []).filter(r => r.enabled);
+      const enabled = recommendationModule.getRestaurantPool(loadRestaurantDatabase());
       return {
         statusCode: 200,
         headers,
@@ -443,9 +504,8 @@ exports.handler = async (event, context) => {
       };
     } else if (apiPath === '/with-booking-offers') {
       // 有訂位獨家優惠的餐廳（給廣告輪播用，回傳完整 record 讓廣告卡能用所有資料）
-      const data = loadRestaurantDatabase();
-      const list = (data.restaurants || [])
-        .filter(r => r.enabled && r.has_booking_offer && (r.booking_offers || []).length > 0);
+      const list = recommendationModule.getRestaurantPool(loadRestaurantDatabase())
+        .filter(r => r.has_booking_offer && (r.booking_offers || []).length > 0);
       return {
         statusCode: 200,
         headers,
@@ -453,10 +513,9 @@ exports.handler = async (event, context) => {
       };
     } else if (apiPath === '/sponsored') {
       // 付費贊助餐廳（給廣告位輪播用）
-      const data = loadRestaurantDatabase();
       // 回傳完整 record，讓廣告卡能用所有欄位（含影片）
-      const sponsored = (data.restaurants || [])
-        .filter(r => r.enabled && r.is_paid_account);
+      const sponsored = recommendationModule.getRestaurantPool(loadRestaurantDatabase())
+        .filter(r => r.is_paid_account);
       return {
         statusCode: 200,
         headers,